@@ -62,11 +62,16 @@ from ._check_assert.assert_rules import (  # noqa: E402,F401
     check_exact,
     check_suppress,
     check_type,
+    check_unordered,
+    gen_check_array,
     gen_check_date_proximity,
     gen_check_date_range,
+    gen_check_frame,
+    gen_check_keyed,
 )
 from ._check_assert.cache_store import CacheStoreType, LocalJSONCacheStore  # noqa: E402,F401
 from ._check_assert.config import CacheAssertContainerKeys, register, retrieve  # noqa: E402,F401
 from ._check_assert.converter import Converter  # noqa: E402,F401
 from ._check_assert.error_message import NoCacheError  # noqa: E402,F401
-from ._check_assert.validator import DictDiffValidator, ValidatorType  # noqa: E402,F401
+from ._check_assert.sqlite_store import SQLiteCacheStore  # noqa: E402,F401
+from ._check_assert.validator import DictDiffValidator, JSONDiffValidator, ValidatorType  # noqa: E402,F401
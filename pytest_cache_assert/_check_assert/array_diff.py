@@ -0,0 +1,163 @@
+"""Vectorized comparison of numeric arrays with NumPy.
+
+Arrays are cached as nested lists (see `_serialize_numpy`), which are converted back to arrays and compared in one
+    vectorized operation rather than element by element. Mismatches are summarized with the number of elements, the
+    maximum absolute and relative error, and the first offending indices instead of one entry per element
+
+"""
+
+from contextlib import suppress
+
+from beartype import beartype
+from beartype.typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+np = None
+ARRAY_TYPES: FrozenSet[type] = frozenset()
+"""Exact type of NumPy arrays when installed."""
+
+with suppress(ImportError):
+    import numpy as np
+
+    ARRAY_TYPES = frozenset({np.ndarray})
+
+_NUMERIC_KINDS = frozenset('iuf')
+"""Kinds of `numpy.dtype` that are compared with a tolerance. Other arrays (i.e. bool or str) must be equal."""
+
+
+def _require_numpy() -> None:
+    if np is None:
+        msg = "The 'numpy' package is required to compare arrays"
+        raise RuntimeError(msg)
+
+
+def _to_array(value: Any) -> Optional[Any]:
+    """Return an array with a non-object dtype or None for ragged or mixed data."""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        with suppress(ValueError, TypeError):
+            array = np.asarray(value)
+            if array.dtype.kind != 'O':
+                return array
+    return None
+
+
+def _equal(old: Any, new: Any) -> bool:
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):  # Such as the ambiguous truth value of nested arrays
+        return False
+
+
+@beartype
+def array_diff(  # noqa: PLR0913
+    old: Any,
+    new: Any,
+    *,
+    rtol: float = 0.0,
+    atol: float = 0.0,
+    equal_nan: bool = False,
+    max_indices: int = 10,
+) -> Dict[str, Any]:
+    """Compare two arrays (or nested lists) like `numpy.allclose` and summarize the mismatched elements.
+
+    Args:
+        old: old array or nested lists (typically cached data)
+        new: new array or nested lists (typically test data)
+        rtol: relative tolerance. See `numpy.isclose`
+        atol: absolute tolerance. See `numpy.isclose`
+        equal_nan: if True, NaN values in the same position are equal
+        max_indices: maximum number of offending indices to report
+
+    Returns:
+        Dict[str, Any]: empty if equal, otherwise `shape_changed` or `array_mismatch` with the summary statistics.
+            Values that are not rectangular arrays are reported with the old and new values unless equal
+
+    """
+    _require_numpy()
+    old_array, new_array = _to_array(old), _to_array(new)
+    if old_array is None or new_array is None:
+        return {} if _equal(old, new) else {'old_value': old, 'new_value': new}
+    if old_array.shape != new_array.shape:
+        return {'shape_changed': {'old_shape': [*old_array.shape], 'new_shape': [*new_array.shape]}}
+
+    numeric = old_array.dtype.kind in _NUMERIC_KINDS and new_array.dtype.kind in _NUMERIC_KINDS
+    if numeric:
+        mismatched = ~np.isclose(old_array, new_array, rtol=rtol, atol=atol, equal_nan=equal_nan)
+    else:
+        mismatched = old_array != new_array
+    count = int(np.count_nonzero(mismatched))
+    if not count:
+        return {}
+
+    indices: List[Any] = np.argwhere(mismatched)[:max_indices].tolist()
+    summary: Dict[str, Any] = {
+        'mismatched': count,
+        'size': int(mismatched.size),
+        'first_indices': [_i[0] for _i in indices] if mismatched.ndim == 1 else indices,
+    }
+    if numeric:
+        old_values = old_array[mismatched].astype(float)
+        new_values = new_array[mismatched].astype(float)
+        abs_error = np.abs(new_values - old_values)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rel_error = abs_error / np.abs(old_values)
+        summary['max_abs_error'] = float(np.nanmax(abs_error, initial=0.0))
+        summary['max_rel_error'] = float(np.nanmax(rel_error, initial=0.0))
+    return {'array_mismatch': summary}
+
+
+@beartype
+def exact_array_diff(old: Any, new: Any) -> Dict[str, Any]:
+    """Compare two arrays without a tolerance, where the dtype must also match.
+
+    Args:
+        old: old array (typically cached data)
+        new: new array (typically test data)
+
+    Returns:
+        Dict[str, Any]: empty if identical, otherwise `dtype_changed` or the summary from `array_diff`
+
+    """
+    if old.dtype != new.dtype:
+        return {'dtype_changed': {'old_dtype': old.dtype.str, 'new_dtype': new.dtype.str}}
+    return array_diff(old, new)
+
+
+def _align(old: Any, new: Any) -> Tuple[Any, Any]:
+    old_type, new_type = type(old), type(new)
+    if old_type in ARRAY_TYPES and new_type is list:
+        return old.tolist(), new
+    if new_type in ARRAY_TYPES and old_type is list:
+        return old, new.tolist()
+    if old_type is dict and new_type is dict:
+        pairs = {key: _align(value, new[key]) for key, value in old.items() if key in new}
+        if all(old_value is old[key] and new_value is new[key] for key, (old_value, new_value) in pairs.items()):
+            return old, new
+        return (
+            {**old, **{key: old_value for key, (old_value, _) in pairs.items()}},
+            {**new, **{key: new_value for key, (_, new_value) in pairs.items()}},
+        )
+    if old_type is list and new_type is list:
+        pairs_list = [*map(_align, old, new)]
+        if all(old_value is _o and new_value is _n for (old_value, new_value), _o, _n in zip(pairs_list, old, new)):
+            return old, new
+        size = len(pairs_list)
+        return [*(_p[0] for _p in pairs_list), *old[size:]], [*(_p[1] for _p in pairs_list), *new[size:]]
+    return old, new
+
+
+@beartype
+def align_arrays(old: Any, new: Any) -> Tuple[Any, Any]:
+    """Convert each array to nested lists where the other data has a list, so that both are compared as JSON.
+
+    Arrays are only kept by `make_diffable` with `array_min_size`, so data that was cached as lists before the option
+        was enabled (or that is compared with `assert_against_dict`) has the same result as without the option
+
+    Args:
+        old: old data (typically cached data)
+        new: new data (typically test data)
+
+    Returns:
+        Tuple[Any, Any]: the old and new data, which are the same objects if there was nothing to convert
+
+    """
+    return _align(old, new)
@@ -0,0 +1,205 @@
+"""Store large NumPy arrays as `.npy` sidecar files next to the cache file.
+
+Arrays with at least `min_size` elements are kept as arrays by `make_diffable` and written to a `<name>.arrays/`
+    directory beside the cache file, where each file is named by the digest of the array. The cache file stores a
+    reference (`{"_npy": {"digest": ..., "dtype": "<f8", "shape": [...]}}`) and the arrays are read back as read-only
+    memory maps, so that the cached array is never copied into memory for the comparison
+
+"""
+
+import glob
+import io
+import re
+from contextlib import suppress
+from functools import partial
+from hashlib import blake2b
+from pathlib import Path
+
+from beartype import beartype
+from beartype.typing import Any, Callable, Dict, Set, Tuple
+from pydantic import BaseModel
+
+from .blob_store import resolve
+from .caching import CODECS, StoredData, _atomic_write_bytes, read_cache_text
+from .constants import KEY_NAME_ARRAY, KEY_NAME_BLOB
+from .references import escape_key, unescape_key
+from .serializer import loads
+
+np = None
+with suppress(ImportError):
+    import numpy as np
+
+ARRAY_DIR_SUFFIX = '.arrays'
+"""Suffix of the sidecar directory, which is named after the cache file (i.e. `test_a.arrays/`)."""
+
+_RE_CACHE_SUFFIX = re.compile(r'\.json(?:' + '|'.join(re.escape(_c.suffix) for _c in CODECS.values()) + r')?$')
+
+
+class _ArraySettings(BaseModel):
+    """Storage of large NumPy arrays in sidecar files. Disabled by default."""
+
+    min_size: int = 0
+    """Minimum number of elements of an array to store as a sidecar file. Disabled when 0."""
+
+
+ARRAYS = _ArraySettings()
+"""Session-scoped array settings for writing cache files."""
+
+
+@beartype
+def array_dir(path_cache_file: Path) -> Path:
+    """Return the sidecar directory of the cache file."""
+    return path_cache_file.with_name(_RE_CACHE_SUFFIX.sub('', path_cache_file.name) + ARRAY_DIR_SUFFIX)
+
+
+def _digest(array: Any) -> str:
+    hasher = blake2b(f'{array.dtype.str}{array.shape}'.encode(), digest_size=16)
+    hasher.update(np.ascontiguousarray(array).data)  # type: ignore[union-attr]
+    return hasher.hexdigest()
+
+
+@beartype
+def is_array_reference(node: Any) -> bool:
+    """Check if the node is a reference to a sidecar file."""
+    return isinstance(node, dict) and len(node) == 1 and isinstance(node.get(KEY_NAME_ARRAY), dict)
+
+
+@beartype
+def stage_arrays(data: Any, path_cache_file: Path) -> Tuple[Any, Callable[[], None]]:
+    """Replace each array with a reference and escape the keys without writing the sidecar files.
+
+    Args:
+        data: serialized test data that may contain arrays (see `make_diffable`)
+        path_cache_file: location of the cache file that will reference the sidecar files
+
+    Returns:
+        Tuple[Any, Callable[[], None]]: the data with references (or the same object if there were no arrays and no
+            keys to escape) and a function to write the sidecar files, which is only called if the cache file is
+            written so that no unreferenced sidecar files are left behind
+
+    """
+    arrays: Dict[str, Any] = {}
+    if np is None:
+        return data, partial(_write_arrays, path_cache_file, arrays)
+
+    def _externalize(node: Any) -> Any:
+        if isinstance(node, dict):
+            items = [(escape_key(key), _externalize(value)) for key, value in node.items()]
+            changed = any(
+                new_key is not key or new is not value for (new_key, new), (key, value) in zip(items, node.items())
+            )
+            return dict(items) if changed else node
+        if isinstance(node, list):
+            values = [_externalize(value) for value in node]
+            return values if any(new is not old for new, old in zip(values, node)) else node
+        if not isinstance(node, np.ndarray):  # type: ignore[union-attr]
+            return node
+        digest = _digest(node)
+        arrays[digest] = node
+        return {KEY_NAME_ARRAY: {'digest': digest, 'dtype': node.dtype.str, 'shape': [*node.shape]}}
+
+    return _externalize(data), partial(_write_arrays, path_cache_file, arrays)
+
+
+def _write_arrays(path_cache_file: Path, arrays: Dict[str, Any]) -> None:
+    path_array_dir = array_dir(path_cache_file)
+    for digest, array in arrays.items():
+        path_array = path_array_dir / f'{digest}.npy'
+        if not path_array.is_file():  # Content-addressed sidecar files are never modified
+            buffer = io.BytesIO()
+            np.save(buffer, array, allow_pickle=False)  # type: ignore[union-attr]
+            _atomic_write_bytes(path_array, buffer.getvalue())
+
+
+@beartype
+def externalize_arrays(data: Any, path_cache_file: Path) -> Any:
+    """Write each array to a sidecar file and replace the array with a reference. See `stage_arrays`.
+
+    Args:
+        data: serialized test data that may contain arrays (see `make_diffable`)
+        path_cache_file: location of the cache file that will reference the sidecar files
+
+    Returns:
+        Any: the data with references or the same object if there were no arrays and no keys to escape
+
+    """
+    node, write_arrays = stage_arrays(data, path_cache_file)
+    write_arrays()
+    return node
+
+
+@beartype
+def resolve_arrays(node: Any, path_cache_file: Path) -> Any:
+    """Replace all references with read-only memory maps of the sidecar files and restore the escaped keys.
+
+    Only call for cached data that was stored with array references (see `StoredData.external`)
+
+    Args:
+        node: cached data that may contain references
+        path_cache_file: location of the cache file with the references
+
+    Returns:
+        Any: cached data with arrays
+
+    Raises:
+        FileNotFoundError: if a referenced sidecar file is missing
+        RuntimeError: if `numpy` is not installed
+
+    """
+    path_array_dir = array_dir(path_cache_file)
+
+    def _resolve(value: Any) -> Any:
+        if isinstance(value, dict):
+            if is_array_reference(value):
+                if np is None:
+                    msg = "The 'numpy' package is required to read the arrays in cache files"
+                    raise RuntimeError(msg)
+                path_array = path_array_dir / f'{value[KEY_NAME_ARRAY]["digest"]}.npy'
+                return np.asarray(np.load(path_array, mmap_mode='r', allow_pickle=False))  # type: ignore[union-attr]
+            return {unescape_key(key): _resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [_resolve(item) for item in value]
+        return value
+
+    return _resolve(node)
+
+
+def _collect_references(node: Any, digests: Set[str]) -> None:
+    if isinstance(node, dict):
+        if is_array_reference(node):
+            digests.add(node[KEY_NAME_ARRAY]['digest'])
+        for value in node.values():
+            _collect_references(value, digests)
+    elif isinstance(node, list):
+        for value in node:
+            _collect_references(value, digests)
+
+
+@beartype
+def prune_arrays(path_cache_dir: Path) -> int:
+    """Remove sidecar files that are no longer referenced by their cache file.
+
+    Args:
+        path_cache_dir: location of the cache directory
+
+    Returns:
+        int: number of removed sidecar files
+
+    """
+    count = 0
+    for path_array_dir in path_cache_dir.rglob(f'*{ARRAY_DIR_SUFFIX}'):
+        stem = path_array_dir.name[:-len(ARRAY_DIR_SUFFIX)]  # FYI: `str.removesuffix` requires Python 3.9
+        referenced: Set[str] = set()
+        for path_cache_file in path_array_dir.parent.glob(f'{glob.escape(stem)}.json*'):
+            if path_cache_file.is_file() and array_dir(path_cache_file) == path_array_dir:
+                stored = StoredData.from_document(loads(read_cache_text(path_cache_file)))
+                if KEY_NAME_ARRAY in stored.external:
+                    cached = stored.data
+                    if KEY_NAME_BLOB in stored.external:
+                        cached = resolve(cached, path_cache_file, unescape=False)
+                    _collect_references(cached, referenced)
+        for path_array in path_array_dir.glob('*.npy'):
+            if path_array.stem not in referenced:
+                path_array.unlink()
+                count += 1
+    return count
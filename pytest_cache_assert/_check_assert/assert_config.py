@@ -1,7 +1,7 @@
 """Pytest Cache Assert Configuration Object."""
 
 
-from beartype.typing import List
+from beartype.typing import List, Literal
 from pydantic import BaseModel, ConfigDict, Field
 
 from .cache_store import CacheStoreType, LocalJSONCacheStore
@@ -17,6 +17,25 @@ class AssertConfig(BaseModel):
     always_write: bool = False
     """Always write to the cached file so that diffs can be examined in the user's VCS."""
 
+    array_min_size: int = Field(default=0, ge=0)
+    """Store NumPy arrays with at least this many elements as `.npy` sidecar files. Default is disabled.
+
+    With `LocalJSONCacheStore`, the arrays are written next to the cache file (i.e. `test_a.arrays/<digest>.npy`)
+        with the dtype intact and are read back as read-only memory maps. Smaller arrays are cached as JSON lists.
+        Remove unreferenced sidecar files with `pytest_cache_assert._check_assert.array_store.prune_arrays`
+
+    """
+
+    blob_store: bool = False
+    """Store the cached data of `LocalJSONCacheStore` in a content-addressed blob directory. Default is disabled.
+
+    Identical data is only written once and the cache files only contain the metadata and a reference
+
+    """
+
+    blob_min_bytes: int = Field(default=16_384, ge=1)
+    """When `blob_store` is set, subtrees with at least this many characters are also stored as separate blobs."""
+
     cache_dir_rel_path: str = DEF_CACHE_DIR_NAME
     """String relative directory from `tests/` where default resolves to `tests/assert-cache/`."""
 
@@ -27,6 +46,17 @@ class AssertConfig(BaseModel):
 
     """
 
+    compress_min_bytes: int = Field(default=0, ge=0)
+    """Compress cache files with at least this many characters with `LocalJSONCacheStore`. Default is disabled.
+
+    Compressed files are written with the suffix of the codec (i.e. `.json.gz`) and are detected when read
+        regardless of this setting
+
+    """
+
+    compression: Literal['gzip', 'lzma', 'zstd'] = 'gzip'
+    """Codec for `compress_min_bytes`. `zstd` requires the optional `zstandard` package."""
+
     converters: List[Converter] = Field(default_factory=list)
     """Extend cache_store with custom functions for serializing novel types.
 
@@ -41,6 +71,42 @@ class AssertConfig(BaseModel):
 
     """
 
+    ignore_order: bool = False
+    """Ignore the order of the items in every list. Default is to compare lists in order.
+
+    Lists are compared as multisets in linear time and only the items that were added or removed are reported. To
+        ignore the order of only some lists, use an `AssertRule` with `check_unordered`
+
+    """
+
+    max_diffs: int = Field(default=0, ge=0)
+    """Only collect and report the first differences when set, such as 100. Default is to report all differences.
+
+    The error message then includes the total number of differences. With `JSONDiffValidator`, the diff stops as
+        soon as the cap is exceeded, so that the message only includes a lower bound on the total
+
+    """
+
+    parsed_cache_max_bytes: int = Field(default=0, ge=0)
+    """Budget for the session-scoped LRU of parsed cache files used by `LocalJSONCacheStore`. Default is disabled.
+
+    The budget is approximated by the size of the cache files on disk. When enabled, the data returned by
+        `read_from_cache` is shared between calls and must not be modified. Inspect the hit and miss counters
+        with `LocalJSONCacheStore.parsed_cache_info()`
+
+    """
+
+    write_behind: bool = False
+    """Defer writes to the cache files until the end of the pytest session. Default is to write on each assertion.
+
+    Repeated writes to a cache file are coalesced in memory and flushed in one batch by `pytest_sessionfinish`.
+        Updates are journaled in the pytest cache directory and replayed if the session was interrupted
+
+    """
+
+    write_behind_thread: bool = False
+    """When `write_behind` is set, write the pending cache files from a background thread during the session."""
+
     validator: ValidatorType = Field(default_factory=DictDiffValidator)
     """Custom validator for identifying and summarizing the deviations from the cache."""
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -10,10 +10,14 @@ from uuid import UUID
 
 import arrow
 from beartype import beartype
-from beartype.typing import Callable, List, Optional, Pattern, Union
+from beartype.typing import Any, Callable, Dict, List, Optional, Pattern, Tuple, Union
 from pydantic import BaseModel
 
+from .array_diff import _require_numpy, array_diff
 from .constants import T_DIFF
+from .frame_diff import frame_diff
+from .keyed import keyed_diff
+from .unordered import canonical, describe_unordered
 
 
 class Comparator(Enum):  # noqa: H601
@@ -54,6 +58,24 @@ def check_exact(old: T_DIFF, new: T_DIFF) -> bool:
     return old == new  # type: ignore[no-any-return]
 
 
+@beartype
+def check_unordered(old: T_DIFF, new: T_DIFF) -> bool:
+    """Check for equality where the order of the items in lists is ignored, recursively.
+
+    The lists are compared as multisets in linear time. When the check fails, only the items that were added or
+        removed are reported
+
+    Args:
+        old: the old value
+        new: the new value
+
+    Returns:
+        bool: True if both values have the same items regardless of order
+
+    """
+    return canonical(old) == canonical(new)
+
+
 @beartype
 def _try_type_coercion(old: T_DIFF, new: T_DIFF) -> bool:
     """Attempt to coerce strings to UUID, datetime, or int/float.
@@ -181,6 +203,139 @@ def gen_check_date_proximity(
     return partial(_check_date_proximity, time_delta=time_delta, comparator=comparator)
 
 
+@beartype
+def _check_keyed(old: T_DIFF, new: T_DIFF, key: str) -> bool:
+    """Check if both lists have the same records when matched by the key field.
+
+    Args:
+        old: the old value
+        new: the new value
+        key: name of the field that identifies each record
+
+    Returns:
+        bool: True if no record was added, removed, or changed
+
+    """
+    return not keyed_diff(old, new, key)
+
+
+@beartype
+def gen_check_keyed(key: str) -> Callable[[T_DIFF, T_DIFF], bool]:
+    """Generate a AssertRule check that matches the records of a list by a key field rather than by index.
+
+    When the check fails, the records that were added, removed, or changed are reported by key value
+
+    Args:
+        key: name of the field that identifies each record, such as 'id'
+
+    Returns:
+        Callable[[T_DIFF, T_DIFF], bool]: AssertRule check
+
+    """
+    return partial(_check_keyed, key=key)
+
+
+@beartype
+def _check_array(
+    old: T_DIFF, new: T_DIFF, rtol: float, atol: float, equal_nan: bool, max_indices: int,  # noqa: FBT001
+) -> bool:
+    """Check if both arrays (or nested lists) are equal within the tolerances.
+
+    Args:
+        old: the old value
+        new: the new value
+        rtol: relative tolerance
+        atol: absolute tolerance
+        equal_nan: if True, NaN values in the same position are equal
+        max_indices: maximum number of offending indices. See `array_diff`
+
+    Returns:
+        bool: True if the shapes match and every element is within the tolerance
+
+    """
+    return not array_diff(old, new, rtol=rtol, atol=atol, equal_nan=equal_nan, max_indices=max_indices)
+
+
+@beartype
+def gen_check_array(
+    rtol: float = 0.0, atol: float = 0.0, *, equal_nan: bool = False, max_indices: int = 10,
+) -> Callable[[T_DIFF, T_DIFF], bool]:
+    """Generate a AssertRule check that compares numeric arrays vectorized with NumPy like `numpy.allclose`.
+
+    When the check fails, the number of mismatched elements, the maximum absolute and relative error, and the first
+        offending indices are reported instead of each element. Requires `numpy`
+
+    Args:
+        rtol: relative tolerance. Default is exact equality
+        atol: absolute tolerance. Default is exact equality
+        equal_nan: if True, NaN values in the same position are equal
+        max_indices: maximum number of offending indices to report
+
+    Returns:
+        Callable[[T_DIFF, T_DIFF], bool]: AssertRule check
+
+    """
+    _require_numpy()
+    return partial(_check_array, rtol=rtol, atol=atol, equal_nan=equal_nan, max_indices=max_indices)
+
+
+@beartype
+def _check_frame(  # noqa: PLR0913
+    old: T_DIFF, new: T_DIFF, rtol: float, atol: float, equal_nan: bool,  # noqa: FBT001
+    tolerances: Optional[Dict[str, Dict[str, float]]], max_cells: int,
+) -> bool:
+    """Check if both cached DataFrames are equal within the tolerances.
+
+    Args:
+        old: the old value
+        new: the new value
+        rtol: relative tolerance
+        atol: absolute tolerance
+        equal_nan: if True, missing values (NaN) in the same cell are equal
+        tolerances: optional tolerances by column name
+        max_cells: maximum number of changed cells. See `frame_diff`
+
+    Returns:
+        bool: True if the columns, dtypes, and index match and every cell is within the tolerance
+
+    """
+    return not frame_diff(
+        old, new, rtol=rtol, atol=atol, equal_nan=equal_nan, tolerances=tolerances, max_cells=max_cells,
+    )
+
+
+@beartype
+def gen_check_frame(
+    rtol: float = 0.0,
+    atol: float = 0.0,
+    *,
+    equal_nan: bool = True,
+    tolerances: Optional[Dict[str, Dict[str, float]]] = None,
+    max_cells: int = 10,
+) -> Callable[[T_DIFF, T_DIFF], bool]:
+    """Generate a AssertRule check that compares a cached pandas DataFrame column by column with tolerances.
+
+    Numeric columns are compared vectorized like `numpy.isclose`. When the check fails, the changed columns,
+        dtypes, and index and the number of changed cells per column are reported with the first changed cells by
+        row label and column. Requires `numpy`
+
+    Args:
+        rtol: relative tolerance for all numeric columns. Default is exact equality
+        atol: absolute tolerance for all numeric columns. Default is exact equality
+        equal_nan: if True (default), missing values (NaN) in the same cell are equal
+        tolerances: optional `rtol` and `atol` by column name, such as `{'price': {'atol': 0.01}}`
+        max_cells: maximum number of changed cells to report
+
+    Returns:
+        Callable[[T_DIFF, T_DIFF], bool]: AssertRule check
+
+    """
+    _require_numpy()
+    return partial(
+        _check_frame, rtol=rtol, atol=atol, equal_nan=equal_nan, tolerances=tolerances, max_cells=max_cells,
+    )
+
+
 _PAT_START = r"\['"
 _PAT_END = r"'\]"
 _PAT_JOIN = _PAT_END + _PAT_START
@@ -231,3 +386,42 @@ class AssertRule(BaseModel):
     def is_regex(self) -> bool:
         """Helper for checking if pattern is a regex or string."""
         return not isinstance(self.pattern, str)
+
+    def passes_when_equal(self) -> bool:
+        """Check if the rule is known to pass whenever the old and new values are identical.
+
+        Other rules, such as date ranges, may reject a value that has not changed
+
+        """
+        return _unwrap(self.func)[0] in _PASSES_WHEN_EQUAL
+
+    def checks_subtree(self) -> bool:
+        """Check if the rule compares the whole subtree, so that the descendants of a match are not checked again."""
+        return _unwrap(self.func)[0] in _CHECKS_SUBTREE
+
+    def describe(self, old: T_DIFF, new: T_DIFF) -> Dict[str, Any]:
+        """Summarize the old and new values when the rule failed."""
+        func, keywords = _unwrap(self.func)
+        describer = _DESCRIBERS.get(func)
+        return describer(old, new, **keywords) if describer else {'old_value': old, 'new_value': new}
+
+
+def _unwrap(func: Callable[..., bool]) -> Tuple[Callable[..., bool], Dict[str, Any]]:
+    """Return the check and keyword arguments of the checks from `gen_check_*`."""
+    if isinstance(func, partial):
+        return func.func, func.keywords
+    return func, {}
+
+
+_PASSES_WHEN_EQUAL = (
+    check_suppress, check_exact, check_type, check_unordered, _check_keyed, _check_array, _check_frame,
+)
+
+_CHECKS_SUBTREE = (check_unordered, _check_keyed, _check_array, _check_frame)
+
+_DESCRIBERS: Dict[Callable[..., bool], Callable[..., Dict[str, Any]]] = {
+    check_unordered: describe_unordered,
+    _check_keyed: keyed_diff,
+    _check_array: array_diff,
+    _check_frame: frame_diff,
+}
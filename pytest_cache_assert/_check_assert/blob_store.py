@@ -0,0 +1,213 @@
+"""Content-addressed storage of cached data that is shared between cache files.
+
+The cached data and any large subtrees are written once to a blob named by the digest of the content. The cache
+    file then stores a reference (`{"_blob": "<digest>"}`), so that identical data is deduplicated across tests. User
+    keys that collide with the reference are escaped (see `references`)
+
+"""
+
+import json
+from functools import partial
+from pathlib import Path
+
+from beartype import beartype
+from beartype.typing import Any, Callable, Dict, Optional, Set, Tuple
+from pydantic import BaseModel
+
+from .caching import CODECS, _atomic_write_text, _digest, read_cache_text
+from .constants import KEY_NAME_BLOB, KEY_NAME_DATA, KEY_NAME_EXTERNAL
+from .references import escape_key, unescape_key
+from .serializer import loads
+
+BLOB_DIR_NAME = '_blobs'
+"""Name of the blob directory within the cache directory."""
+
+
+class _BlobSettings(BaseModel):
+    """Content-addressed storage of the cached data. Disabled by default."""
+
+    enabled: bool = False
+    min_bytes: int = 16_384
+    """Minimum length of the serialized subtree to store as a separate blob."""
+
+
+BLOBS = _BlobSettings()
+"""Session-scoped blob settings for writing cache files."""
+
+
+@beartype
+def locate_blob_dir(path_cache_file: Path) -> Optional[Path]:
+    """Return the nearest blob directory in the parents of the cache file."""
+    for path_dir in path_cache_file.parents:
+        path_blob_dir = path_dir / BLOB_DIR_NAME
+        if path_blob_dir.is_dir():
+            return path_blob_dir
+    return None
+
+
+@beartype
+def _blob_path(path_blob_dir: Path, digest: str) -> Path:
+    return path_blob_dir / digest[:2] / f'{digest}.json'
+
+
+def _reference(text: str, blobs: Dict[str, str]) -> Tuple[Dict[str, str], str]:
+    digest = _digest(text)
+    blobs[digest] = text
+    return {KEY_NAME_BLOB: digest}, json.dumps({KEY_NAME_BLOB: digest})
+
+
+def _externalize(node: Any, blobs: Dict[str, str], min_bytes: int, escape: bool) -> Tuple[Any, str]:  # noqa: FBT001
+    """Replace large subtrees with references from the leaves up.
+
+    Returns the new node with escaped keys (unless already escaped) and its compact, key-sorted JSON text, which is
+        built from the text of the children so that each subtree is only serialized once
+
+    """
+    if isinstance(node, dict):
+        items = [
+            (escape_key(key) if escape else key, *_externalize(value, blobs, min_bytes, escape))
+            for key, value in sorted(node.items())
+        ]
+        new_node: Any = {key: value for key, value, _t in items}
+        text = '{' + ', '.join(f'{json.dumps(key)}: {_t}' for key, _v, _t in items) + '}'
+    elif isinstance(node, list):
+        items = [_externalize(value, blobs, min_bytes, escape) for value in node]
+        new_node = [value for value, _t in items]
+        text = '[' + ', '.join(_t for _v, _t in items) + ']'
+    else:
+        return node, json.dumps(node)
+    if len(text) >= min_bytes:
+        return _reference(text, blobs)
+    return new_node, text
+
+
+@beartype
+def stage_blobs(data: Any, path_cache_file: Path, *, escape: bool = True) -> Tuple[Any, Callable[[], None]]:
+    """Replace the serialized data and large subtrees with references without writing the blobs.
+
+    Args:
+        data: serialized test data
+        path_cache_file: location of the cache file that will reference the blobs
+        escape: if False, the keys were already escaped (i.e. by `stage_arrays`)
+
+    Returns:
+        Tuple[Any, Callable[[], None]]: reference to the blob of the data and a function to write the blobs, which is
+            only called if the cache file is written so that no unreferenced blobs are left behind
+
+    """
+    blobs: Dict[str, str] = {}
+    node, text = _externalize(data, blobs, BLOBS.min_bytes, escape)
+    if not is_reference(node):
+        node, _text = _reference(text, blobs)
+    path_blob_dir = locate_blob_dir(path_cache_file) or path_cache_file.parent / BLOB_DIR_NAME
+    return node, partial(_write_blobs, path_blob_dir, blobs)
+
+
+def _write_blobs(path_blob_dir: Path, blobs: Dict[str, str]) -> None:
+    for digest, blob_text in blobs.items():
+        path_blob = _blob_path(path_blob_dir, digest)
+        if not path_blob.is_file():  # Content-addressed blobs are never modified
+            _atomic_write_text(path_blob, blob_text)
+
+
+@beartype
+def externalize(data: Any, path_cache_file: Path) -> Any:
+    """Write the serialized data and large subtrees to blobs. See `stage_blobs`.
+
+    Args:
+        data: serialized test data
+        path_cache_file: location of the cache file that will reference the blobs
+
+    Returns:
+        Any: reference to the blob of the data
+
+    """
+    node, write_blobs = stage_blobs(data, path_cache_file)
+    write_blobs()
+    return node
+
+
+@beartype
+def is_reference(node: Any) -> bool:
+    """Check if the node is a reference to a blob."""
+    return isinstance(node, dict) and len(node) == 1 and isinstance(node.get(KEY_NAME_BLOB), str)
+
+
+@beartype
+def resolve(node: Any, path_cache_file: Path, *, unescape: bool = True) -> Any:
+    """Replace all blob references with the content and restore the escaped keys.
+
+    Only call for cached data that was stored with blob references (see `StoredData.external`)
+
+    Args:
+        node: cached data that may contain references
+        path_cache_file: location of the cache file with the references
+        unescape: if False, keep the escaped keys for `resolve_arrays`
+
+    Returns:
+        Any: cached data without references
+
+    Raises:
+        FileNotFoundError: if a referenced blob is missing
+
+    """
+    path_blob_dir = locate_blob_dir(path_cache_file) or path_cache_file.parent / BLOB_DIR_NAME
+
+    def _resolve(value: Any) -> Any:
+        if isinstance(value, dict):
+            if is_reference(value):
+                return _resolve(loads(_blob_path(path_blob_dir, value[KEY_NAME_BLOB]).read_text()))
+            return {(unescape_key(key) if unescape else key): _resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [_resolve(item) for item in value]
+        return value
+
+    return _resolve(node)
+
+
+def _collect_references(node: Any, digests: Set[str]) -> None:
+    if isinstance(node, dict):
+        if is_reference(node):
+            digests.add(node[KEY_NAME_BLOB])
+        for value in node.values():
+            _collect_references(value, digests)
+    elif isinstance(node, list):
+        for value in node:
+            _collect_references(value, digests)
+
+
+@beartype
+def prune_blobs(path_cache_dir: Path) -> int:
+    """Remove blobs that are no longer referenced by any cache file in the cache directory.
+
+    Args:
+        path_cache_dir: location of the cache directory
+
+    Returns:
+        int: number of removed blobs
+
+    """
+    path_blob_dir = path_cache_dir / BLOB_DIR_NAME
+    if not path_blob_dir.is_dir():
+        return 0
+    suffixes = ('.json', *(f'.json{_c.suffix}' for _c in CODECS.values()))
+    pending: Set[str] = set()
+    for path_cache_file in path_cache_dir.rglob('*.json*'):
+        if path_cache_file.name.endswith(suffixes) and BLOB_DIR_NAME not in path_cache_file.parts:
+            document = loads(read_cache_text(path_cache_file))
+            if KEY_NAME_BLOB in (document.get(KEY_NAME_EXTERNAL) or []):
+                _collect_references(document.get(KEY_NAME_DATA), pending)
+    referenced: Set[str] = set()
+    while pending:  # Blobs may reference other blobs
+        digest = pending.pop()
+        referenced.add(digest)
+        path_blob = _blob_path(path_blob_dir, digest)
+        if path_blob.is_file():
+            _collect_references(loads(path_blob.read_text()), pending)
+            pending -= referenced
+    count = 0
+    for path_blob in path_blob_dir.glob('*/*.json'):
+        if path_blob.stem not in referenced:
+            path_blob.unlink()
+            count += 1
+    return count
@@ -4,11 +4,17 @@ from pathlib import Path
 from typing import runtime_checkable
 
 from beartype import beartype
-from beartype.typing import Any, Dict, List, Optional, Protocol
+from beartype.typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
 
-from .caching import init_cache, load_cached_data, write_cache_data
+from .array_store import ARRAYS, resolve_arrays, stage_arrays
+from .blob_store import BLOB_DIR_NAME, BLOBS, locate_blob_dir, resolve, stage_blobs
+from .caching import COMPRESSION, PARSED_CACHE, ParsedCacheInfo, StoredData, init_cache, update_stored_data
+from .config import CacheAssertContainerKeys, retrieve
+from .constants import KEY_NAME_ARRAY, KEY_NAME_BLOB
 from .converter import Converter
+from .partial_read import parse_selector, read_selected_stored, select, stored_segments
 from .serializer import make_diffable, register_user_converters
+from .write_behind import WRITE_BEHIND
 
 
 @runtime_checkable
@@ -36,13 +42,68 @@ class CacheStoreType(Protocol):
 
     @staticmethod
     @beartype
-    def read_cached_data(path_cache_file: Path) -> Any:
+    def read_cached_data(path_cache_file: Path, selector: Optional[str] = None) -> Any:
         ...
 
+    # Optional: `update(path_cache_file, *, metadata, test_data, always_write=False) -> Any` writes to the cache and
+    #   returns the previously cached data (or `test_data` if new) in one step. Otherwise, `assert_against_cache`
+    #   calls `read_cached_data` and then `write`
+
 
 class LocalJSONCacheStore:
     """Implementation of the CacheStore interface for a local JSON store."""
 
+    @staticmethod
+    def _configure_caching() -> None:
+        """Apply the parsed cache budget and compression settings from the registered `AssertConfig`."""
+        config = retrieve(CacheAssertContainerKeys.CONFIG)
+        if config.parsed_cache_max_bytes != PARSED_CACHE.max_bytes:
+            PARSED_CACHE.resize(config.parsed_cache_max_bytes)
+        COMPRESSION.codec, COMPRESSION.min_bytes = config.compression, config.compress_min_bytes
+        BLOBS.enabled, BLOBS.min_bytes = config.blob_store, config.blob_min_bytes
+        ARRAYS.min_size = config.array_min_size
+
+    @staticmethod
+    def _use_write_behind() -> bool:
+        """Apply the write-behind settings from the registered `AssertConfig`."""
+        config = retrieve(CacheAssertContainerKeys.CONFIG)
+        WRITE_BEHIND.use_thread = config.write_behind_thread
+        return config.write_behind
+
+    @staticmethod
+    def _resolve(stored: StoredData, path_cache_file: Path) -> Any:
+        """Replace the references in the stored data."""
+        data = stored.data
+        if KEY_NAME_BLOB in stored.external:  # The keys are restored by `resolve_arrays` if there are also arrays
+            data = resolve(data, path_cache_file, unescape=KEY_NAME_ARRAY not in stored.external)
+        return resolve_arrays(data, path_cache_file) if KEY_NAME_ARRAY in stored.external else data
+
+    @staticmethod
+    def _stage(test_data: Any, path_cache_file: Path) -> Tuple[Any, List[str], Optional[Callable[[], None]]]:
+        """Replace the arrays and blobs with references and return the function to write them with the cache file."""
+        stored, external, writers = test_data, [], []
+        if ARRAYS.min_size:
+            stored, write_arrays = stage_arrays(test_data, path_cache_file)
+            if stored is not test_data:
+                external.append(KEY_NAME_ARRAY)
+                writers.append(write_arrays)
+        if BLOBS.enabled:  # Keys are only escaped once
+            stored, write_blobs = stage_blobs(stored, path_cache_file, escape=not external)
+            external.append(KEY_NAME_BLOB)
+            writers.append(write_blobs)
+
+        def _write() -> None:
+            for writer in writers:
+                writer()
+
+        return stored, external, _write if writers else None
+
+    @staticmethod
+    @beartype
+    def parsed_cache_info() -> ParsedCacheInfo:
+        """Return the hit and miss counters of the parsed cache file LRU."""
+        return PARSED_CACHE.info()
+
     @staticmethod
     @beartype
     def initialize(path_cache_dir: Optional[Path], converters: Optional[List[Converter]] = None) -> None:
@@ -50,11 +111,14 @@ class LocalJSONCacheStore:
             register_user_converters(converters)
         if path_cache_dir:
             init_cache(path_cache_dir)
+            if retrieve(CacheAssertContainerKeys.CONFIG).blob_store:
+                (path_cache_dir / BLOB_DIR_NAME).mkdir(exist_ok=True)
 
     @staticmethod
     @beartype
     def serialize(data: Any) -> Any:
-        return make_diffable(data=data)
+        LocalJSONCacheStore._configure_caching()
+        return make_diffable(data=data, array_min_size=ARRAYS.min_size)
 
     @staticmethod
     @beartype
@@ -65,11 +129,51 @@ class LocalJSONCacheStore:
         test_data: Any,
         always_write: bool = False,
     ) -> None:
-        write_cache_data(
+        LocalJSONCacheStore.update(
             path_cache_file=path_cache_file, metadata=metadata, test_data=test_data, always_write=always_write,
         )
 
     @staticmethod
     @beartype
-    def read_cached_data(path_cache_file: Path) -> Any:
-        return load_cached_data(path_cache_file)
+    def read_cached_data(path_cache_file: Path, selector: Optional[str] = None) -> Any:
+        """Read the cached data or only the subtree for the `selector` (i.e. `root['items'][3]`)."""
+        LocalJSONCacheStore._configure_caching()
+        if selector is None:
+            return LocalJSONCacheStore._resolve(WRITE_BEHIND.read_stored_data(path_cache_file), path_cache_file)
+        segments = parse_selector(selector)
+        if WRITE_BEHIND.has_pending(path_cache_file):
+            stored = WRITE_BEHIND.read_stored_data(path_cache_file)
+            path_blob_dir = locate_blob_dir(path_cache_file) if KEY_NAME_BLOB in stored.external else None
+            data = select(stored.data, stored_segments(segments, stored.external), path_blob_dir)
+            stored = StoredData(data=data, external=stored.external)
+        else:
+            stored = read_selected_stored(path_cache_file, segments)
+        return LocalJSONCacheStore._resolve(stored, path_cache_file)
+
+    @staticmethod
+    @beartype
+    def update(
+        path_cache_file: Path,
+        *,
+        metadata: Optional[Dict],  # type: ignore[type-arg]
+        test_data: Any,
+        always_write: bool = False,
+    ) -> Any:
+        """Write to the cache and return the previously cached data (or `test_data` if new) from one read.
+
+        Blobs and arrays are only written if the cache file is written, so that failed assertions do not leave unused
+            files
+
+        """
+        LocalJSONCacheStore._configure_caching()
+        update = WRITE_BEHIND.update_stored_data if LocalJSONCacheStore._use_write_behind() else update_stored_data
+        stored, external, before_write = LocalJSONCacheStore._stage(test_data, path_cache_file)
+        previous = update(
+            path_cache_file, metadata=metadata, test_data=stored, always_write=always_write, external=external,
+            before_write=before_write,
+        )
+        if previous.data is stored or (
+            stored is not test_data and previous.data == stored and previous.external == external
+        ):  # Identical content can skip reading the blobs and arrays
+            return test_data
+        return LocalJSONCacheStore._resolve(previous, path_cache_file)
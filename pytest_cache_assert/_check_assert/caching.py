@@ -1,14 +1,107 @@
 """Utilities for managing the cache."""
 
+import gzip
+import lzma
+import os
+import threading
+from contextlib import contextmanager, suppress
+from functools import partial
+from hashlib import blake2b
 from pathlib import Path
 
 from beartype import beartype
-from beartype.typing import Any, Dict, List, Optional
+from beartype.typing import Any, Callable, Dict, Iterator, List, Literal, Optional, OrderedDict, Tuple
+from pydantic import BaseModel, PrivateAttr
 
-from .constants import CACHE_README_TEXT, KEY_NAME_DATA, KEY_NAME_META
+from .constants import CACHE_README_TEXT, KEY_NAME_DATA, KEY_NAME_EXTERNAL, KEY_NAME_META
 from .error_message import NoCacheError
 from .serializer import dumps, loads, make_diffable, pretty_dumps
 
+fcntl = None
+with suppress(ImportError):  # Only available on POSIX systems
+    import fcntl
+
+zstandard = None
+with suppress(ImportError):
+    import zstandard
+
+
+class _Codec(BaseModel):
+    """Compression format identified by the file suffix when locating and the magic bytes when reading."""
+
+    suffix: str
+    magic: bytes
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _require_zstandard(_data: bytes) -> bytes:
+    msg = "The 'zstandard' package is required for zstd compressed cache files"
+    raise RuntimeError(msg)
+
+
+CODECS: Dict[str, _Codec] = {
+    # FYI: mtime=0 so that the output is reproducible for version control
+    'gzip': _Codec(
+        suffix='.gz', magic=b'\x1f\x8b', compress=partial(gzip.compress, mtime=0), decompress=gzip.decompress,
+    ),
+    'lzma': _Codec(suffix='.xz', magic=b'\xfd7zXZ\x00', compress=lzma.compress, decompress=lzma.decompress),
+    'zstd': _Codec(
+        suffix='.zst', magic=b'\x28\xb5\x2f\xfd',
+        compress=zstandard.compress if zstandard else _require_zstandard,
+        decompress=zstandard.decompress if zstandard else _require_zstandard,
+    ),
+}
+"""Supported compression formats."""
+
+
+class _CompressionSettings(BaseModel):
+    """Compression of cache files at or above the size threshold. Disabled when `min_bytes` is 0."""
+
+    codec: Literal['gzip', 'lzma', 'zstd'] = 'gzip'
+    min_bytes: int = 0
+
+    @beartype
+    def target(self, path_cache_file: Path, text: str) -> Tuple[Path, Optional[_Codec]]:
+        """Return the path and codec for writing the text to the cache file."""
+        if self.min_bytes and len(text) >= self.min_bytes:
+            codec = CODECS[self.codec]
+            return path_cache_file.with_name(path_cache_file.name + codec.suffix), codec
+        return path_cache_file, None
+
+
+COMPRESSION = _CompressionSettings()
+"""Session-scoped compression settings for writing cache files."""
+
+
+@beartype
+def _locate_cache_file(path_cache_file: Path) -> Optional[Path]:
+    """Return the existing plain or compressed cache file."""
+    for suffix in ['', *(_c.suffix for _c in CODECS.values())]:
+        path_candidate = path_cache_file.with_name(path_cache_file.name + suffix)
+        if path_candidate.is_file():
+            return path_candidate
+    return None
+
+
+@beartype
+def read_cache_text(path_cache_file: Path) -> str:
+    """Read the text of a plain or compressed cache file, which is detected from the magic bytes.
+
+    Args:
+        path_cache_file: location of the cache file on disk
+
+    Returns:
+        str: decompressed text
+
+    """
+    raw = path_cache_file.read_bytes()
+    for codec in CODECS.values():
+        if raw.startswith(codec.magic):
+            raw = codec.decompress(raw)
+            break
+    return raw.decode('utf-8')
+
 
 @beartype
 def init_cache(path_cache_dir: Path) -> None:
@@ -42,18 +135,311 @@ def _merge_metadata(new_metadata: Dict, cached_meta_list: List[Dict]) -> List[Di
     return [*map(loads, sorted(unique_meta))]
 
 
+def _digest(text: str) -> str:
+    return blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class _CachedDocument(BaseModel):
+    """Parsed cache file and the file state when it was read."""
+
+    path: Path
+    """Location of the plain or compressed file on disk."""
+    stat_key: Tuple[int, int]
+    size: int
+    """Length of the uncompressed text."""
+    document: Any
+    text: Optional[str] = None
+    """Raw text, which is only kept when the document is not stored in the LRU."""
+    digest: str = ''
+
+    @property
+    def shared(self) -> bool:
+        """True if the document is stored in the LRU and returned to every read of the unchanged file."""
+        return self.text is None
+
+    @beartype
+    def matches(self, text: str) -> bool:
+        """Check if the text is identical to the file that was read."""
+        return self.text == text if self.text is not None else self.digest == _digest(text)
+
+
+class ParsedCacheInfo(BaseModel):
+    """Statistics for the LRU of parsed cache files."""
+
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class _ParsedCache(BaseModel):
+    """Bounded LRU of parsed cache files validated by the file modification time and size.
+
+    The budget is approximated by the size of the uncompressed text. The parsed documents are shared between reads,
+        so the data is copied before it is returned to callers that could modify it (see `_stored_data`)
+
+    """
+
+    max_bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    size_bytes: int = 0
+    _entries: OrderedDict[str, _CachedDocument] = PrivateAttr(default_factory=OrderedDict)
+
+    @beartype
+    def read(self, path_cache_file: Path) -> _CachedDocument:
+        """Return the parsed plain or compressed cache file from the LRU if unchanged or read from disk.
+
+        Raises:
+            FileNotFoundError: if the file does not exist
+
+        """
+        stat = path_cache_file.stat()
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        key = str(path_cache_file)
+        entry = self._entries.get(key)
+        if entry and entry.stat_key == stat_key:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        self.invalidate(path_cache_file)
+        text = read_cache_text(path_cache_file)
+        document = loads(text)
+        kwargs = {'path': path_cache_file, 'stat_key': stat_key, 'size': len(text), 'document': document}
+        if not 0 < len(text) <= self.max_bytes:
+            return _CachedDocument(**kwargs, text=text)
+
+        entry = _CachedDocument(**kwargs, digest=_digest(text))
+        self._entries[key] = entry
+        self.size_bytes += entry.size
+        self.resize(self.max_bytes)
+        return entry
+
+    @beartype
+    def invalidate(self, path_cache_file: Path) -> None:
+        """Remove the cache file from the LRU."""
+        entry = self._entries.pop(str(path_cache_file), None)
+        if entry:
+            self.size_bytes -= entry.size
+
+    @beartype
+    def resize(self, max_bytes: int) -> None:
+        """Set the budget and evict the least recently used files that exceed the budget."""
+        self.max_bytes = max_bytes
+        while self.size_bytes > self.max_bytes:
+            _key, entry = self._entries.popitem(last=False)
+            self.size_bytes -= entry.size
+
+    @beartype
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        self._entries.clear()
+        self.hits, self.misses, self.size_bytes = 0, 0, 0
+
+    @beartype
+    def info(self) -> ParsedCacheInfo:
+        return ParsedCacheInfo(
+            hits=self.hits, misses=self.misses, entries=len(self._entries),
+            size_bytes=self.size_bytes, max_bytes=self.max_bytes,
+        )
+
+
+PARSED_CACHE = _ParsedCache()
+"""Session-scoped LRU of parsed cache files. Disabled unless the budget is configured."""
+
+
 @beartype
-def _read_full_cache(path_cache_file: Path) -> Any:
-    """Read from the cache file.
+def _read_full_cache(path_cache_file: Path) -> Optional[_CachedDocument]:
+    """Read from the plain or compressed cache file.
+
+    Args:
+        path_cache_file: location of the uncompressed cache file
+
+    Returns:
+        Optional[_CachedDocument]: full cache dictionary including metadata or None if there is no file
+
+    """
+    path_actual = _locate_cache_file(path_cache_file)
+    return PARSED_CACHE.read(path_actual) if path_actual else None
+
+
+@contextmanager
+def _cache_file_lock(path_cache_file: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock for the cache file across processes (i.e. pytest-xdist workers).
+
+    The hidden lock file (`.<name>.lock`) is kept next to the cache file, so that it is scoped to the project and
+        removed with the cache directory. It is shared by the plain and compressed files. No-op without `fcntl`
+
+    """
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+    path_lock = path_cache_file.with_name(f'.{path_cache_file.name}.lock')
+    path_lock.parent.mkdir(exist_ok=True, parents=True)
+    with path_lock.open('a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@beartype
+def _atomic_write_text(path_cache_file: Path, text: str) -> None:
+    """Write text atomically. See `_atomic_write_bytes`."""
+    _atomic_write_bytes(path_cache_file, text.encode('utf-8'))
+
+
+@beartype
+def _atomic_write_bytes(path_cache_file: Path, content: bytes) -> None:
+    """Write to a temporary file and then replace the cache file so that readers never see partial content.
+
+    Args:
+        path_cache_file: location of the cache file to write
+        content: full file content
+
+    """
+    path_cache_file.parent.mkdir(exist_ok=True, parents=True)
+    path_tmp = path_cache_file.with_name(f'.{path_cache_file.name}.{os.getpid()}-{threading.get_ident()}.tmp')
+    try:
+        # Create with the default permissions (respecting umask) like `Path.write_text`
+        with os.fdopen(os.open(path_tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666), 'wb') as tmp_file:
+            tmp_file.write(content)
+        os.replace(path_tmp, path_cache_file)
+    except BaseException:
+        path_tmp.unlink(missing_ok=True)
+        raise
+
+
+class StoredData(BaseModel):
+    """Data as stored in the cache file and the kinds of references that it contains (see `KEY_NAME_EXTERNAL`)."""
+
+    data: Any
+    external: List[str] = []
+
+    @classmethod
+    @beartype
+    def from_document(cls, document: Dict[str, Any]) -> 'StoredData':
+        return cls(data=document[KEY_NAME_DATA], external=document.get(KEY_NAME_EXTERNAL) or [])
+
+
+def _copy_json(node: Any) -> Any:
+    if type(node) is dict:
+        return {key: _copy_json(value) for key, value in node.items()}
+    if type(node) is list:
+        return [_copy_json(value) for value in node]
+    return node
+
+
+@beartype
+def _stored_data(cached: _CachedDocument) -> StoredData:
+    """Return the stored data, which is copied if shared by the LRU, so that changes by the caller are not cached."""
+    stored = StoredData.from_document(cached.document)
+    if cached.shared:
+        stored.data = _copy_json(stored.data)
+    return stored
+
+
+@beartype
+def update_cache_data(
+    path_cache_file: Path,
+    *,
+    metadata: Optional[Dict],  # type: ignore[type-arg]
+    test_data: Any,
+    always_write: bool = False,
+) -> Any:
+    """Cache the specified data and return the previously cached data from a single read of the file.
+
+    The file is only written when the serialized content differs from the current file. The read, merge, and
+        write are protected by a file lock and the write is atomic, so concurrent workers can share a cache file
+
+    Args:
+        path_cache_file: location of the cache file to write
+        metadata: optional dictionary for storing in the cache file
+        test_data: arbitrary test data to store
+        always_write: if True, overwrite the cached data
+
+    Returns:
+        Any: the cached data before writing or `test_data` if there was no cache file
+
+    """
+    return update_stored_data(
+        path_cache_file, metadata=metadata, test_data=test_data, always_write=always_write,
+    ).data
+
+
+@beartype
+def update_stored_data(  # noqa: PLR0913
+    path_cache_file: Path,
+    *,
+    metadata: Optional[Dict],  # type: ignore[type-arg]
+    test_data: Any,
+    always_write: bool = False,
+    external: Optional[List[str]] = None,
+    before_write: Optional[Callable[[], None]] = None,
+) -> StoredData:
+    """Cache data with references and return the previously stored data. See `update_cache_file`."""
+    metadata = make_diffable(metadata or {})
+    return update_cache_file(
+        path_cache_file, meta=[metadata or {}], test_data=test_data, always_write=always_write, external=external,
+        before_write=before_write,
+    )
+
+
+@beartype
+def update_cache_file(  # noqa: PLR0913
+    path_cache_file: Path,
+    *,
+    meta: List[Dict],  # type: ignore[type-arg]
+    test_data: Any,
+    always_write: bool = False,
+    external: Optional[List[str]] = None,
+    before_write: Optional[Callable[[], None]] = None,
+) -> StoredData:
+    """Merge a list of already serialized metadata into the cache file. See `update_cache_data`.
 
     Args:
         path_cache_file: location of the cache file to write
+        meta: non-empty list of serialized metadata dictionaries
+        test_data: arbitrary test data to store
+        always_write: if True, overwrite the cached data
+        external: kinds of references in `test_data` (i.e. `['_blob']`)
+        before_write: called only when `test_data` replaces the cached data, such as to write the referenced blobs,
+            so that nothing is written for data that is not stored
 
     Returns:
-        Any: full cache dictionary including metadata
+        StoredData: the stored data before writing or `test_data` if there was no cache file
 
     """
-    return loads(path_cache_file.read_text())
+    external = external or []
+    previous = StoredData(data=test_data, external=external)
+    with _cache_file_lock(path_cache_file):
+        cached = _read_full_cache(path_cache_file)
+        if cached:
+            old_meta = cached.document[KEY_NAME_META]
+            meta = _merge_metadata(meta[0], [*meta[1:], *old_meta])
+            previous = _stored_data(cached)
+        if cached and not always_write:  # Only change test_data if `always_write`
+            test_data, external = previous.data, previous.external
+        elif before_write:
+            before_write()
+
+        cache_dict = {KEY_NAME_META: meta, KEY_NAME_DATA: test_data}
+        if external:
+            cache_dict[KEY_NAME_EXTERNAL] = external
+        new_text = pretty_dumps(cache_dict)
+        path_target, codec = COMPRESSION.target(path_cache_file, new_text)
+        if not (cached and cached.path == path_target and cached.matches(new_text)):
+            content = new_text.encode('utf-8')
+            _atomic_write_bytes(path_target, codec.compress(content) if codec else content)
+            if cached:
+                PARSED_CACHE.invalidate(cached.path)
+                if cached.path != path_target:  # Only keep one representation of the cache file
+                    cached.path.unlink()
+    return previous
 
 
 @beartype
@@ -73,18 +459,7 @@ def write_cache_data(
         always_write: if True, overwrite the cached data
 
     """
-    metadata = make_diffable(metadata or {})
-    meta = [metadata or {}]
-    if path_cache_file.is_file():
-        old_cache_dict = _read_full_cache(path_cache_file)
-        old_meta = old_cache_dict[KEY_NAME_META]
-        meta = _merge_metadata(meta[0], old_meta)
-        if not always_write:  # Only change test_data if `always_write`
-            test_data = old_cache_dict[KEY_NAME_DATA]
-
-    cache_dict = {KEY_NAME_META: meta, KEY_NAME_DATA: test_data}
-    path_cache_file.parent.mkdir(exist_ok=True, parents=True)
-    path_cache_file.write_text(pretty_dumps(cache_dict))
+    update_cache_data(path_cache_file, metadata=metadata, test_data=test_data, always_write=always_write)
 
 
 @beartype
@@ -98,6 +473,13 @@ def load_cached_data(path_cache_file: Path) -> Any:
         Any: loaded data from cache file
 
     """
-    if path_cache_file.is_file():
-        return _read_full_cache(path_cache_file)[KEY_NAME_DATA]
+    return load_stored_data(path_cache_file).data
+
+
+@beartype
+def load_stored_data(path_cache_file: Path) -> StoredData:
+    """Load the data as stored in the cache file with the kinds of references. See `load_cached_data`."""
+    cached = _read_full_cache(path_cache_file)
+    if cached:
+        return _stored_data(cached)
     raise NoCacheError(path_cache_file)
@@ -26,6 +26,18 @@ KEY_NAME_META = '_info'
 KEY_NAME_DATA = '_json'
 """Key for cached data."""
 
+KEY_NAME_EXTERNAL = '_external'
+"""Key for the kinds of references in the cached data (i.e. `['_blob']`). Only set when there are references."""
+
+KEY_NAME_BLOB = '_blob'
+"""Key for a reference to content-addressed data in the blob directory."""
+
+KEY_NAME_ARRAY = '_npy'
+"""Key for a reference to a NumPy array in a `.npy` sidecar file."""
+
+KEY_NAME_FRAME = '_frame'
+"""Key for the columns of a cached pandas DataFrame."""
+
 CACHE_README_TEXT = """# Pytest Assert Cache
 
 This folder is automatically generated by `pytest_cache_assert`.
@@ -1,15 +1,23 @@
 """Dictionary Differ."""
 
-from contextlib import suppress
+from collections.abc import Mapping
+from itertools import islice
 
 from beartype import beartype
-from beartype.typing import Any, Dict, List, Pattern, Union
-from deepdiff import DeepSearch, extract
-from deepdiff.diff import DeepDiff
+from beartype.typing import Any, Dict, FrozenSet, List, Optional, Pattern, Tuple, Union
+from deepdiff.model import REPORT_KEYS
 from pydantic import BaseModel
 
+from .array_diff import ARRAY_TYPES, exact_array_diff
 from .assert_rules import AssertRule
 from .constants import T_DIFF, NotFound
+from .frame_diff import FRAME_CHANGED, frame_diff, is_frame
+from .json_diff import deep_diff, json_diff_limited
+from .path_matcher import T_PATH_SEGMENT, FallbackMatcher, PathMatcher, compile_matcher
+
+
+_REPORT_KEYS = frozenset({*REPORT_KEYS, FRAME_CHANGED})
+"""Report types with one difference per path."""
 
 
 class DiffResults(BaseModel):
@@ -17,6 +25,12 @@ class DiffResults(BaseModel):
 
     results: Dict  # type: ignore[type-arg]
 
+    total: Optional[int] = None
+    """Only set when the results were truncated to `max_diffs` with the total number of differences."""
+
+    total_is_lower_bound: bool = False
+    """True if the diff was stopped early, so that `total` is only a lower bound."""
+
     @beartype
     def to_dict(self) -> Dict:  # type: ignore[type-arg]
         return self.results
@@ -25,10 +39,44 @@ class DiffResults(BaseModel):
     def append(self, assert_rule: AssertRule, result: Dict) -> None:  # type: ignore[type-arg]
         self.results[f'For {assert_rule}'] = result
 
+    @beartype
+    def count(self) -> int:
+        """Return the number of differences, where each path of a DeepDiff report type counts as one."""
+        return sum(len(value) if key in _REPORT_KEYS else 1 for key, value in self.results.items())
+
+    @beartype
+    def truncate(self, max_diffs: int, *, is_lower_bound: bool = False) -> None:
+        """Keep only the first `max_diffs` differences and record the total.
+
+        Args:
+            max_diffs: maximum number of differences to keep. Zero disables truncation
+            is_lower_bound: True if the diff was stopped early and there may be more differences
+
+        """
+        count = self.count()
+        if not (is_lower_bound or (max_diffs and count > max_diffs)):
+            return
+        self.total, self.total_is_lower_bound = count, is_lower_bound
+        remaining = max_diffs or count
+        results: Dict = {}  # type: ignore[type-arg]
+        for key, value in self.results.items():
+            if remaining <= 0:
+                break
+            if key not in _REPORT_KEYS:
+                results[key] = value
+                remaining -= 1
+            elif isinstance(value, Mapping):
+                results[key] = dict(islice(value.items(), remaining))
+                remaining -= len(results[key])
+            else:
+                results[key] = type(value)(islice(value, remaining))
+                remaining -= len(results[key])
+        self.results = results
+
 
 @beartype
 def _raw_diff(*, old_dict: T_DIFF, new_dict: T_DIFF, **kwargs: Any) -> DiffResults:
-    """Determine the differences between two dictionaries.
+    """Determine the differences between two dictionaries, where cached DataFrames are compared by column.
 
     Args:
         old_dict: old dictionary (typically cached one)
@@ -39,17 +87,184 @@ def _raw_diff(*, old_dict: T_DIFF, new_dict: T_DIFF, **kwargs: Any) -> DiffResul
         DiffResults: Diff Object
 
     """
-    return DiffResults(results=DeepDiff(t1=old_dict, t2=new_dict, **kwargs))
+    return DiffResults(results=deep_diff(old_dict, new_dict, **kwargs))
+
+
+@beartype
+def _raw_json_diff(*, old_dict: T_DIFF, new_dict: T_DIFF, max_diffs: int = 0, **kwargs: Any) -> DiffResults:
+    """Determine the differences between two dictionaries with the JSON-native differ.
+
+    Args:
+        old_dict: old dictionary (typically cached one)
+        new_dict: new dictionary (typically test data)
+        max_diffs: if set, stop after finding more than this many differences
+        kwargs: `exclude_paths`, `exclude_regex_paths`, and `ignore_order` like DeepDiff
+
+    Returns:
+        DiffResults: Diff Object in the same shape as `_raw_diff`
+
+    """
+    results, stopped = json_diff_limited(old_dict, new_dict, max_diffs=max_diffs, **kwargs)
+    diff_results = DiffResults(results=results)
+    if stopped:
+        diff_results.truncate(max_diffs, is_lower_bound=True)
+    return diff_results
+
+
+def _strict_equal(old: T_DIFF, new: T_DIFF) -> bool:
+    """Recursive equality that also requires identical types (i.e. `1 != 1.0` and `True != 1`) and `NaN != NaN`.
+
+    Cached DataFrames are instead compared like `DeepDiff` with the `FrameOperator` (see `frame_diff`)
+
+    """
+    cls = type(old)
+    if cls is not type(new):
+        return False
+    if cls is dict:
+        if is_frame(old) and is_frame(new):
+            return not frame_diff(old, new)
+        return len(old) == len(new) and all(key in new and _strict_equal(value, new[key]) for key, value in old.items())
+    if cls is list or cls is tuple:
+        return len(old) == len(new) and all(map(_strict_equal, old, new))
+    if cls in ARRAY_TYPES:
+        return not exact_array_diff(old, new)
+    return bool(old == new)
+
+
+@beartype
+def is_identical(old_dict: T_DIFF, new_dict: T_DIFF) -> bool:
+    """Check if the data is identical, including the types, without DeepDiff.
+
+    Args:
+        old_dict: old dictionary (typically cached one)
+        new_dict: new dictionary (typically test data)
+
+    Returns:
+        bool: True only if DeepDiff would report no differences
+
+    """
+    try:
+        return _strict_equal(old_dict, new_dict)
+    except (TypeError, ValueError, RecursionError):  # Such as the ambiguous truth value of a numpy array
+        return False
+
+
+_SEQUENCES = (list, tuple)
+"""Containers that are traversed by index, but never matched like `DeepSearch`."""
+
+
+@beartype
+def _match_rules(
+    old_dict: T_DIFF, new_dict: T_DIFF, assert_rules: List[AssertRule],
+) -> List[List[Tuple[Tuple[T_PATH_SEGMENT, ...], T_DIFF, T_DIFF]]]:
+    """Walk both trees once in lockstep and collect the values for every path matched by each rule.
+
+    Like `DeepSearch`, only the paths of dictionary items can match. Rules with segments are advanced one key or
+        index at a time (see `compile_matcher`) and subtrees are skipped once no rule can match any descendant. The
+        path string is only built for the other rules. Rules that check the whole subtree (see `checks_subtree`) do
+        not match the descendants of a match
+
+    Args:
+        old_dict: old dictionary (typically cached one)
+        new_dict: new dictionary (typically test data)
+        assert_rules: list of assert rules
+
+    Returns:
+        List[List[Tuple[Tuple[T_PATH_SEGMENT, ...], T_DIFF, T_DIFF]]]: for each rule, the keys and indices of the
+            path (see `format_path`) and the old and new values, which are `NotFound` when only in one of the trees
+
+    """
+    matchers = [compile_matcher(ar) for ar in assert_rules]
+    matches: List[List[Tuple[Tuple[T_PATH_SEGMENT, ...], T_DIFF, T_DIFF]]] = [[] for _ar in assert_rules]
+    fallbacks = [(idx, _m) for idx, _m in enumerate(matchers) if isinstance(_m, FallbackMatcher)]
+    checks_subtree = [ar.checks_subtree() for ar in assert_rules]
+
+    def _advance(active: List[Tuple[int, Any]], segment: T_PATH_SEGMENT) -> List[Tuple[int, Any]]:
+        advanced = []
+        for idx, state in active:
+            next_state = matchers[idx].advance(state, segment)
+            if next_state is not None:
+                advanced.append((idx, next_state))
+        return advanced
+
+    def _walk(
+        old: T_DIFF, new: T_DIFF, path: Tuple[T_PATH_SEGMENT, ...], text: str, active: List[Tuple[int, Any]],
+        closed: FrozenSet[int],
+    ) -> None:
+        if not active and all(idx in closed for idx, _fallback in fallbacks):
+            return
+        old_map = old if isinstance(old, Mapping) else None
+        new_map = new if isinstance(new, Mapping) else None
+        if old_map is not None or new_map is not None:
+            keys = [*(old_map or ())]
+            if new_map is not None:
+                keys.extend(key for key in new_map if old_map is None or key not in old_map)
+            for key in keys:
+                child_active = _advance(active, key)
+                if not (child_active or fallbacks):
+                    continue
+                old_value = old_map[key] if old_map is not None and key in old_map else NotFound()
+                new_value = new_map[key] if new_map is not None and key in new_map else NotFound()
+                child_path = (*path, key)
+                child_closed = closed
+                for idx, state in child_active:
+                    if matchers[idx].is_match(state):
+                        matches[idx].append((child_path, old_value, new_value))
+                        if checks_subtree[idx]:
+                            child_closed |= {idx}
+                child_text = ''
+                if fallbacks:
+                    child_text = f"{text}['{key}']" if isinstance(key, str) else f'{text}[{key}]'
+                    lower = child_text.lower()
+                    for idx, fallback in fallbacks:
+                        if idx not in closed and fallback.is_match(child_text, lower):
+                            matches[idx].append((child_path, old_value, new_value))
+                            if checks_subtree[idx]:
+                                child_closed |= {idx}
+                if child_closed:
+                    child_active = [(idx, state) for idx, state in child_active if idx not in child_closed]
+                _walk(old_value, new_value, child_path, child_text, child_active, child_closed)
+        old_seq = old if isinstance(old, _SEQUENCES) else ()
+        new_seq = new if isinstance(new, _SEQUENCES) else ()
+        for idx in range(max(len(old_seq), len(new_seq))):
+            child_active = _advance(active, idx)
+            if child_active or fallbacks:
+                _walk(
+                    old_seq[idx] if idx < len(old_seq) else NotFound(),
+                    new_seq[idx] if idx < len(new_seq) else NotFound(),
+                    (*path, idx),
+                    f'{text}[{idx}]' if fallbacks else '',
+                    child_active,
+                    closed,
+                )
+
+    active = [(idx, _m.start()) for idx, _m in enumerate(matchers) if isinstance(_m, PathMatcher)]
+    if active or fallbacks:
+        _walk(old_dict, new_dict, (), 'root', active, frozenset())
+    return matches
 
 
 @beartype
-def diff_with_rules(*, old_dict: T_DIFF, new_dict: T_DIFF, assert_rules: List[AssertRule]) -> DiffResults:
+def diff_with_rules(
+    *,
+    old_dict: T_DIFF,
+    new_dict: T_DIFF,
+    assert_rules: List[AssertRule],
+    json_native: bool = False,
+    max_diffs: int = 0,
+    ignore_order: bool = False,
+) -> DiffResults:
     """Determine the differences between two dictionaries.
 
     Args:
         old_dict: old dictionary (typically cached one)
         new_dict: new dictionary (typically test data)
         assert_rules: list of assert rules to ignore certain differences
+        json_native: if True, use the faster differ for JSON-native data instead of DeepDiff
+        max_diffs: if set, only keep the first differences. The JSON-native differ also stops the traversal and the
+            rules are not checked once the cap is exceeded
+        ignore_order: if True, compare every list as a multiset with the JSON-native differ, which only reports the
+            items that were added or removed. Use `check_unordered` to ignore the order of specific lists
 
     Returns:
         DiffResults: Diff Object
@@ -64,25 +279,24 @@ def diff_with_rules(*, old_dict: T_DIFF, new_dict: T_DIFF, assert_rules: List[As
     for ar in assert_rules:
         collector[key_re if ar.is_regex() else key_str].append(ar.pattern)
 
-    diff_result = _raw_diff(
+    json_native = json_native or ignore_order  # Instead of the pairwise `DeepDiff(ignore_order=True)`
+    kwargs: Dict[str, Any] = {'max_diffs': max_diffs, 'ignore_order': ignore_order} if json_native else {}
+    diff_result = (_raw_json_diff if json_native else _raw_diff)(
         old_dict=old_dict,
         new_dict=new_dict,
         exclude_paths=collector[key_str],
         exclude_regex_paths=collector[key_re],
+        **kwargs,
     )
+    if diff_result.total is None and max_diffs and diff_result.count() > max_diffs:
+        diff_result.truncate(max_diffs, is_lower_bound=bool(assert_rules))  # The rules could find more differences
+    if diff_result.total is not None:
+        return diff_result
 
-    for ar in assert_rules:
-        paths = []
-        for data_set in [old_dict, new_dict]:
-            ds = DeepSearch(data_set, ar.pattern, use_regexp=ar.is_regex())
-            paths.extend([*ds.get('matched_paths', {})])
-        for pth in set(paths):
-            new_value, old_value = NotFound(), NotFound()
-            with suppress(KeyError):
-                old_value = extract(old_dict, pth)
-            with suppress(KeyError):
-                new_value = extract(new_dict, pth)
+    for ar, matches in zip(assert_rules, _match_rules(old_dict, new_dict, assert_rules)):
+        for _path, old_value, new_value in matches:
             if not ar.func(old_value, new_value):
-                diff_result.append(ar, {'old_value': old_value, 'new_value': new_value})
+                diff_result.append(ar, ar.describe(old_value, new_value))
 
+    diff_result.truncate(max_diffs)
     return diff_result
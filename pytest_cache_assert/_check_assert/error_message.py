@@ -54,4 +54,11 @@ class RichAssertionError(AssertionError):
         diff_prefix = '> Differences: '
         line_diff = fmt_line(diff_prefix, diff_results.to_dict())
         file_diff = f'\n> Found differences with: {path_cache_file}' if path_cache_file else ''
-        return f'{file_diff}\n{line_diff}\n'
+        truncated = ''
+        if diff_results.total is not None:
+            total = f'at least {diff_results.total}' if diff_results.total_is_lower_bound else diff_results.total
+            truncated = (
+                f'> Truncated to the first {diff_results.count()} of {total} differences'
+                ' (see `AssertConfig.max_diffs`)\n'
+            )
+        return f'{file_diff}\n{line_diff}\n{truncated}'
@@ -0,0 +1,250 @@
+"""Columnar comparison of pandas DataFrames with NumPy.
+
+DataFrames are cached column by column (see `_serialize_pandas`) as
+    `{"_frame": {"columns": [...], "dtypes": [...], "index": [...], "index_dtype": ..., "data": [[...], ...]}}`,
+    where each column is a list or an array from a `.npy` sidecar file (see `array_store`). Two frames are compared
+    with one vectorized operation per column rather than cell by cell and the changed cells are reported by row
+    label and column
+
+"""
+
+import re
+from contextlib import suppress
+from operator import is_not, ne
+
+from beartype import beartype
+from beartype.typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple, Union
+from deepdiff.helper import add_root_to_paths
+from deepdiff.operator import BaseOperator
+
+from .array_diff import _equal, _require_numpy
+from .constants import KEY_NAME_FRAME
+
+np = None
+with suppress(ImportError):
+    import numpy as np
+
+FRAME_CHANGED = 'frame_changed'
+"""Report type for the summary of a changed frame (see `frame_diff`)."""
+
+_TOLERANCE_KINDS = frozenset('iuf')
+"""Kinds of `numpy.dtype` that are compared with a tolerance."""
+
+_VECTORIZED_KINDS = frozenset('biuf')
+"""Kinds of `numpy.dtype` that are compared vectorized. Other columns (i.e. `object`) are compared by cell."""
+
+
+_FRAME_KEYS = frozenset({'columns', 'dtypes', 'index', 'index_dtype', 'data'})
+"""Keys of the cached DataFrame (see `_serialize_pandas`)."""
+
+
+def _is_sequence(value: Any) -> bool:
+    return type(value) is list or (isinstance(value, np.ndarray) and value.ndim == 1)
+
+
+@beartype
+def is_frame(node: Any) -> bool:
+    """Check if the node is a cached DataFrame and NumPy is available to compare it.
+
+    The full schema is checked, so that user data with the same key (i.e. `{'_frame': {}}`) is compared as data
+
+    """
+    if np is None or type(node) is not dict or len(node) != 1:
+        return False
+    frame = node.get(KEY_NAME_FRAME)
+    if type(frame) is not dict or frame.keys() != _FRAME_KEYS:
+        return False
+    columns, dtypes, index, data = frame['columns'], frame['dtypes'], frame['index'], frame['data']
+    return (
+        type(columns) is list and type(dtypes) is list and type(data) is list and _is_sequence(index)
+        and type(frame['index_dtype']) is str and len(columns) == len(dtypes) == len(data)
+        and all(type(dtype) is str for dtype in dtypes)
+        and all(_is_sequence(column) and len(column) == len(index) for column in data)
+    )
+
+
+def _label(label: Any) -> Any:
+    """Return a hashable column or row label, where tuples (i.e. from a MultiIndex) were cached as lists."""
+    return tuple(map(_label, label)) if isinstance(label, list) else label
+
+
+def _kind(dtype: str) -> str:
+    """Return the kind of the cached dtype or 'O' for extension dtypes (i.e. 'category' or 'Int64')."""
+    with suppress(TypeError):
+        return np.dtype(dtype).kind  # type: ignore[no-any-return]
+    return 'O'
+
+
+def _cells_differ(old: Any, new: Any, equal_nan: bool) -> bool:  # noqa: FBT001
+    if type(old) is not type(new):
+        return True
+    try:
+        return bool(old != new) and not (equal_nan and old != old and new != new)  # noqa: PLR0124
+    except (TypeError, ValueError):
+        return True
+
+
+def _mismatched(  # noqa: PLR0913
+    old: Any, new: Any, kinds: Tuple[str, str], rtol: float, atol: float, equal_nan: bool,  # noqa: FBT001
+) -> Any:
+    """Return the boolean mask of the changed cells of a column."""
+    if kinds[0] in _VECTORIZED_KINDS and kinds[1] in _VECTORIZED_KINDS:
+        if type(old) is list and type(new) is list and old == new:  # Compared in C unless there are NaN values
+            return np.zeros(len(old), dtype=bool)
+        old_array, new_array = np.asarray(old), np.asarray(new)
+        if old_array.dtype.kind in _TOLERANCE_KINDS and new_array.dtype.kind in _TOLERANCE_KINDS:
+            return ~np.isclose(old_array, new_array, rtol=rtol, atol=atol, equal_nan=equal_nan)
+        if old_array.dtype.kind in _VECTORIZED_KINDS and new_array.dtype.kind in _VECTORIZED_KINDS:
+            return old_array != new_array
+    try:  # Find the candidates with the C implementations of `!=` and `type` before checking each candidate
+        mask = np.fromiter(map(ne, old, new), dtype=bool, count=len(old))
+        mask |= np.fromiter(map(is_not, map(type, old), map(type, new)), dtype=bool, count=len(old))
+    except (TypeError, ValueError):  # Such as cells with arrays
+        mask = np.ones(len(old), dtype=bool)
+    for idx in np.flatnonzero(mask).tolist():
+        mask[idx] = _cells_differ(old[idx], new[idx], equal_nan)
+    return mask
+
+
+def _value(column: Any, idx: int) -> Any:
+    value = column[idx]
+    return value.item() if isinstance(value, np.generic) else value
+
+
+@beartype
+def frame_diff(  # noqa: PLR0913
+    old: Any,
+    new: Any,
+    *,
+    rtol: float = 0.0,
+    atol: float = 0.0,
+    equal_nan: bool = True,
+    tolerances: Optional[Dict[str, Dict[str, float]]] = None,
+    max_cells: int = 10,
+) -> Dict[str, Any]:
+    """Compare two cached DataFrames column by column and summarize the changed cells.
+
+    Rows are compared by position and columns by label. Numeric columns are compared like `numpy.isclose` and the
+        other columns by value
+
+    Args:
+        old: old frame (typically cached data)
+        new: new frame (typically test data)
+        rtol: relative tolerance for numeric columns. See `numpy.isclose`
+        atol: absolute tolerance for numeric columns. See `numpy.isclose`
+        equal_nan: if True, missing values (NaN) in the same cell are equal
+        tolerances: optional `rtol` and `atol` by column name (`str(label)`), such as `{'price': {'atol': 0.01}}`
+        max_cells: maximum number of changed cells to report
+
+    Returns:
+        Dict[str, Any]: empty if equal, otherwise any of `columns_changed`, `dtypes_changed`, `shape_changed`,
+            `index_changed`, and `cells_changed` with the number of changed cells per column and the first changed
+            cells. Values that are not frames are reported with the old and new values unless equal
+
+    """
+    _require_numpy()
+    if not (is_frame(old) and is_frame(new)):
+        return {} if is_frame(old) is is_frame(new) and _equal(old, new) else {'old_value': old, 'new_value': new}
+    old_frame, new_frame = old[KEY_NAME_FRAME], new[KEY_NAME_FRAME]
+    result: Dict[str, Any] = {}
+
+    if old_frame['columns'] != new_frame['columns']:
+        result['columns_changed'] = {'old_columns': old_frame['columns'], 'new_columns': new_frame['columns']}
+    old_columns: Dict[Any, int] = {}
+    for idx, label in enumerate(old_frame['columns']):
+        old_columns.setdefault(_label(label), idx)
+    pairs: List[Tuple[Any, int, int]] = []
+    dtypes_changed: Dict[Any, Dict[str, str]] = {}
+    for new_idx, raw_label in enumerate(new_frame['columns']):
+        label = _label(raw_label)
+        old_idx = old_columns.pop(label, None)
+        if old_idx is None:
+            continue
+        pairs.append((label, old_idx, new_idx))
+        old_dtype, new_dtype = old_frame['dtypes'][old_idx], new_frame['dtypes'][new_idx]
+        if old_dtype != new_dtype:
+            dtypes_changed[label] = {'old_dtype': old_dtype, 'new_dtype': new_dtype}
+    if dtypes_changed:
+        result['dtypes_changed'] = dtypes_changed
+
+    old_index, new_index = old_frame['index'], new_frame['index']
+    if len(old_index) != len(new_index):
+        result['shape_changed'] = {
+            'old_shape': [len(old_index), len(old_frame['columns'])],
+            'new_shape': [len(new_index), len(new_frame['columns'])],
+        }
+        return result
+    index_changed: Dict[str, Any] = {}
+    old_dtype, new_dtype = old_frame['index_dtype'], new_frame['index_dtype']
+    if old_dtype != new_dtype:
+        index_changed.update(old_dtype=old_dtype, new_dtype=new_dtype)
+    index_mask = _mismatched(old_index, new_index, (_kind(old_dtype), _kind(new_dtype)), 0.0, 0.0, equal_nan)
+    if index_mask.any():
+        index_changed.update(
+            mismatched=int(np.count_nonzero(index_mask)),
+            first_positions=np.flatnonzero(index_mask)[:max_cells].tolist(),
+        )
+    if index_changed:
+        result['index_changed'] = index_changed
+
+    tolerances = tolerances or {}
+    masks, labels, columns = [], [], []
+    for label, old_idx, new_idx in pairs:
+        column_tolerance = tolerances.get(str(label), {})
+        mask = _mismatched(
+            old_frame['data'][old_idx], new_frame['data'][new_idx],
+            (_kind(old_frame['dtypes'][old_idx]), _kind(new_frame['dtypes'][new_idx])),
+            column_tolerance.get('rtol', rtol), column_tolerance.get('atol', atol), equal_nan,
+        )
+        if mask.any():
+            masks.append(mask)
+            labels.append(label)
+            columns.append((old_frame['data'][old_idx], new_frame['data'][new_idx]))
+    if masks:
+        first_cells = []
+        for row, col in np.argwhere(np.column_stack(masks))[:max_cells].tolist():
+            first_cells.append({
+                'row': _label(_value(new_index, row)), 'column': labels[col],
+                'old_value': _value(columns[col][0], row), 'new_value': _value(columns[col][1], row),
+            })
+        counts = [int(np.count_nonzero(_m)) for _m in masks]
+        result['cells_changed'] = {
+            'mismatched': sum(counts),
+            'size': len(new_index) * len(pairs),
+            'columns': dict(zip(labels, counts)),
+            'first_cells': first_cells,
+        }
+    return result
+
+
+class FrameOperator(BaseOperator):  # type: ignore[misc]
+    """DeepDiff operator that compares cached DataFrames with `frame_diff` instead of cell by cell.
+
+    Custom operators are called before DeepDiff checks the excluded paths, so the same exclusions must be passed here
+
+    """
+
+    def __init__(
+        self,
+        exclude_paths: Optional[Iterable[str]] = None,
+        exclude_regex_paths: Optional[Iterable[Union[str, Pattern[str]]]] = None,
+    ) -> None:
+        super().__init__()
+        self.exclude_paths = set(add_root_to_paths(exclude_paths) or ())
+        self.exclude_regex_paths = [re.compile(_p) for _p in exclude_regex_paths or ()]
+
+    def _is_excluded(self, path: str) -> bool:
+        return path in self.exclude_paths or any(_r.search(path) for _r in self.exclude_regex_paths)
+
+    def match(self, level: Any) -> bool:
+        # Called for every node, so rule out most nodes before the full check
+        return (
+            type(level.t1) is dict and KEY_NAME_FRAME in level.t1 and is_frame(level.t1) and is_frame(level.t2)
+            and not self._is_excluded(level.path())
+        )
+
+    def give_up_diffing(self, level: Any, diff_instance: Any) -> bool:
+        summary = frame_diff(level.t1, level.t2)
+        if summary:
+            diff_instance.custom_report_result(FRAME_CHANGED, level, summary)
+        return True
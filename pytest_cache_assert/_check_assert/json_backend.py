@@ -0,0 +1,186 @@
+"""Optional accelerated JSON backends that produce the same output as the stdlib `json` module.
+
+Cache files are checked into version control, so an accelerated backend is only used when the result is
+    byte-for-byte identical to `json`. Otherwise, the serializer falls back to the stdlib encoder
+
+"""
+
+import json
+import re
+from contextlib import suppress
+from os import getenv
+from typing import runtime_checkable
+
+from beartype import beartype
+from beartype.typing import Any, Dict, Match, Optional, Protocol
+
+_RE_EXPONENT_HINT = re.compile(r'[0-9][eE]|0\.0000')
+"""Match floats that the stdlib writes in exponent notation (i.e. `1e-05` or `1e+16`), but others may not."""
+
+_RE_FLOAT_LINE = re.compile(
+    r'^( *(?:"(?:[^"\\\n]|\\.)*": )?)(-?\d+(?:\.\d+(?:[eE][-+]?\d+)?|[eE][-+]?\d+))(,?)$',
+    flags=re.MULTILINE,
+)
+"""Match a float value in indented JSON, which always starts a line or follows a key."""
+
+_RE_NON_ASCII = re.compile('[\x7f-\U0010ffff]')
+"""Match characters that the stdlib escapes with `ensure_ascii=True`."""
+
+_RE_LARGE_INT = re.compile(r'\d{20}')
+"""Match integers that could exceed the 64-bit range supported by some decoders."""
+
+
+def _repr_float(match: Match[str]) -> str:
+    return f'{match[1]}{float(match[2])!r}{match[3]}'
+
+
+def _escape_non_ascii(match: Match[str]) -> str:
+    code = ord(match[0])
+    if code < 0x10000:  # noqa: PLR2004
+        return f'\\u{code:04x}'
+    code -= 0x10000
+    return f'\\u{0xd800 | (code >> 10):04x}\\u{0xdc00 | (code & 0x3ff):04x}'
+
+
+@beartype
+def match_stdlib_format(raw: str) -> str:
+    """Rewrite floats and non-ASCII characters in indented JSON to match `json.dumps`.
+
+    Args:
+        raw: indented JSON from an accelerated encoder
+
+    Returns:
+        str: JSON formatted like `json.dumps(..., indent=...)`
+
+    """
+    # FYI: other floats are already formatted with the same shortest representation as `repr`
+    if _RE_EXPONENT_HINT.search(raw):
+        raw = _RE_FLOAT_LINE.sub(_repr_float, raw)
+    if not raw.isascii() or '\x7f' in raw:
+        raw = _RE_NON_ASCII.sub(_escape_non_ascii, raw)
+    return raw
+
+
+@runtime_checkable
+class JSONBackendType(Protocol):
+    """JSON Backend Interface."""
+
+    @staticmethod
+    def dumps(obj: Any, *, sort_keys: bool, indent: int) -> Optional[str]:
+        ...
+
+    @staticmethod
+    def loads(raw: str) -> Any:
+        ...
+
+
+class StdlibJSONBackend:
+    """Default backend that always defers to the `json` encoder with the registered converters."""
+
+    @staticmethod
+    def dumps(obj: Any, *, sort_keys: bool, indent: int) -> Optional[str]:  # noqa: ARG004
+        return None
+
+    @staticmethod
+    def loads(raw: str) -> Any:
+        return json.loads(raw)
+
+
+JSON_BACKENDS: Dict[str, JSONBackendType] = {'json': StdlibJSONBackend()}
+"""Available backends in order of increasing preference."""
+
+with suppress(ImportError):
+    import ujson
+
+    class UjsonBackend:
+        """Accelerated backend using `ujson`."""
+
+        @staticmethod
+        def dumps(obj: Any, *, sort_keys: bool, indent: int) -> Optional[str]:
+            """Return None when indentation is not requested or the output could differ."""
+            if not indent:
+                return None
+            try:
+                raw = ujson.dumps(obj, sort_keys=sort_keys, indent=indent, escape_forward_slashes=False)
+                # Fallback when types were converted implicitly or for NaN and Infinity
+                if ujson.loads(raw) != obj:
+                    return None
+            except (TypeError, ValueError, OverflowError):
+                return None
+            return match_stdlib_format(raw)
+
+        @staticmethod
+        def loads(raw: str) -> Any:
+            try:
+                return ujson.loads(raw)
+            except (ValueError, OverflowError):
+                return json.loads(raw)
+
+    JSON_BACKENDS['ujson'] = UjsonBackend()
+
+with suppress(ImportError):
+    import orjson
+
+    class OrjsonBackend:
+        """Accelerated backend using `orjson`."""
+
+        @staticmethod
+        def dumps(obj: Any, *, sort_keys: bool, indent: int) -> Optional[str]:
+            """Return None for anything other than a 2-space indent or when the output could differ."""
+            if indent != 2:  # noqa: PLR2004
+                return None
+            option = orjson.OPT_INDENT_2 | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+            try:
+                raw = orjson.dumps(obj, option=option)
+                # Fallback when types were converted natively (i.e. datetime) or for NaN (written as null)
+                if orjson.loads(raw) != obj:
+                    return None
+            except TypeError:  # Includes orjson.JSONEncodeError
+                return None
+            return match_stdlib_format(raw.decode('utf-8'))
+
+        @staticmethod
+        def loads(raw: str) -> Any:
+            # FYI: orjson parses integers beyond 64-bits as floats
+            if _RE_LARGE_INT.search(raw):
+                return json.loads(raw)
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:  # Such as NaN or lone surrogates
+                return json.loads(raw)
+
+    JSON_BACKENDS['orjson'] = OrjsonBackend()
+
+_ENV_JSON_BACKEND = 'PYTEST_CACHE_ASSERT_JSON_BACKEND'
+"""Optional environment variable to select a specific backend by name."""
+
+_ACTIVE_BACKEND: Dict[str, JSONBackendType] = {}
+
+
+@beartype
+def set_json_backend(name: Optional[str] = None) -> JSONBackendType:
+    """Select the JSON backend by name or the fastest available backend by default.
+
+    Args:
+        name: key in `JSON_BACKENDS`. If not specified, checks the environment variable
+
+    Returns:
+        JSONBackendType: the active backend
+
+    Raises:
+        ValueError: if the backend is not available
+
+    """
+    name = name or getenv(_ENV_JSON_BACKEND) or [*JSON_BACKENDS][-1]
+    try:
+        _ACTIVE_BACKEND['active'] = JSON_BACKENDS[name]
+    except KeyError:
+        msg = f"'{name}' is not an available JSON backend from {[*JSON_BACKENDS]}"
+        raise ValueError(msg) from None
+    return _ACTIVE_BACKEND['active']
+
+
+@beartype
+def get_json_backend() -> JSONBackendType:
+    """Return the active JSON backend."""
+    return _ACTIVE_BACKEND.get('active') or set_json_backend()
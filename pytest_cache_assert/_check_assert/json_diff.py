@@ -0,0 +1,306 @@
+"""JSON-native alternative to DeepDiff.
+
+After `make_diffable`, the data only contains dict, list, str, int, float, bool, and None. This differ walks only
+    those types and reports the differences in the same shape as the default text view of `DeepDiff`, including
+    the way that lists are compared in order (`difflib` for lists of scalars with a fallback to comparing the items
+    by index) and how excluded paths are matched. Any other type falls back to `DeepDiff` for the whole comparison.
+    With `ignore_order`, lists are instead compared as multisets (see `unordered_diff`) and only the items that were
+    added or removed are reported. NumPy arrays (i.e. from `.npy` sidecar files) are compared vectorized and each
+    mismatched array is reported once with a summary (see `exact_array_diff`). Likewise, cached DataFrames are
+    compared by column and reported once as `frame_changed` (see `frame_diff`)
+
+"""
+
+import difflib
+import re
+
+from beartype import beartype
+from beartype.typing import Any, Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple, Union
+from deepdiff.diff import DeepDiff
+from deepdiff.helper import add_root_to_paths
+from deepdiff.model import PrettyOrderedSet
+
+from .array_diff import ARRAY_TYPES, exact_array_diff
+from .frame_diff import FRAME_CHANGED, FrameOperator, frame_diff, is_frame
+from .unordered import unordered_diff
+
+_JSON_TYPES = frozenset({dict, list, str, int, float, bool, type(None)})
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_MISSING = object()
+
+_TYPE_CHANGES = 'type_changes'
+_ITEM_ADDED = 'dictionary_item_added'
+_ITEM_REMOVED = 'dictionary_item_removed'
+_VALUES_CHANGED = 'values_changed'
+_ITERABLE_ADDED = 'iterable_item_added'
+_ITERABLE_REMOVED = 'iterable_item_removed'
+_ITERABLE_MOVED = 'iterable_item_moved'
+"""Counted when choosing how to compare lists, but not reported (like the default `verbose_level=1`)."""
+
+
+class _Change(NamedTuple):
+    report_type: str
+    path: str
+    old: Any
+    new: Any
+    diff: Any = None
+    """Unified diff of multi-line strings or the summary of mismatched arrays."""
+
+
+class _UnsupportedTypeError(Exception):
+    """Raised for data that is not JSON-native, such as sets, tuples, or non-string keys."""
+
+
+class _MaxDiffsError(Exception):
+    """Raised to stop the traversal once more than `max_diffs` changes were found."""
+
+
+class _JSONDiffer:
+    """Single comparison with the exclusions from DeepDiff's `exclude_paths` and `exclude_regex_paths`."""
+
+    def __init__(
+        self,
+        exclude_paths: Iterable[str],
+        exclude_regex_paths: Iterable[Union[str, Pattern[str]]],
+        max_diffs: int,
+        ignore_order: bool = False,
+    ) -> None:
+        self.exclude_paths = set(add_root_to_paths(exclude_paths) or ())
+        self.exclude_regex_paths = [re.compile(_p) for _p in exclude_regex_paths]
+        self.max_diffs = max_diffs
+        self.ignore_order = ignore_order
+        self.changes: List[_Change] = []
+
+    def skip(self, path: str) -> bool:
+        return path in self.exclude_paths or any(_r.search(path) for _r in self.exclude_regex_paths)
+
+    def add(self, changes: List[_Change], change: _Change) -> None:
+        """Collect the change and stop once the cap is exceeded (only lists of scalars use temporary lists)."""
+        changes.append(change)
+        if self.max_diffs and changes is self.changes and len(changes) > self.max_diffs:
+            raise _MaxDiffsError
+
+    def report(self, changes: List[_Change], change: _Change) -> None:
+        if not self.skip(change.path):
+            self.add(changes, change)
+
+    def diff(self, old: Any, new: Any, path: str, changes: List[_Change]) -> None:
+        if old is new or self.skip(path):
+            return
+        old_type, new_type = type(old), type(new)
+        if old_type not in _JSON_TYPES or new_type not in _JSON_TYPES:
+            if old_type is new_type and old_type in ARRAY_TYPES:
+                summary = exact_array_diff(old, new)
+                if summary:
+                    self.add(changes, _Change(_VALUES_CHANGED, path, old, new, summary))
+                return
+            raise _UnsupportedTypeError(path)
+        if old_type is not new_type:
+            self.add(changes, _Change(_TYPE_CHANGES, path, old, new))
+        elif old_type is dict:
+            self.diff_dict(old, new, path, changes)
+        elif old_type is list:
+            self.diff_list(old, new, path, changes)
+        elif old != new:
+            text_diff = None
+            if old_type is str and ('\n' in old or '\n' in new):
+                text_diff = '\n'.join(difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm='')) or None
+            self.add(changes, _Change(_VALUES_CHANGED, path, old, new, text_diff))
+
+    def diff_dict(self, old: Dict[str, Any], new: Dict[str, Any], path: str, changes: List[_Change]) -> None:
+        if is_frame(old) and is_frame(new):
+            summary = frame_diff(old, new)
+            if summary:
+                self.add(changes, _Change(FRAME_CHANGED, path, old, new, summary))
+            return
+        old_keys = [*filter(_is_public, old)]
+        new_keys = [*filter(_is_public, new)]
+        if not all(type(_k) is str for _k in (*old_keys, *new_keys)):
+            raise _UnsupportedTypeError(path)
+        for key in new_keys:
+            if key not in old:
+                self.report(changes, _Change(_ITEM_ADDED, f"{path}['{key}']", _MISSING, new[key]))
+        for key in old_keys:
+            if key not in new:
+                self.report(changes, _Change(_ITEM_REMOVED, f"{path}['{key}']", old[key], _MISSING))
+        for key in new_keys:
+            if key in old:
+                self.diff(old[key], new[key], f"{path}['{key}']", changes)
+
+    def diff_list(self, old: List[Any], new: List[Any], path: str, changes: List[_Change]) -> None:
+        if self.ignore_order:
+            self.diff_unordered(old, new, path, changes)
+            return
+        if not (_all_scalars(old) and _all_scalars(new)):
+            self.diff_pairs(old, new, path, changes, 0, 0)
+            return
+        by_opcodes: List[_Change] = []
+        for tag, old_start, old_end, new_start, new_end in difflib.SequenceMatcher(
+            None, old, new, autojunk=False,
+        ).get_opcodes():
+            if tag == 'replace':
+                self.diff_pairs(old[old_start:old_end], new[new_start:new_end], path, by_opcodes, old_start, new_start)
+            elif tag == 'delete':
+                for idx in range(old_start, old_end):
+                    self.report(by_opcodes, _Change(_ITERABLE_REMOVED, f'{path}[{idx}]', old[idx], _MISSING))
+            elif tag == 'insert':
+                for idx in range(new_start, new_end):
+                    self.report(by_opcodes, _Change(_ITERABLE_ADDED, f'{path}[{idx}]', _MISSING, new[idx]))
+        if len(by_opcodes) > 1:  # Like DeepDiff, keep whichever approach reports fewer changes
+            by_index: List[_Change] = []
+            self.diff_pairs(old, new, path, by_index, 0, 0)
+            if len(by_opcodes) >= len(by_index):
+                by_opcodes = by_index
+        for change in by_opcodes:
+            self.add(changes, change)
+
+    def diff_unordered(self, old: List[Any], new: List[Any], path: str, changes: List[_Change]) -> None:
+        removed, added = unordered_diff(old, new)
+        for idx in removed:
+            self.report(changes, _Change(_ITERABLE_REMOVED, f'{path}[{idx}]', old[idx], _MISSING))
+        for idx in added:
+            self.report(changes, _Change(_ITERABLE_ADDED, f'{path}[{idx}]', _MISSING, new[idx]))
+
+    def diff_pairs(
+        self, old: List[Any], new: List[Any], path: str, changes: List[_Change], old_offset: int, new_offset: int,
+    ) -> None:
+        """Compare the items by index, where the remaining items of the longer list were added or removed."""
+        for idx in range(max(len(old), len(new))):
+            old_idx, new_idx = idx + old_offset, idx + new_offset
+            if idx >= len(new):
+                self.report(changes, _Change(_ITERABLE_REMOVED, f'{path}[{old_idx}]', old[idx], _MISSING))
+            elif idx >= len(old):
+                self.report(changes, _Change(_ITERABLE_ADDED, f'{path}[{new_idx}]', _MISSING, new[idx]))
+            elif old_idx != new_idx and old[idx] == new[idx]:
+                self.report(changes, _Change(_ITERABLE_MOVED, f'{path}[{old_idx}]', old[idx], new[idx]))
+            else:
+                self.diff(old[idx], new[idx], f'{path}[{new_idx}]', changes)
+
+
+def _is_public(key: Any) -> bool:
+    """DeepDiff ignores 'private' dictionary keys by default."""
+    return not (isinstance(key, str) and key.startswith('__'))
+
+
+def _all_scalars(items: List[Any]) -> bool:
+    return all(isinstance(_i, _SCALAR_TYPES) for _i in items)
+
+
+def _to_text_view(changes: List[_Change]) -> Dict[str, Any]:
+    """Convert to the text view of DeepDiff where items added and removed at the same index are a changed value."""
+    added = {_c.path: _c for _c in changes if _c.report_type == _ITERABLE_ADDED}
+    removed = {_c.path: _c for _c in changes if _c.report_type == _ITERABLE_REMOVED}
+    mutual = added.keys() & removed.keys()
+    if mutual:
+        changes = [
+            _c for _c in changes if _c.path not in mutual or _c.report_type not in {_ITERABLE_ADDED, _ITERABLE_REMOVED}
+        ]
+        changes.extend(_Change(_VALUES_CHANGED, _p, removed[_p].old, added[_p].new) for _p in mutual)
+
+    result: Dict[str, Any] = {
+        _TYPE_CHANGES: {},
+        _ITEM_ADDED: PrettyOrderedSet(),
+        _ITEM_REMOVED: PrettyOrderedSet(),
+        _VALUES_CHANGED: {},
+        _ITERABLE_ADDED: {},
+        _ITERABLE_REMOVED: {},
+        FRAME_CHANGED: {},
+    }
+    for change in changes:
+        report_type = change.report_type
+        if report_type == _TYPE_CHANGES:
+            result[report_type][change.path] = {
+                'old_type': type(change.old), 'new_type': type(change.new),
+                'old_value': change.old, 'new_value': change.new,
+            }
+        elif report_type in {_ITEM_ADDED, _ITEM_REMOVED}:
+            result[report_type].add(change.path)
+        elif report_type == _VALUES_CHANGED:
+            result[report_type][change.path] = {'new_value': change.new, 'old_value': change.old}
+            if change.diff:
+                result[report_type][change.path]['diff'] = change.diff
+        elif report_type == _ITERABLE_ADDED:
+            result[report_type][change.path] = change.new
+        elif report_type == _ITERABLE_REMOVED:
+            result[report_type][change.path] = change.old
+        elif report_type == FRAME_CHANGED:
+            result[report_type][change.path] = change.diff
+    return {key: value for key, value in result.items() if value}
+
+
+@beartype
+def deep_diff(old: Any, new: Any, **kwargs: Any) -> DeepDiff:
+    """Compare with DeepDiff like the default differ, where cached DataFrames are compared by column.
+
+    Args:
+        old: old data (typically cached data)
+        new: new data (typically test data)
+        kwargs: pass-through arguments to DeepDiff
+
+    Returns:
+        DeepDiff: differences in the default text view
+
+    """
+    operator = FrameOperator(kwargs.get('exclude_paths'), kwargs.get('exclude_regex_paths'))
+    return DeepDiff(t1=old, t2=new, custom_operators=[operator], **kwargs)
+
+
+@beartype
+def json_diff_limited(
+    old: Any,
+    new: Any,
+    *,
+    exclude_paths: Optional[List[str]] = None,
+    exclude_regex_paths: Optional[List[Union[str, Pattern[str]]]] = None,
+    max_diffs: int = 0,
+    ignore_order: bool = False,
+) -> Tuple[Dict[str, Any], bool]:
+    """Determine the differences, but stop the traversal once more than `max_diffs` differences were found.
+
+    Args:
+        old: old data (typically cached data)
+        new: new data (typically test data)
+        exclude_paths: paths to ignore. See DeepDiff
+        exclude_regex_paths: regular expressions of paths to ignore. See DeepDiff
+        max_diffs: if set, the maximum number of differences to collect before stopping
+        ignore_order: if True, compare all lists as multisets
+
+    Returns:
+        Tuple[Dict[str, Any], bool]: differences like `json_diff` and True if the traversal was stopped early, in
+            which case there are more differences than were collected
+
+    """
+    differ = _JSONDiffer(exclude_paths or [], exclude_regex_paths or [], max_diffs, ignore_order)
+    try:
+        differ.diff(old, new, 'root', differ.changes)
+    except _MaxDiffsError:
+        return _to_text_view(differ.changes), True
+    except _UnsupportedTypeError:
+        result = deep_diff(
+            old, new, exclude_paths=exclude_paths, exclude_regex_paths=exclude_regex_paths, ignore_order=ignore_order,
+        )
+        return dict(result), False
+    return _to_text_view(differ.changes), False
+
+
+@beartype
+def json_diff(
+    old: Any,
+    new: Any,
+    *,
+    exclude_paths: Optional[List[str]] = None,
+    exclude_regex_paths: Optional[List[Union[str, Pattern[str]]]] = None,
+) -> Dict[str, Any]:
+    """Determine the differences between two JSON-native trees in the shape of `DeepDiff(old, new)`.
+
+    Args:
+        old: old data (typically cached data)
+        new: new data (typically test data)
+        exclude_paths: paths to ignore. See DeepDiff
+        exclude_regex_paths: regular expressions of paths to ignore. See DeepDiff
+
+    Returns:
+        Dict[str, Any]: differences such as `values_changed`, `type_changes`, and `dictionary_item_added`
+
+    """
+    return json_diff_limited(old, new, exclude_paths=exclude_paths, exclude_regex_paths=exclude_regex_paths)[0]
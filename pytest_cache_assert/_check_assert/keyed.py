@@ -0,0 +1,70 @@
+"""Compare lists of records by a key field instead of by index.
+
+The records of both lists are joined on the key (i.e. a stable `id`), so that one inserted record is reported once
+    rather than as a change at every following index. Each pair of records is then compared with the JSON-native
+    differ
+
+"""
+
+from collections.abc import Hashable, Mapping
+
+from beartype import beartype
+from beartype.typing import Any, Dict, List, Optional, Tuple
+
+from .json_diff import _Change, _JSONDiffer, _to_text_view, _UnsupportedTypeError, json_diff
+from .unordered import _canonical
+
+_RECORD_ADDED = 'record_added'
+_RECORD_REMOVED = 'record_removed'
+_RECORD_CHANGED = 'record_changed'
+
+
+def _index(records: Any, key: str) -> Optional[Dict[Hashable, Tuple[str, Any]]]:
+    """Return the label and record for each key value or None unless every record has a unique key value."""
+    if not isinstance(records, list):
+        return None
+    indexed = {}
+    for record in records:
+        if not (type(record) is dict or isinstance(record, Mapping)) or key not in record:
+            return None
+        indexed[_canonical(record[key])] = (f'{key}={record[key]!r}', record)
+    return indexed if len(indexed) == len(records) else None
+
+
+@beartype
+def keyed_diff(old: Any, new: Any, key: str) -> Dict[str, Any]:
+    """Join the records of both lists on the key and summarize the records that were added, removed, or changed.
+
+    Args:
+        old: old list of records (typically cached data)
+        new: new list of records (typically test data)
+        key: name of the field that identifies each record
+
+    Returns:
+        Dict[str, Any]: `record_added` and `record_removed` with the records and `record_changed` with the
+            differences within each record (see `json_diff`) by key value (i.e. `id=3`). If either value is not a
+            list of records with a unique key, the old and new values unless equal
+
+    """
+    old_records, new_records = _index(old, key), _index(new, key)
+    if old_records is None or new_records is None:
+        return {'old_value': old, 'new_value': new} if json_diff(old, new) else {}
+
+    differ = _JSONDiffer([], [], 0)
+    result: Dict[str, Dict[str, Any]] = {_RECORD_REMOVED: {}, _RECORD_ADDED: {}, _RECORD_CHANGED: {}}
+    for value, (label, record) in old_records.items():
+        if value not in new_records:
+            result[_RECORD_REMOVED][label] = record
+    for value, (label, record) in new_records.items():
+        if value not in old_records:
+            result[_RECORD_ADDED][label] = record
+            continue
+        changes: List[_Change] = []
+        try:
+            differ.diff(old_records[value][1], record, 'root', changes)
+            record_diff = _to_text_view(changes) if changes else {}
+        except _UnsupportedTypeError:
+            record_diff = json_diff(old_records[value][1], record)
+        if record_diff:
+            result[_RECORD_CHANGED][label] = record_diff
+    return {name: section for name, section in result.items() if section}
@@ -0,0 +1,214 @@
+"""Read only a selected subtree of a cache file.
+
+The selector uses the same syntax as the paths for `AssertRule` (i.e. `root['items'][3]`). Plain cache files are
+    memory-mapped and scanned without decoding the values that are skipped, so that only the selected subtree is
+    materialized. In cache files with references, the keys of the selector are escaped (see `references`) and blob
+    references along the path are followed
+
+"""
+
+import json
+import mmap
+import re
+from pathlib import Path
+
+from beartype import beartype
+from beartype.typing import Any, List, Optional, Union
+
+from .blob_store import _blob_path, is_reference, locate_blob_dir
+from .caching import StoredData, _locate_cache_file, read_cache_text
+from .constants import KEY_NAME_BLOB, KEY_NAME_DATA, KEY_NAME_EXTERNAL
+from .error_message import NoCacheError
+from .references import escape_key
+from .serializer import loads
+
+T_SEGMENT = Union[str, int]
+"""Dictionary key or list index."""
+
+_RE_SELECTOR_SEGMENT = re.compile(r"""\[(?:'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)"|(\d+))\]""")
+_RE_ESCAPE = re.compile(r'\\(.)')
+_RE_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_RE_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_RE_SCALAR = re.compile(rb'[^,\]}\s]+')
+_RE_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]')
+"""Strings (which may contain brackets) or brackets that change the nesting depth."""
+_RE_REFERENCE = re.compile(rb'\{\s*"' + KEY_NAME_BLOB.encode() + rb'"\s*:\s*"([0-9a-f]+)"\s*\}')
+
+_OPEN = frozenset(b'[{')
+_CLOSE = frozenset(b']}')
+
+
+@beartype
+def parse_selector(selector: str) -> List[T_SEGMENT]:
+    """Parse the selector into dictionary keys and list indices.
+
+    Args:
+        selector: path such as `root['items'][3]`
+
+    Returns:
+        List[T_SEGMENT]: string keys and integer indices
+
+    Raises:
+        ValueError: if the selector is not valid
+
+    """
+    if not selector.startswith('root'):
+        msg = f"Expected the selector to start with 'root', but received: {selector}"
+        raise ValueError(msg)
+    segments: List[T_SEGMENT] = []
+    pos = len('root')
+    while pos < len(selector):
+        match = _RE_SELECTOR_SEGMENT.match(selector, pos)
+        if not match:
+            msg = f'Could not parse the selector {selector!r} at position {pos}'
+            raise ValueError(msg)
+        single, double, index = match.groups()
+        key = single if single is not None else double
+        segments.append(int(index) if index is not None else _RE_ESCAPE.sub(r'\1', key))
+        pos = match.end()
+    return segments
+
+
+@beartype
+def stored_segments(segments: List[T_SEGMENT], external: List[str]) -> List[T_SEGMENT]:
+    """Escape the keys of the segments for data stored with references."""
+    if not external:
+        return segments
+    return [escape_key(segment) if isinstance(segment, str) else segment for segment in segments]
+
+
+@beartype
+def select(data: Any, segments: List[T_SEGMENT], path_blob_dir: Optional[Path] = None) -> Any:
+    """Select the subtree from in-memory data and follow any blob references along the path.
+
+    Raises:
+        KeyError: if the subtree does not exist
+
+    """
+    for segment in segments:
+        if path_blob_dir and is_reference(data):
+            data = loads(_blob_path(path_blob_dir, data[KEY_NAME_BLOB]).read_text())
+        try:
+            data = data[int(segment)] if isinstance(data, list) else data[str(segment)]
+        except (IndexError, KeyError, TypeError, ValueError):
+            raise KeyError(segment) from None
+    return data
+
+
+def _skip_whitespace(buf: mmap.mmap, pos: int) -> int:
+    return _RE_WHITESPACE.match(buf, pos).end()  # type: ignore[union-attr]
+
+
+def _skip_value(buf: mmap.mmap, pos: int) -> int:
+    """Return the position after the value that starts at `pos` without decoding it."""
+    char = buf[pos]
+    if char == ord('"'):
+        return _RE_STRING.match(buf, pos).end()  # type: ignore[union-attr]
+    if char not in _OPEN:
+        return _RE_SCALAR.match(buf, pos).end()  # type: ignore[union-attr]
+    depth = 0
+    for match in _RE_TOKEN.finditer(buf, pos):
+        token = buf[match.start()]
+        if token in _OPEN:
+            depth += 1
+        elif token in _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    msg = f'Unterminated JSON value at position {pos}'
+    raise ValueError(msg)
+
+
+def _seek(buf: mmap.mmap, pos: int, segment: T_SEGMENT) -> int:
+    """Return the position of the value for the key or index in the container that starts at `pos`."""
+    container = buf[pos]
+    if container not in _OPEN:
+        raise KeyError(segment)
+    is_dict = container == ord('{')
+    if not is_dict and not (isinstance(segment, int) or segment.isdigit()):
+        raise KeyError(segment)
+    target = str(segment) if is_dict else int(segment)
+    index = 0
+    pos = _skip_whitespace(buf, pos + 1)
+    while buf[pos] not in _CLOSE:
+        if is_dict:
+            match = _RE_STRING.match(buf, pos)
+            key = json.loads(match.group())  # type: ignore[union-attr]
+            pos = _skip_whitespace(buf, _skip_whitespace(buf, match.end()) + 1)  # type: ignore[union-attr]
+        else:
+            key, index = index, index + 1
+        if key == target:
+            return pos
+        pos = _skip_whitespace(buf, _skip_value(buf, pos))
+        if buf[pos] == ord(','):
+            pos = _skip_whitespace(buf, pos + 1)
+    raise KeyError(segment)
+
+
+def _read_external(buf: mmap.mmap) -> List[str]:
+    """Read the kinds of references, which are the first key of the sorted document when present."""
+    pos = _skip_whitespace(buf, 0)
+    if buf[pos] != ord('{'):
+        return []
+    pos = _skip_whitespace(buf, pos + 1)
+    match = _RE_STRING.match(buf, pos)
+    if not match or json.loads(match.group()) != KEY_NAME_EXTERNAL:
+        return []
+    pos = _skip_whitespace(buf, _skip_whitespace(buf, match.end()) + 1)
+    return loads(buf[pos:_skip_value(buf, pos)].decode('utf-8')) or []  # type: ignore[no-any-return]
+
+
+@beartype
+def _stream_select(path_json: Path, segments: List[T_SEGMENT], path_blob_dir: Optional[Path]) -> Any:
+    with path_json.open('rb') as json_file, mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        pos = _skip_whitespace(buf, 0)
+        for idx, segment in enumerate(segments):
+            reference = _RE_REFERENCE.match(buf, pos)
+            if reference and path_blob_dir:
+                path_blob = _blob_path(path_blob_dir, reference[1].decode())
+                return _stream_select(path_blob, segments[idx:], path_blob_dir)
+            pos = _seek(buf, pos, segment)
+        return loads(buf[pos:_skip_value(buf, pos)].decode('utf-8'))
+
+
+@beartype
+def read_selected(path_cache_file: Path, segments: List[T_SEGMENT]) -> Any:
+    """Read only the selected subtree of the cached data.
+
+    Args:
+        path_cache_file: location of the cache file
+        segments: keys and indices within the cached data from `parse_selector`
+
+    Returns:
+        Any: selected subtree, which may still contain blob references
+
+    Raises:
+        NoCacheError: if there is no cache file
+        KeyError: if the subtree does not exist
+
+    """
+    return read_selected_stored(path_cache_file, segments).data
+
+
+@beartype
+def read_selected_stored(path_cache_file: Path, segments: List[T_SEGMENT]) -> StoredData:
+    """Read only the selected subtree as stored with the kinds of references in the cache file. See `read_selected`."""
+    path_actual = _locate_cache_file(path_cache_file)
+    if not path_actual:
+        raise NoCacheError(path_cache_file)
+    if path_actual != path_cache_file:  # Compressed files are decompressed in full
+        document = loads(read_cache_text(path_actual))
+        external = document.get(KEY_NAME_EXTERNAL) or []
+        segments = [KEY_NAME_DATA, *stored_segments(segments, external)]
+        return StoredData(data=select(document, segments, _blob_dir(path_cache_file, external)), external=external)
+    with path_actual.open('rb') as json_file, mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        external = _read_external(buf)
+    segments = [KEY_NAME_DATA, *stored_segments(segments, external)]
+    data = _stream_select(path_actual, segments, _blob_dir(path_cache_file, external))
+    return StoredData(data=data, external=external)
+
+
+@beartype
+def _blob_dir(path_cache_file: Path, external: List[str]) -> Optional[Path]:
+    """Return the blob directory only if the cached data was stored with blob references."""
+    return locate_blob_dir(path_cache_file) if KEY_NAME_BLOB in external else None
@@ -0,0 +1,227 @@
+"""Segment-level matching of `AssertRule` patterns against the paths of a tree while it is walked.
+
+Patterns from `AssertRule.build_re` and `Wild` (and hand-written regular expressions or full paths in the same form)
+    are compiled into a sequence of segment matchers (literal key, any key, any index, recursive descent) that is
+    advanced one dictionary key or list index at a time, so that subtrees that cannot match are pruned. Any other
+    pattern is matched against the `root['a'][0]` path string like `DeepSearch`, which is only built when needed
+
+"""
+
+import re
+from enum import Enum
+
+from beartype import beartype
+from beartype.typing import Any, FrozenSet, List, Optional, Pattern, Tuple, Union
+from pydantic import BaseModel
+
+from .assert_rules import AssertRule
+
+T_PATH_SEGMENT = Any
+"""Dictionary key (typically a string) or list index."""
+
+
+class SegmentKind(Enum):  # noqa: H601
+    """Kinds of path segments."""
+
+    KEY = 'literal dictionary key'
+    ANY_KEY = 'any dictionary key'
+    DIGIT_KEY = 'dictionary key of only digits'
+    INDEX = 'literal list index'
+    ANY_INDEX = 'any list index'
+    RECUR = 'one or more keys or indices that start and end with a dictionary key'
+
+
+class Segment(BaseModel):
+    """Single segment of a compiled pattern."""
+
+    kind: SegmentKind
+    value: Union[str, int, None] = None
+    """Key or index for `KEY` and `INDEX`."""
+
+
+_RE_ESCAPED = re.compile(r'\\([^A-Za-z0-9])')
+_LITERAL = r'(?:[^\\.^$*+?{}\[\]|()\'\n]|\\[^A-Za-z0-9\n])+'
+_RE_TOKEN = re.compile(
+    r"\\\['(?P<key>" + _LITERAL + r")'\\\]"
+    r"|(?P<any_key>\\\['\[\^\\\]\]\+'\\\])"
+    r"|(?P<digit_key>\\\['\\d\+'\\\])"
+    r"|(?P<recur>\\\['\.\+'\\\])"
+    r'|(?P<any_index>\\\[\\d\+\\\])'
+    r'|\\\[(?P<index>\d+)\\\]',
+)
+"""Regular expression tokens from `AssertRule.build_re`, `Wild`, and escaped paths (i.e. `\\['a'\\]\\[\\d+\\]`)."""
+
+_RE_STR_TOKEN = re.compile(r"\['(?P<key>[^'\[\]\\]+)'\]|\[(?P<index>\d+)\]")
+"""String pattern tokens of a full path (i.e. `root['a'][0]`)."""
+
+_START = 'root'
+
+_MATCHED: FrozenSet[Tuple[int, Optional[bool]]] = frozenset({(-1, None)})
+"""State after a prefix of the path matched, which means that every descendant matches."""
+
+
+@beartype
+def _tokenize(text: str, token_re: Any) -> Optional[List[Any]]:
+    """Split the text after 'root' into tokens or return None if any part does not match."""
+    if not text.startswith(_START):
+        return None
+    tokens = []
+    pos = len(_START)
+    while pos < len(text):
+        token = token_re.match(text, pos)
+        if not token:
+            return None
+        tokens.append(token)
+        pos = token.end()
+    return tokens
+
+
+@beartype
+def _parse_regex(pattern: Pattern) -> Optional[Tuple[List[Segment], bool]]:  # type: ignore[type-arg]
+    """Translate a regular expression when every part has an exact segment equivalent."""
+    if pattern.flags & ~re.UNICODE:
+        return None
+    text = pattern.pattern
+    anchored = text.endswith('$') and not text.endswith('\\$')
+    text = text[1:] if text.startswith('^') else text  # FYI: `str.removeprefix` requires Python 3.9
+    tokens = _tokenize(text[:-1] if anchored else text, _RE_TOKEN)
+    if tokens is None:
+        return None
+    segments = []
+    for token in tokens:
+        name = token.lastgroup
+        if name == 'key':
+            segments.append(Segment(kind=SegmentKind.KEY, value=_RE_ESCAPED.sub(r'\1', token['key'])))
+        elif name == 'index':
+            segments.append(Segment(kind=SegmentKind.INDEX, value=int(token['index'])))
+        else:
+            segments.append(Segment(kind=SegmentKind[name.upper()]))  # type: ignore[union-attr]
+    return segments, anchored
+
+
+@beartype
+def _parse_string(pattern: str) -> Optional[List[Segment]]:
+    """Translate a string pattern of a full path, which matches as a case-insensitive prefix of the path."""
+    tokens = _tokenize(pattern, _RE_STR_TOKEN)
+    if not tokens:
+        return None
+    return [
+        Segment(kind=SegmentKind.KEY, value=_t['key'].lower()) if _t['key'] is not None
+        else Segment(kind=SegmentKind.INDEX, value=int(_t['index']))
+        for _t in tokens
+    ]
+
+
+_RE_DIGITS = re.compile(r'\d+')
+
+
+def _is_index(segment: T_PATH_SEGMENT) -> bool:
+    return isinstance(segment, int) and not isinstance(segment, bool)
+
+
+class PathMatcher(BaseModel):
+    """Nondeterministic state machine of the compiled segments.
+
+    The state is a set of `(position, inner)` pairs where `inner` is None unless within a `RECUR` segment and then
+        indicates if the last segment was a dictionary key
+
+    """
+
+    segments: List[Segment]
+    anchored: bool = False
+    """If True, only the exact path matches and not the descendants."""
+    case_sensitive: bool = True
+
+    def start(self) -> FrozenSet[Tuple[int, Optional[bool]]]:
+        return frozenset({(0, None)})
+
+    def advance(
+        self, state: FrozenSet[Tuple[int, Optional[bool]]], segment: T_PATH_SEGMENT,
+    ) -> Optional[FrozenSet[Tuple[int, Optional[bool]]]]:
+        """Return the state after the key or index or None if no descendant can match."""
+        if state is _MATCHED:
+            return state
+        is_key = isinstance(segment, str)
+        if is_key and not self.case_sensitive:
+            segment = segment.lower()
+        size = len(self.segments)
+        nxt = set()
+        for pos, inner in state:
+            if inner is not None:
+                nxt.add((pos, is_key))
+                continue
+            if pos == size:
+                continue
+            expected = self.segments[pos]
+            kind = expected.kind
+            if kind is SegmentKind.RECUR:
+                if is_key:  # `.+` cannot be empty, so an empty key must be followed by more segments
+                    nxt.add((pos, segment != ''))
+                continue
+            if kind is SegmentKind.KEY:
+                found = is_key and segment == expected.value
+            elif kind is SegmentKind.ANY_KEY:
+                found = is_key and segment != '' and ']' not in segment
+            elif kind is SegmentKind.DIGIT_KEY:
+                found = is_key and _RE_DIGITS.fullmatch(segment) is not None
+            elif kind is SegmentKind.INDEX:
+                found = _is_index(segment) and segment == expected.value
+            else:
+                found = _is_index(segment)
+            if found:
+                nxt.add((pos + 1, None))
+        nxt.update((pos + 1, None) for pos, inner in [*nxt] if inner)  # A RECUR segment may end after a key
+        if not nxt:
+            return None
+        if not self.anchored and (size, None) in nxt:
+            return _MATCHED
+        return frozenset(nxt)
+
+    def is_match(self, state: FrozenSet[Tuple[int, Optional[bool]]]) -> bool:
+        return state is _MATCHED or (len(self.segments), None) in state
+
+
+class FallbackMatcher(BaseModel):
+    """Match the path string like `DeepSearch` for patterns without a segment equivalent.
+
+    The path string and lower-case path are built once per node by the caller and subtrees are never pruned
+
+    """
+
+    pattern: Union[str, Pattern]  # type: ignore[type-arg]
+
+    def is_match(self, path: str, lower: str) -> bool:
+        if isinstance(self.pattern, str):
+            return self.pattern.lower() in lower
+        return self.pattern.search(path) is not None
+
+
+T_MATCHER = Union[PathMatcher, FallbackMatcher]
+
+
+@beartype
+def compile_matcher(assert_rule: AssertRule) -> T_MATCHER:
+    """Compile the rule's pattern into segments or fallback to matching the path string.
+
+    Args:
+        assert_rule: rule with a string or regular expression pattern
+
+    Returns:
+        T_MATCHER: matcher that is advanced for each key or index
+
+    """
+    if assert_rule.is_regex():
+        parsed = _parse_regex(assert_rule.pattern)  # type: ignore[arg-type]
+        if parsed:
+            return PathMatcher(segments=parsed[0], anchored=parsed[1])
+    else:
+        segments = _parse_string(assert_rule.pattern)  # type: ignore[arg-type]
+        if segments:
+            return PathMatcher(segments=segments, case_sensitive=False)
+    return FallbackMatcher(pattern=assert_rule.pattern)
+
+
+@beartype
+def format_path(path: Tuple[T_PATH_SEGMENT, ...]) -> str:
+    """Format the keys and indices in the `root['a'][0]` syntax used by DeepDiff."""
+    return ''.join([_START, *(f"['{_s}']" if isinstance(_s, str) else f'[{_s}]' for _s in path)])
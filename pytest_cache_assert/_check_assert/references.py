@@ -0,0 +1,28 @@
+"""Escape user keys that collide with the keys of references to data stored outside of the cache file.
+
+Cache files with references list the kinds of references in `_external`. In those files, a user key that is a
+    reference key with any number of leading `~` (i.e. `_blob`, `_npy`, or `~_blob`) is stored with one more
+    leading `~`, so that user data is never mistaken for a reference. Files without `_external` are stored and read
+    as-is
+
+"""
+
+from beartype.typing import FrozenSet
+
+from .constants import KEY_NAME_ARRAY, KEY_NAME_BLOB
+
+ESCAPE = '~'
+"""Prefix for escaped keys."""
+
+REFERENCE_KEYS: FrozenSet[str] = frozenset({KEY_NAME_ARRAY, KEY_NAME_BLOB})
+"""Keys of references that are reserved in cache files with references."""
+
+
+def escape_key(key: str) -> str:
+    """Escape the user key if it would collide with a reference key."""
+    return ESCAPE + key if key.lstrip(ESCAPE) in REFERENCE_KEYS else key
+
+
+def unescape_key(key: str) -> str:
+    """Restore the user key from `escape_key`."""
+    return key[1:] if key[:1] == ESCAPE and key.lstrip(ESCAPE) in REFERENCE_KEYS else key
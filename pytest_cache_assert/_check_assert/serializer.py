@@ -1,22 +1,42 @@
 # noqa: RBT002
 """Implement a serializer for caching data to and from version controlled files."""
 
+import dataclasses
 import json
 import re
+import types
+import typing
 from collections import defaultdict
 from contextlib import suppress
 from datetime import datetime
 from enum import Enum
 from json import JSONEncoder
+from math import isinf, isnan
+from operator import attrgetter
 from pathlib import Path, PurePath
 from uuid import UUID
 
 from beartype import beartype
-from beartype.typing import Any, Callable, Dict, List, Pattern, Tuple
+from beartype.typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+)
 from pydantic import BaseModel, Field
 
-from .constants import T_CONVERTER, T_DIFF
+from .constants import KEY_NAME_FRAME, T_CONVERTER, T_DIFF, T_SER
 from .converter import Converter
+from .json_backend import get_json_backend
 
 _RE_MEMORY_ADDRESS = re.compile(r'(?: at 0x[^>]+|["\']\d+["\'])>')
 """Regex for matching the hex memory address or MagicMock id in a function signature."""
@@ -26,6 +46,15 @@ class UnconvertableError(ValueError):
     """Custom Error to indicate conversion failure."""
 
 
+class _JSONNative:
+    """Result of a built-in converter that is already JSON-native, so that `make_diffable` does not walk it again."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: T_SER) -> None:
+        self.value = value
+
+
 @beartype
 def replace_memory_address(obj: Any) -> str:
     # Remove hex memory address from partial function signature
@@ -36,21 +65,78 @@ class _Converters(BaseModel):
     """Register converters for application."""
 
     converters: List[Tuple[Any, T_CONVERTER]] = Field(default_factory=list)
+    version: int = 0
+    """Incremented whenever the registered converters change."""
     converter_lookup: Dict[Any, List[T_CONVERTER]] = Field(default_factory=dict)
+    lookup_version: int = -1
+    """Version of the registry used to build `converter_lookup`."""
+    dispatch_cache: Dict[Any, List[T_CONVERTER]] = Field(default_factory=dict)
+    """Ordered candidate converters resolved for each concrete type."""
 
     @beartype
     def register(self, types: List[Any], converter: T_CONVERTER) -> None:
-        self.converters.extend((typ, converter) for typ in types)
-        self.converter_lookup = {}
+        self.register_pairs([(typ, converter) for typ in types])
+
+    @beartype
+    def register_pairs(self, pairs: List[Tuple[Any, T_CONVERTER]]) -> None:
+        """Register `(type, converter)` pairs with the highest precedence.
+
+        Pairs are compared by identity, so registering the most recently registered pairs again is a no-op and
+            a previously registered pair is moved rather than duplicated
+
+        """
+        unique_pairs: Dict[Tuple[int, int], Tuple[Any, T_CONVERTER]] = {}
+        for typ, converter in pairs:
+            key = (id(typ), id(converter))
+            unique_pairs.pop(key, None)
+            unique_pairs[key] = (typ, converter)
+        new_pairs = [*unique_pairs.values()]
+        if not new_pairs or self._ends_with(new_pairs):
+            return
+
+        self.converters = [
+            pair for pair in self.converters if (id(pair[0]), id(pair[1])) not in unique_pairs
+        ] + new_pairs
+        self.version += 1
+        self.dispatch_cache = {}
+
+    def _ends_with(self, pairs: List[Tuple[Any, T_CONVERTER]]) -> bool:
+        """Check if pairs are already the most recently registered converters."""
+        tail = self.converters[-len(pairs):]
+        return len(tail) == len(pairs) and all(
+            old_typ is typ and old_conv is conv for (old_typ, old_conv), (typ, conv) in zip(tail, pairs)
+        )
 
     @beartype
     def get_lookup(self) -> Dict[Any, List[T_CONVERTER]]:
-        if not self.converter_lookup:
+        if self.lookup_version != self.version:
             self.converter_lookup = defaultdict(list)
             for typ, converter in self.converters[::-1]:
                 self.converter_lookup[typ].append(converter)
+            self.lookup_version = self.version
         return self.converter_lookup
 
+    @beartype
+    def resolve(self, cls: type) -> List[T_CONVERTER]:
+        """Return the converters for a concrete type in order of precedence.
+
+        Exact matches are first followed by the converters of each registered base class (or ABC) in the order
+            of the lookup. The result is memoized until the registered converters change
+
+        """
+        try:
+            return self.dispatch_cache[cls]
+        except KeyError:
+            pass
+        lookup = self.get_lookup()
+        candidates = [*lookup.get(cls, [])]
+        for typ, converters in lookup.items():
+            with suppress(TypeError):  # Not all registered types support `issubclass`
+                if typ is not cls and issubclass(cls, typ):
+                    candidates.extend(converters)
+        self.dispatch_cache[cls] = candidates
+        return candidates
+
 
 _CONVERTERS = _Converters()
 
@@ -64,24 +150,33 @@ class _CacheAssertSerializer(JSONEncoder):
 
     """  # noqa: E501
 
-    def default(self, obj: Any) -> Any:  # noqa: CAC001,CFQ004
+    def default(self, obj: Any) -> Any:
         """Extend default encoder."""
-        converters = _CONVERTERS.get_lookup().get(type(obj))
-        for converter in converters or []:
-            with suppress(UnconvertableError):
-                return converter(obj)
-
-        for typ, converters in _CONVERTERS.get_lookup().items():
+        result = obj if type(obj) is _JSONNative else _convert(obj)
+        return result.value if type(result) is _JSONNative else result
+
+
+def _convert(obj: Any) -> Any:  # noqa: CAC001,CFQ004
+    """Apply the first successful registered converter or fallback to `str`."""
+    cls = type(obj)
+    # FYI: objects that override `__class__` (i.e. `MagicMock(spec=...)`) could match differently with `isinstance`
+    if obj.__class__ is cls:
+        converters = _CONVERTERS.dispatch_cache.get(cls) or _CONVERTERS.resolve(cls)
+    else:
+        lookup = _CONVERTERS.get_lookup()
+        converters = [*lookup.get(cls, [])]
+        for typ, typ_converters in lookup.items():
             if isinstance(obj, typ):
-                for converter in converters:
-                    with suppress(UnconvertableError):
-                        return converter(obj)
+                converters.extend(typ_converters)
+    for converter in converters:
+        with suppress(UnconvertableError):
+            return converter(obj)
 
-        # Fallback for obj of the general type "type" (i.e. `MagicMock` or "Flask")
-        try:
-            return _generic_memory_address_serializer(obj)
-        except UnconvertableError:
-            return str(obj)
+    # Fallback for obj of the general type "type" (i.e. `MagicMock` or "Flask")
+    try:
+        return _generic_memory_address_serializer(obj)
+    except UnconvertableError:
+        return str(obj)
 
 
 def _generic_memory_address_serializer(obj: Any) -> Any:
@@ -90,6 +185,72 @@ def _generic_memory_address_serializer(obj: Any) -> Any:
     raise UnconvertableError("Not a match for 'replace_memory_address'")
 
 
+_UNSET = object()
+"""Value of a slot that was never assigned."""
+
+
+class _FieldPlan(NamedTuple):
+    """Names of the fields of a class and a getter that returns their values as a tuple."""
+
+    names: Tuple[str, ...]
+    getter: Callable[[Any], Tuple[Any, ...]]
+
+
+def _slot_names(cls: type) -> Optional[Tuple[str, ...]]:
+    """Return the names of the slots or None unless every class in the MRO uses `__slots__` without a `__dict__`."""
+    names: List[str] = []
+    for klass in cls.__mro__[-2::-1]:  # From the base class to the class, excluding `object`
+        slots = klass.__dict__.get('__slots__')
+        if slots is None:
+            return None
+        for name in [slots] if isinstance(slots, str) else slots:
+            if name == '__dict__':
+                return None
+            if name != '__weakref__' and name not in names:
+                names.append(name)
+    return tuple(names)
+
+
+def _build_field_plan(cls: type) -> Optional[_FieldPlan]:
+    """Introspect the fields of dataclasses, attrs classes, and `__slots__` classes.
+
+    `__slots__` classes are only converted when neither `__repr__` nor `__str__` is overridden, because `str` would
+        otherwise be more meaningful than the slots (i.e. `ipaddress.IPv4Address`)
+
+    """
+    names: Optional[Tuple[str, ...]] = None
+    if hasattr(cls, '__dataclass_fields__'):
+        names = tuple(_f.name for _f in dataclasses.fields(cls))  # type: ignore[arg-type]
+    elif hasattr(cls, '__attrs_attrs__'):
+        names = tuple(_a.name for _a in cls.__attrs_attrs__)  # type: ignore[attr-defined]
+    elif cls.__repr__ is object.__repr__ and cls.__str__ is object.__str__:
+        slots = _slot_names(cls)
+        if slots:
+            return _FieldPlan(slots, lambda obj: tuple(getattr(obj, _n, _UNSET) for _n in slots))
+    if not names:
+        return None
+    getter = attrgetter(*names)
+    return _FieldPlan(names, getter if len(names) > 1 else lambda obj: (getter(obj),))
+
+
+_FIELD_PLANS: Dict[type, Optional[_FieldPlan]] = {}
+"""Memoized result of `_build_field_plan` for each class."""
+
+
+def _serialize_fields(obj: Any) -> Dict[str, Any]:
+    """Convert dataclasses, attrs classes, and `__slots__` classes to a dictionary of their fields."""
+    cls = type(obj)
+    try:
+        plan = _FIELD_PLANS[cls]
+    except KeyError:
+        plan = _FIELD_PLANS[cls] = _build_field_plan(cls)
+    if plan is None:
+        raise UnconvertableError(f'No fields for {cls}')
+    return {name: value for name, value in zip(plan.names, plan.getter(obj)) if value is not _UNSET}
+
+
+# Registered first as the converter with the lowest precedence for any class
+_CONVERTERS.register([object], _serialize_fields)
 _CONVERTERS.register([Callable], _generic_memory_address_serializer)
 
 
@@ -148,33 +309,211 @@ with suppress(ImportError):
 with suppress(ImportError):
     import pandas as pd
 
+    def _pandas_values(values: Any) -> Any:
+        """Keep numeric arrays (see `make_diffable`), but convert dates and objects to lists."""
+        kind = values.dtype.kind
+        if kind in 'biuf':
+            return values
+        if kind in 'mM':
+            return _JSONNative(values.astype(str).tolist())
+        if pd.api.types.infer_dtype(values, skipna=False) == 'string':  # Checked in C rather than by walking the list
+            return _JSONNative(values.tolist())
+        return values.tolist()
+
     def _serialize_pandas(obj: pd.DataFrame) -> Dict:  # type: ignore[type-arg]
-        return obj.to_dict()  # type: ignore[no-any-return]
+        """Cache the DataFrame by column with the dtypes (see `frame_diff`)."""
+        return {KEY_NAME_FRAME: {
+            'columns': obj.columns.tolist(),
+            'dtypes': [str(dtype) for dtype in obj.dtypes],
+            'index': _pandas_values(obj.index.to_numpy()),
+            'index_dtype': str(obj.index.dtype),
+            'data': [_pandas_values(obj.iloc[:, idx].to_numpy()) for idx in range(obj.shape[1])],
+        }}
 
     _CONVERTERS.register([pd.DataFrame], _serialize_pandas)
 
+_ARRAY_TYPES: Tuple[type, ...] = ()
+"""NumPy arrays when installed."""
+
 with suppress(ImportError):
     import numpy as np
 
-    def _serialize_numpy(obj: np.ndarray) -> List:  # type: ignore[type-arg]
-        return obj.tolist()  # type: ignore[no-any-return]
+    def _serialize_numpy(obj: np.ndarray) -> Any:  # type: ignore[type-arg]
+        """Convert with `tolist`, which returns JSON-native values in C for bool, numeric, and str arrays."""
+        kind = obj.dtype.kind
+        if kind in 'biuU' or (kind == 'f' and obj.dtype.itemsize <= 8):  # noqa: PLR2004 # Not `numpy.longdouble`
+            return _JSONNative(obj.tolist())
+        return obj.tolist()
 
     _CONVERTERS.register([np.ndarray], _serialize_numpy)
+    _ARRAY_TYPES = (np.ndarray,)
 
 with suppress(ImportError):
+    from pydantic import PlainSerializer, WrapSerializer
     from pydantic.main import BaseModel
+    from pydantic_core import PydanticSerializationError
+
+    _JSON_MODE_TYPES = frozenset({str, int, float, bool, type(None), UUID})
+    """Field types that pydantic's JSON mode serializes the same way as the registered converters."""
+
+    _JSON_MODE_ORIGINS = frozenset({list, tuple, Union, getattr(types, 'UnionType', Union)})
+
+    _ANNOTATED = getattr(typing, 'Annotated', None)
+    """Only available in Python 3.9+. Otherwise, nested `Annotated` types are conservatively not JSON mode."""
+
+    _JSON_MODE_MODELS: Dict[type, bool] = {}
+    """Memoized result of `_is_json_mode_model` for each model."""
+
+    def _is_json_mode_annotation(annotation: Any) -> bool:
+        """Check if the annotation only contains types that are serialized the same in JSON mode."""
+        if isinstance(annotation, type):
+            is_model = issubclass(annotation, BaseModel)
+            return annotation in _JSON_MODE_TYPES or (is_model and _is_json_mode_model(annotation))
+        origin, args = get_origin(annotation), get_args(annotation)
+        if origin is Literal:
+            return all(type(arg) in _JSON_MODE_TYPES for arg in args)
+        if _ANNOTATED is not None and origin is _ANNOTATED:
+            return _is_json_mode_annotation(args[0]) and _is_json_mode_metadata(args[1:])
+        if origin is dict:
+            return len(args) == 2 and args[0] is str and _is_json_mode_annotation(args[1])  # noqa: PLR2004
+        return origin in _JSON_MODE_ORIGINS and bool(args) and all(
+            arg is Ellipsis or _is_json_mode_annotation(arg) for arg in args
+        )
+
+    def _is_json_mode_metadata(metadata: Any) -> bool:
+        return not any(isinstance(item, (PlainSerializer, WrapSerializer)) for item in metadata)
+
+    def _is_json_mode_model(cls: type) -> bool:
+        """Check if `model_dump(mode='json')` would match converting `model_dump()` with the registered converters.
 
-    def _serialize_pydantic(obj: BaseModel) -> Dict:  # type: ignore[type-arg]
-        return obj.dict()
+        Paths, dates, enums, sets, and bytes are converted differently, as are any fields with custom serializers
+
+        """
+        try:
+            return _JSON_MODE_MODELS[cls]
+        except KeyError:
+            pass
+        _JSON_MODE_MODELS[cls] = False  # Conservatively for self-referencing models
+        decorators = cls.__pydantic_decorators__  # type: ignore[attr-defined]
+        _JSON_MODE_MODELS[cls] = (
+            not (decorators.field_serializers or decorators.model_serializers or decorators.computed_fields)
+            and cls.model_config.get('extra') != 'allow'  # type: ignore[attr-defined]
+            and all(
+                _is_json_mode_annotation(field.annotation) and _is_json_mode_metadata(field.metadata)
+                for field in cls.model_fields.values()  # type: ignore[attr-defined]
+            )
+        )
+        return _JSON_MODE_MODELS[cls]
+
+    def _serialize_pydantic(obj: BaseModel) -> Any:
+        """Dump in JSON mode in `pydantic-core` when the output is the same as the registered converters."""
+        if _is_json_mode_model(type(obj)):
+            with suppress(PydanticSerializationError):  # Such as values of the wrong type from `model_construct`
+                return _JSONNative(obj.model_dump(mode='json', warnings=False))
+        return obj.model_dump()
 
     _CONVERTERS.register([BaseModel], _serialize_pydantic)
 
 
 @beartype
 def register_user_converters(converters: List[Converter]) -> None:
-    """Register the user-specified converters."""
-    for converter in converters:
-        _CONVERTERS.register(converter.types, converter.func)
+    """Register the user-specified converters. Repeated calls with the same converters are a no-op."""
+    _CONVERTERS.register_pairs([(typ, converter.func) for converter in converters for typ in converter.types])
+
+
+_JSON_ATOMS = frozenset({str, int, float, bool, type(None)})
+"""Exact types that are already JSON-native and can be returned as-is."""
+
+
+def _diffable_key(key: Any) -> str:
+    """Convert a dictionary key to the string that `json.dumps` would write."""
+    if isinstance(key, str):
+        return str.__str__(key)
+    if isinstance(key, float):
+        if isnan(key):
+            return 'NaN'
+        if isinf(key):
+            return 'Infinity' if key > 0 else '-Infinity'
+        return float.__repr__(key)
+    if key is True:
+        return 'true'
+    if key is False:
+        return 'false'
+    if key is None:
+        return 'null'
+    if isinstance(key, int):
+        return int.__repr__(key)
+    msg = f'keys must be str, int, float, bool or None, not {type(key).__name__}'
+    raise TypeError(msg)
+
+
+def _list_to_diffable(obj: Any, markers: Set[int], array_min_size: int) -> List[T_DIFF]:
+    """Convert each item of a list or tuple."""
+    obj_id = id(obj)
+    if obj_id in markers:
+        raise ValueError('Circular reference detected')
+    markers.add(obj_id)
+    result = [
+        value if type(value) in _JSON_ATOMS else _to_diffable(value, markers, array_min_size) for value in obj
+    ]
+    markers.discard(obj_id)
+    return result
+
+
+def _dict_to_diffable(obj: Any, markers: Set[int], array_min_size: int) -> Dict[str, T_DIFF]:
+    """Convert each key and value of a dictionary."""
+    obj_id = id(obj)
+    if obj_id in markers:
+        raise ValueError('Circular reference detected')
+    markers.add(obj_id)
+    result = {
+        (key if type(key) is str else _diffable_key(key)): (
+            value if type(value) in _JSON_ATOMS else _to_diffable(value, markers, array_min_size)
+        )
+        for key, value in obj.items()
+    }
+    markers.discard(obj_id)
+    return result
+
+
+def _to_diffable(obj: Any, markers: Set[int], array_min_size: int) -> T_DIFF:  # noqa: CAC001
+    """Walk obj once and return the same JSON-native types as `loads(dumps(obj))`.
+
+    Follows the type precedence and circular reference checks of the `json` encoder without building a string.
+        NumPy arrays with at least `array_min_size` elements (when set) are returned as-is
+
+    """
+    typ = type(obj)
+    if typ is dict:
+        return _dict_to_diffable(obj, markers, array_min_size)
+    if typ is list:
+        return _list_to_diffable(obj, markers, array_min_size)
+    if typ in _JSON_ATOMS:
+        return obj
+    if typ is _JSONNative:
+        return obj.value
+    # Subclasses of JSON-native types (i.e. StrEnum or IntEnum) are encoded as their base type
+    if isinstance(obj, str):
+        return str.__str__(obj)
+    if isinstance(obj, int):
+        return int.__int__(obj)
+    if isinstance(obj, float):
+        return float.__float__(obj)
+
+    if isinstance(obj, (list, tuple)):
+        return _list_to_diffable(obj, markers, array_min_size)
+    if isinstance(obj, dict):
+        return _dict_to_diffable(obj, markers, array_min_size)
+    if array_min_size and isinstance(obj, _ARRAY_TYPES) and obj.dtype.kind in 'biufc' and obj.size >= array_min_size:
+        return obj
+
+    obj_id = id(obj)
+    if obj_id in markers:
+        raise ValueError('Circular reference detected')
+    markers.add(obj_id)
+    result = _to_diffable(_convert(obj), markers, array_min_size)
+    markers.discard(obj_id)
+    return result
 
 
 @beartype
@@ -193,6 +532,9 @@ def dumps(obj: Any, *, sort_keys: bool = False, indent: int = 0) -> str:
         UnconvertableError: when serialization fails
 
     """
+    raw = get_json_backend().dumps(obj, sort_keys=sort_keys, indent=indent)
+    if raw is not None:
+        return raw
     try:
         return json.dumps(obj, sort_keys=sort_keys, indent=indent or None, cls=_CacheAssertSerializer)
     except UnconvertableError as exc:
@@ -225,18 +567,26 @@ def loads(raw: str) -> T_DIFF:
         T_DIFF: DiffResults-safe data
 
     """
-    return json.loads(raw)
+    return get_json_backend().loads(raw)
 
 
 @beartype
-def make_diffable(data: Any) -> T_DIFF:
+def make_diffable(data: Any, *, array_min_size: int = 0) -> T_DIFF:
     """Convert raw object to diffable types for assertion checks.
 
     Args:
         data: data to serialize
+        array_min_size: if set, NumPy arrays with at least this many elements are kept as arrays (see `array_store`)
 
     Returns:
         T_DIFF: DiffResults-safe data
 
+    Raises:
+        UnconvertableError: when serialization fails
+
     """
-    return loads(dumps(data))
+    try:
+        return _to_diffable(data, set(), array_min_size)
+    except UnconvertableError as exc:
+        msg = f'Conversion error. Try specifying new converters in AssertConfig to fix: {exc}'  # noqa: E501
+        raise UnconvertableError(msg) from exc
@@ -0,0 +1,296 @@
+"""SQLite implementation of the CacheStore interface for very large snapshot suites.
+
+All snapshots in a cache directory are stored in a single database instead of one JSON file per test. The
+    database can be converted to and from the per-file JSON layout for code review with:
+
+```sh
+python -m pytest_cache_assert._check_assert.sqlite_store export tests/assert-cache/cache-assert.sqlite3 review/
+python -m pytest_cache_assert._check_assert.sqlite_store import review/ tests/assert-cache/cache-assert.sqlite3
+```
+
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from beartype import beartype
+from beartype.typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .caching import CODECS, _atomic_write_text, init_cache, read_cache_text
+from .constants import KEY_NAME_DATA, KEY_NAME_META
+from .converter import Converter
+from .error_message import NoCacheError
+from .partial_read import T_SEGMENT, parse_selector, select
+from .serializer import dumps, loads, make_diffable, pretty_dumps, register_user_converters
+
+DB_NAME = 'cache-assert.sqlite3'
+"""File name of the database in the cache directory."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (name TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metadata (
+    name TEXT NOT NULL, meta TEXT NOT NULL, PRIMARY KEY (name, meta)
+) WITHOUT ROWID;
+"""
+
+_CONNECTIONS: Dict[Tuple[Path, int, int], sqlite3.Connection] = {}
+"""Connections for each database, process, and thread."""
+
+
+@beartype
+def connect(path_db: Path) -> sqlite3.Connection:
+    """Return a cached connection to the database in WAL mode, which allows readers concurrent with a writer.
+
+    Args:
+        path_db: location of the database file
+
+    Returns:
+        sqlite3.Connection: connection in autocommit mode where transactions are managed explicitly
+
+    """
+    key = (path_db, os.getpid(), threading.get_ident())
+    conn = _CONNECTIONS.get(key)
+    if conn is not None and not path_db.is_file():  # Reconnect if the database was deleted
+        conn.close()
+        conn = None
+    if conn is None:
+        path_db.parent.mkdir(exist_ok=True, parents=True)
+        conn = sqlite3.connect(path_db, timeout=60, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        _CONNECTIONS[key] = conn
+    return conn
+
+
+@beartype
+def _locate(path_cache_file: Path) -> Optional[Tuple[Path, str]]:
+    """Find the nearest database for the cache file and the relative name used as the key."""
+    for path_dir in path_cache_file.parents:
+        path_db = path_dir / DB_NAME
+        if path_db.is_file():
+            return path_db, path_cache_file.relative_to(path_dir).as_posix()
+    return None
+
+
+@beartype
+def _read_document(conn: sqlite3.Connection, name: str) -> Optional[Dict[str, Any]]:
+    row = conn.execute('SELECT data FROM snapshots WHERE name = ?', (name,)).fetchone()
+    if row is None:
+        return None
+    meta = conn.execute('SELECT meta FROM metadata WHERE name = ? ORDER BY meta', (name,)).fetchall()
+    return {KEY_NAME_META: [loads(_m) for (_m,) in meta], KEY_NAME_DATA: loads(row[0])}
+
+
+@beartype
+def _json_path(segments: List[T_SEGMENT]) -> Optional[str]:
+    """Convert to an SQLite JSON path or None if a key would need to be escaped."""
+    parts = ['$']
+    for segment in segments:
+        if isinstance(segment, int):
+            parts.append(f'[{segment}]')
+        elif '"' in segment or '\\' in segment:
+            return None
+        else:
+            parts.append(f'."{segment}"')
+    return ''.join(parts)
+
+
+@beartype
+def _read_selected(conn: sqlite3.Connection, name: str, segments: List[T_SEGMENT], path_cache_file: Path) -> Any:
+    """Extract the subtree within SQLite and fallback to Python for paths that SQLite cannot express.
+
+    The subtree is returned as JSON text and decoded with `loads`, so that large integers are not converted to floats.
+        Data that SQLite cannot parse (i.e. `NaN`) or versions of SQLite without the `->` operator are handled in Python
+
+    Raises:
+        NoCacheError: if there is no snapshot
+        KeyError: if the subtree does not exist
+
+    """
+    json_path = _json_path(segments)
+    if json_path:
+        try:
+            row = conn.execute('SELECT data -> ? FROM snapshots WHERE name = ?', (json_path, name)).fetchone()
+        except sqlite3.OperationalError:
+            row = ('',)
+        if row is None:
+            raise NoCacheError(path_cache_file)
+        if row[0]:
+            return loads(row[0])
+    document = _read_document(conn, name)  # Such as an integer index for a dictionary key
+    if document is None:
+        raise NoCacheError(path_cache_file)
+    return select(document[KEY_NAME_DATA], segments)
+
+
+@beartype
+def _write_document(
+    conn: sqlite3.Connection,
+    name: str,
+    *,
+    meta: List[Dict],  # type: ignore[type-arg]
+    test_data: Any,
+    always_write: bool,
+) -> Any:
+    """Merge the metadata and data into the database within a write transaction.
+
+    Returns:
+        Any: the cached data before writing or `test_data` if there was no cached data
+
+    """
+    new_text = dumps(test_data, sort_keys=True)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('SELECT data FROM snapshots WHERE name = ?', (name,)).fetchone()
+        if row is None or (always_write and row[0] != new_text):
+            conn.execute('INSERT OR REPLACE INTO snapshots (name, data) VALUES (?, ?)', (name, new_text))
+        conn.executemany(
+            'INSERT OR IGNORE INTO metadata (name, meta) VALUES (?, ?)',
+            [(name, dumps(_m, sort_keys=True)) for _m in meta],
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return test_data if row is None else loads(row[0])
+
+
+class SQLiteCacheStore:
+    """Implementation of the CacheStore interface with a single SQLite database per cache directory.
+
+    Snapshots are keyed by the `cache_name` relative to the cache directory and the data is stored as compact
+        JSON. Unique metadata dictionaries are stored in a separate table
+
+    """
+
+    @staticmethod
+    @beartype
+    def initialize(path_cache_dir: Optional[Path], converters: Optional[List[Converter]] = None) -> None:
+        if converters:
+            register_user_converters(converters)
+        if path_cache_dir:
+            init_cache(path_cache_dir)
+            connect(path_cache_dir / DB_NAME)
+
+    @staticmethod
+    @beartype
+    def serialize(data: Any) -> Any:
+        return make_diffable(data=data)
+
+    @staticmethod
+    @beartype
+    def write(
+        path_cache_file: Path,
+        *,
+        metadata: Optional[Dict],  # type: ignore[type-arg]
+        test_data: Any,
+        always_write: bool = False,
+    ) -> None:
+        SQLiteCacheStore.update(
+            path_cache_file=path_cache_file, metadata=metadata, test_data=test_data, always_write=always_write,
+        )
+
+    @staticmethod
+    @beartype
+    def read_cached_data(path_cache_file: Path, selector: Optional[str] = None) -> Any:
+        """Read the cached data or only the subtree for the `selector` (i.e. `root['items'][3]`)."""
+        located = _locate(path_cache_file)
+        if selector is not None and located:
+            return _read_selected(connect(located[0]), located[1], parse_selector(selector), path_cache_file)
+        document = _read_document(connect(located[0]), located[1]) if located else None
+        if document is None:
+            raise NoCacheError(path_cache_file)
+        return document[KEY_NAME_DATA]
+
+    @staticmethod
+    @beartype
+    def update(
+        path_cache_file: Path,
+        *,
+        metadata: Optional[Dict],  # type: ignore[type-arg]
+        test_data: Any,
+        always_write: bool = False,
+    ) -> Any:
+        """Write to the cache and return the previously cached data (or `test_data` if new) in one transaction."""
+        located = _locate(path_cache_file)
+        if not located:
+            msg = f'No {DB_NAME} in any parent directory of {path_cache_file}. Call `initialize` first'
+            raise FileNotFoundError(msg)
+        path_db, name = located
+        return _write_document(
+            connect(path_db), name, meta=[make_diffable(metadata or {}) or {}], test_data=test_data,
+            always_write=always_write,
+        )
+
+
+@beartype
+def export_json(path_db: Path, path_cache_dir: Path) -> int:
+    """Write each snapshot to the per-file JSON layout used by `LocalJSONCacheStore`.
+
+    Args:
+        path_db: location of the database file
+        path_cache_dir: destination cache directory
+
+    Returns:
+        int: number of exported files
+
+    """
+    conn = connect(path_db)
+    names = [name for (name,) in conn.execute('SELECT name FROM snapshots ORDER BY name')]
+    for name in names:
+        _atomic_write_text(path_cache_dir / name, pretty_dumps(_read_document(conn, name)))
+    return len(names)
+
+
+@beartype
+def import_json(path_cache_dir: Path, path_db: Path) -> int:
+    """Load the plain or compressed files from the per-file JSON layout.
+
+    The data of existing snapshots is replaced and the metadata is merged
+
+    Args:
+        path_cache_dir: source cache directory
+        path_db: location of the database file
+
+    Returns:
+        int: number of imported files
+
+    """
+    conn = connect(path_db)
+    suffixes = tuple(f'.json{_c.suffix}' for _c in CODECS.values())
+    paths = sorted(_p for _p in path_cache_dir.rglob('*.json*') if _p.name.endswith(('.json', *suffixes)))
+    for path_cache_file in paths:
+        document = loads(read_cache_text(path_cache_file))
+        name = path_cache_file.relative_to(path_cache_dir).as_posix()
+        _write_document(
+            conn, name[:name.rindex('.json') + len('.json')], meta=document[KEY_NAME_META],
+            test_data=document[KEY_NAME_DATA], always_write=True,
+        )
+    return len(paths)
+
+
+def cli(argv: Optional[Sequence[str]] = None) -> None:
+    """Convert between the SQLite database and the per-file JSON layout."""
+    parser = argparse.ArgumentParser(description='Convert between the SQLite database and per-file JSON layout.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='Write the database to JSON files')
+    export_parser.add_argument('path_db', type=Path)
+    export_parser.add_argument('path_cache_dir', type=Path)
+    import_parser = subparsers.add_parser('import', help='Load JSON files into the database')
+    import_parser.add_argument('path_cache_dir', type=Path)
+    import_parser.add_argument('path_db', type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        count = export_json(args.path_db, args.path_cache_dir)
+    else:
+        count = import_json(args.path_cache_dir, args.path_db)
+    print(f'{args.command.title()}ed {count} snapshots')  # noqa: T201
+
+
+if __name__ == '__main__':  # pragma: no cover
+    cli()
@@ -0,0 +1,95 @@
+"""Order-insensitive comparison of lists as multisets of canonical keys.
+
+Each item is reduced to a hashable canonical key (where dictionaries and nested lists compare regardless of order
+    and `1`, `1.0`, and `True` remain distinct like DeepDiff), so that two lists are compared with one dictionary
+    lookup per item instead of the pairwise comparisons of `DeepDiff(ignore_order=True)`
+
+"""
+
+from collections import Counter, defaultdict, deque
+from collections.abc import Hashable, Mapping
+
+from beartype import beartype
+from beartype.typing import Any, Deque, Dict, List, Sequence, Tuple
+
+_SEQUENCES = (list, tuple)
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def _canonical(value: Any) -> Hashable:
+    cls = type(value)
+    if cls in _SCALAR_TYPES:
+        return (cls, value)
+    if cls is dict or (cls is not list and isinstance(value, Mapping)):
+        return (dict, frozenset(zip(value.keys(), map(_canonical, value.values()))))
+    if cls is list or isinstance(value, _SEQUENCES):
+        return (list, frozenset(Counter(map(_canonical, value)).items()))
+    try:
+        hash(value)
+    except TypeError:
+        return (cls, repr(value))
+    return (cls, value)
+
+
+@beartype
+def canonical(value: Any) -> Hashable:
+    """Return a key that is equal for equal values, where the order of nested lists is ignored.
+
+    Args:
+        value: JSON-native data or other hashable values
+
+    Returns:
+        Hashable: canonical key
+
+    """
+    return _canonical(value)
+
+
+@beartype
+def unordered_diff(old: Sequence[Any], new: Sequence[Any]) -> Tuple[List[int], List[int]]:
+    """Match the items of both lists by canonical key in linear time.
+
+    Args:
+        old: old list (typically cached data)
+        new: new list (typically test data)
+
+    Returns:
+        Tuple[List[int], List[int]]: indices of the items that were removed from `old` and added to `new`, where
+            repeated items are matched up to the number of times that they occur in both lists
+
+    """
+    pending: Dict[Hashable, Deque[int]] = defaultdict(deque)
+    for idx, item in enumerate(new):
+        pending[_canonical(item)].append(idx)
+    removed = []
+    for idx, item in enumerate(old):
+        matches = pending.get(_canonical(item))
+        if matches:
+            matches.popleft()
+        else:
+            removed.append(idx)
+    added = sorted(idx for matches in pending.values() for idx in matches)
+    return removed, added
+
+
+@beartype
+def describe_unordered(old: Any, new: Any) -> Dict[str, Any]:
+    """Summarize only the items that were added or removed in the shape of DeepDiff's report types.
+
+    Args:
+        old: the old value
+        new: the new value
+
+    Returns:
+        Dict[str, Any]: `iterable_item_removed` and `iterable_item_added` by index or the old and new values when
+            either one is not a list
+
+    """
+    if not (isinstance(old, _SEQUENCES) and isinstance(new, _SEQUENCES)):
+        return {'old_value': old, 'new_value': new}
+    removed, added = unordered_diff(old, new)
+    result = {
+        'iterable_item_removed': {f'[{idx}]': old[idx] for idx in removed},
+        'iterable_item_added': {f'[{idx}]': new[idx] for idx in added},
+    }
+    return {key: value for key, value in result.items() if value}
@@ -6,8 +6,10 @@ from typing import runtime_checkable
 from beartype import beartype
 from beartype.typing import Any, List, Optional, Protocol
 
+from .array_diff import align_arrays
 from .assert_rules import AssertRule
-from .differ import diff_with_rules
+from .config import CacheAssertContainerKeys, retrieve
+from .differ import diff_with_rules, is_identical
 from .error_message import RichAssertionError
 
 
@@ -22,6 +24,34 @@ class ValidatorType(Protocol):
         ...
 
 
+@beartype
+def _assert_no_diff(
+    *, test_data: Any, cached_data: Any, assert_rules: List[AssertRule], path_cache_file: Optional[Path],
+    json_native: bool,
+) -> None:
+    passes_when_equal = all(_ar.passes_when_equal() for _ar in assert_rules)
+    if passes_when_equal and is_identical(cached_data, test_data):
+        return
+    aligned = align_arrays(cached_data, test_data)  # Such as a list cached before `array_min_size` was set
+    if aligned[0] is not cached_data or aligned[1] is not test_data:
+        cached_data, test_data = aligned
+        if passes_when_equal and is_identical(cached_data, test_data):
+            return
+    config = retrieve(CacheAssertContainerKeys.CONFIG)
+    diff_results = diff_with_rules(
+        old_dict=cached_data, new_dict=test_data, assert_rules=assert_rules or [], json_native=json_native,
+        max_diffs=config.max_diffs, ignore_order=config.ignore_order,
+    )
+    if diff_results.to_dict():
+        kwargs = {
+            'test_data': test_data,
+            'cached_data': cached_data,
+            'path_cache_file': path_cache_file,
+            'diff_results': diff_results,
+        }
+        raise RichAssertionError(RichAssertionError.create_message(**kwargs), error_info=kwargs)
+
+
 class DictDiffValidator:
     """Default Validator."""
 
@@ -42,12 +72,38 @@ class DictDiffValidator:
             RichAssertionError: if any assertion comparison fails
 
         """
-        diff_results = diff_with_rules(old_dict=cached_data, new_dict=test_data, assert_rules=assert_rules or [])
-        if diff_results.to_dict():
-            kwargs = {
-                'test_data': test_data,
-                'cached_data': cached_data,
-                'path_cache_file': path_cache_file,
-                'diff_results': diff_results,
-            }
-            raise RichAssertionError(RichAssertionError.create_message(**kwargs), error_info=kwargs)
+        _assert_no_diff(
+            test_data=test_data, cached_data=cached_data, assert_rules=assert_rules, path_cache_file=path_cache_file,
+            json_native=False,
+        )
+
+
+class JSONDiffValidator:
+    """Validator with a JSON-native differ that is faster than DeepDiff on large documents.
+
+    The differences are reported in the same shape as `DictDiffValidator`. Data that is not JSON-native (i.e. from
+        a custom `cache_store`) is compared with DeepDiff
+
+    """
+
+    @staticmethod
+    @beartype
+    def assertion(
+        *, test_data: Any, cached_data: Any, assert_rules: List[AssertRule], path_cache_file: Optional[Path] = None,
+    ) -> None:
+        """Validate test data against cached data.
+
+        Args:
+            test_data: data to compare
+            cached_data: data to compare
+            assert_rules: list of assert rules to apply
+            path_cache_file: optional Path to the cached data
+
+        Raises:
+            RichAssertionError: if any assertion comparison fails
+
+        """
+        _assert_no_diff(
+            test_data=test_data, cached_data=cached_data, assert_rules=assert_rules, path_cache_file=path_cache_file,
+            json_native=True,
+        )
@@ -0,0 +1,334 @@
+"""Deferred, batched write-back of cache files.
+
+Pending writes are coalesced per cache file in memory and flushed at the end of the pytest session. Each update is
+    first appended to a journal, so that the writes from an interrupted session are replayed by the next session
+
+"""
+
+import atexit
+import os
+import threading
+from json import JSONDecodeError
+from pathlib import Path
+from uuid import uuid4
+
+from beartype import beartype
+from beartype.typing import IO, Any, Callable, Dict, List, Optional
+from pydantic import BaseModel, PrivateAttr
+
+from .caching import (
+    StoredData,
+    _merge_metadata,
+    _read_full_cache,
+    _stored_data,
+    fcntl,
+    load_stored_data,
+    update_cache_file,
+)
+from .constants import KEY_NAME_META
+from .serializer import dumps, loads, make_diffable
+
+_JOURNAL_GLOB = 'journal-*.jsonl'
+
+
+class _PendingWrite(BaseModel):
+    """Coalesced content to write to a single cache file."""
+
+    meta: List[Dict]  # type: ignore[type-arg]
+    test_data: Any
+    always_write: bool
+    external: List[str] = []
+
+
+class _WriteBehindQueue(BaseModel):
+    """In-memory queue of cache file writes that are flushed in one batch.
+
+    Reads of a file with a pending write are served from memory, so that later assertions see the queued content
+
+    """
+
+    journal_dir: Optional[Path] = None
+    """Directory for the journal. When not set, updates are not journaled."""
+
+    use_thread: bool = False
+    """If True, a background thread writes the pending files during the session."""
+
+    _pending: Dict[Path, _PendingWrite] = PrivateAttr(default_factory=dict)
+    _in_flight: Dict[Path, _PendingWrite] = PrivateAttr(default_factory=dict)
+    """Entries that are being written without holding the lock."""
+    _lock: Any = PrivateAttr(default_factory=threading.RLock)
+    _wake: Any = PrivateAttr(default=None)
+    _worker: Optional[threading.Thread] = PrivateAttr(default=None)
+    _stop: bool = PrivateAttr(default=False)
+    _error: Optional[BaseException] = PrivateAttr(default=None)
+    _journal: Optional[IO[str]] = PrivateAttr(default=None)
+    _path_journal: Optional[Path] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._wake = threading.Condition(self._lock)
+
+    @beartype
+    def pending_count(self) -> int:
+        """Return the number of cache files with a pending write."""
+        with self._lock:
+            return len(self._pending.keys() | self._in_flight.keys())
+
+    @beartype
+    def update(
+        self,
+        path_cache_file: Path,
+        *,
+        metadata: Optional[Dict],  # type: ignore[type-arg]
+        test_data: Any,
+        always_write: bool = False,
+    ) -> Any:
+        """Queue a write to the cache file and return the previously cached data. See `update_cache_data`.
+
+        Args:
+            path_cache_file: location of the cache file to write
+            metadata: optional dictionary for storing in the cache file
+            test_data: arbitrary test data to store
+            always_write: if True, overwrite the cached data
+
+        Returns:
+            Any: the cached data before writing or `test_data` if there was no cache file or pending write
+
+        """
+        return self.update_stored_data(
+            path_cache_file, metadata=metadata, test_data=test_data, always_write=always_write,
+        ).data
+
+    @beartype
+    def update_stored_data(  # noqa: PLR0913
+        self,
+        path_cache_file: Path,
+        *,
+        metadata: Optional[Dict],  # type: ignore[type-arg]
+        test_data: Any,
+        always_write: bool = False,
+        external: Optional[List[str]] = None,
+        before_write: Optional[Callable[[], None]] = None,
+    ) -> StoredData:
+        """Queue data with references and return the previously stored data. See `update_cache_file`.
+
+        `before_write` is called immediately when `test_data` replaces the pending or cached data, so that reads of the
+            pending data can resolve the references. Only updates that change the file are journaled
+
+        """
+        metadata = make_diffable(metadata or {}) or {}
+        external = external or []
+        with self._lock:
+            pending = (
+                self._pending.get(path_cache_file) or self._in_flight.get(path_cache_file)
+                or self._read_pending(path_cache_file)
+            )
+            if pending is None or always_write or metadata not in pending.meta:
+                self._append_journal(path_cache_file, metadata, test_data, always_write, external)
+            if pending is None:
+                previous = StoredData(data=test_data, external=external)
+                entry = _PendingWrite(
+                    meta=[metadata], test_data=test_data, always_write=always_write, external=external,
+                )
+            else:
+                previous = StoredData(data=pending.test_data, external=pending.external)
+                entry = _PendingWrite(
+                    meta=_merge_metadata(metadata, pending.meta),
+                    test_data=test_data if always_write else pending.test_data,
+                    always_write=pending.always_write or always_write,
+                    external=external if always_write else pending.external,
+                )
+            if before_write and (pending is None or always_write):
+                before_write()
+            self._pending[path_cache_file] = entry
+            if self.use_thread:
+                self._start_worker()
+                self._wake.notify()
+        return previous
+
+    @beartype
+    def has_pending(self, path_cache_file: Path) -> bool:
+        """Check if there is a pending write for the cache file."""
+        with self._lock:
+            return path_cache_file in self._pending or path_cache_file in self._in_flight
+
+    @beartype
+    def read(self, path_cache_file: Path) -> Any:
+        """Return the pending data for the cache file or read from disk.
+
+        Raises:
+            NoCacheError: if there is neither a pending write nor a cache file
+
+        """
+        return self.read_stored_data(path_cache_file).data
+
+    @beartype
+    def read_stored_data(self, path_cache_file: Path) -> StoredData:
+        """Return the pending data with the kinds of references or read from disk. See `read`."""
+        with self._lock:
+            pending = self._pending.get(path_cache_file) or self._in_flight.get(path_cache_file)
+            if pending is None:
+                return load_stored_data(path_cache_file)
+            return StoredData(data=pending.test_data, external=pending.external)
+
+    @beartype
+    def flush(self) -> int:
+        """Stop the background thread and write all pending files.
+
+        Returns:
+            int: number of cache files written
+
+        Raises:
+            BaseException: re-raises any exception from the background thread
+
+        """
+        worker = self._worker
+        if worker:
+            with self._lock:
+                self._stop = True
+                self._wake.notify()
+            worker.join()
+            self._worker, self._stop = None, False
+        error, self._error = self._error, None
+        count = self._drain()
+        if error:
+            raise error
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+            if self._path_journal:
+                self._path_journal.unlink(missing_ok=True)
+                self._path_journal = None
+        return count
+
+    @beartype
+    def recover(self) -> int:
+        """Replay journals left by interrupted sessions.
+
+        Journals of running sessions are locked and skipped. Each journal is only removed once all of its updates were
+            written, so that a failed replay is retried by the next session
+
+        Returns:
+            int: number of replayed updates
+
+        """
+        if not self.journal_dir:
+            return 0
+        count = 0
+        for path_journal in sorted(self.journal_dir.glob(_JOURNAL_GLOB)):
+            if path_journal == self._path_journal:
+                continue
+            try:
+                journal = path_journal.open('r')
+            except FileNotFoundError:  # Replayed and removed by a concurrent session (i.e. another xdist worker)
+                continue
+            with journal:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                if not os.fstat(journal.fileno()).st_nlink:  # Removed by the session that held the lock
+                    continue
+                records = []
+                for line in journal:
+                    try:
+                        records.append(loads(line))
+                    except JSONDecodeError:  # Partially written line from an interrupted session
+                        break
+                for record in records:
+                    update_cache_file(
+                        Path(record['path']), meta=[record['metadata']], test_data=record['test_data'],
+                        always_write=record['always_write'], external=record.get('external'),
+                    )
+                path_journal.unlink(missing_ok=True)
+                count += len(records)
+        return count
+
+    @staticmethod
+    def _read_pending(path_cache_file: Path) -> Optional[_PendingWrite]:
+        cached = _read_full_cache(path_cache_file)
+        if not cached:
+            return None
+        stored = _stored_data(cached)
+        return _PendingWrite(
+            meta=cached.document[KEY_NAME_META], test_data=stored.data, always_write=False, external=stored.external,
+        )
+
+    def _append_journal(  # noqa: PLR0913
+        self,
+        path_cache_file: Path,
+        metadata: Dict,  # type: ignore[type-arg]
+        test_data: Any,
+        always_write: bool,
+        external: List[str],
+    ) -> None:
+        """Write-ahead record of the update. Flushed to the OS, but not synced to disk for speed."""
+        if not self.journal_dir:
+            return
+        if not self._journal:
+            self.journal_dir.mkdir(exist_ok=True, parents=True)
+            self._path_journal = self.journal_dir / f'journal-{os.getpid()}-{uuid4().hex}.jsonl'
+            self._journal = self._path_journal.open('a')
+            if fcntl is not None:
+                fcntl.flock(self._journal.fileno(), fcntl.LOCK_EX)
+        record = {'path': str(path_cache_file), 'metadata': metadata, 'test_data': test_data}
+        self._journal.write(dumps({**record, 'always_write': always_write, 'external': external}) + '\n')
+        self._journal.flush()
+
+    def _drain(self) -> int:
+        """Write each pending file without holding the lock, so that updates and reads are not blocked by the I/O.
+
+        Each entry is moved to `_in_flight` while written. Updates during the write queue a new entry
+
+        """
+        with self._lock:
+            paths = [*self._pending]
+        count = 0
+        for path_cache_file in paths:
+            with self._lock:
+                entry = self._pending.pop(path_cache_file, None)
+                if entry is None:
+                    continue
+                self._in_flight[path_cache_file] = entry
+            written = False
+            try:
+                update_cache_file(
+                    path_cache_file, meta=entry.meta, test_data=entry.test_data, always_write=entry.always_write,
+                    external=entry.external,
+                )
+                written = True
+            finally:
+                with self._lock:
+                    del self._in_flight[path_cache_file]
+                    if not written:  # Retry on the next flush unless replaced by a newer update
+                        self._pending.setdefault(path_cache_file, entry)
+            count += 1
+        with self._lock:
+            if not (self._pending or self._in_flight) and self._journal:
+                self._journal.truncate(0)
+        return count
+
+    def _start_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='pytest_cache_assert-write-behind', daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not (self._pending or self._stop):
+                    self._wake.wait()
+                if self._stop:
+                    return
+            try:
+                self._drain()
+            except BaseException as exc:  # noqa: BLE001
+                self._error = exc
+                return
+
+
+WRITE_BEHIND = _WriteBehindQueue()
+"""Session-scoped queue of deferred cache file writes. Only used when configured."""
+
+atexit.register(WRITE_BEHIND.flush)  # Ensure that pending writes are not lost outside of pytest
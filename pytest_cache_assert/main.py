@@ -36,12 +36,13 @@ def assert_against_dict(
 
 
 @beartype
-def read_from_cache(*, path_cache_dir: Path, cache_name: str) -> Any:
+def read_from_cache(*, path_cache_dir: Path, cache_name: str, selector: Optional[str] = None) -> Any:
     """Read from cache without writing.
 
     Args:
         path_cache_dir: location of the cache directory
         cache_name: relative string path from the test_dir to the JSON cache file
+        selector: optional path to read only a subtree of the cached data (i.e. `root['items'][3]`)
 
     Returns:
         Dict: cached data
@@ -50,7 +51,9 @@ def read_from_cache(*, path_cache_dir: Path, cache_name: str) -> Any:
     config = retrieve(CacheAssertContainerKeys.CONFIG)
     cache_store = config.cache_store
     path_cache_file = path_cache_dir / cache_name
-    return cache_store.read_cached_data(path_cache_file)
+    if selector is None:  # Supports custom cache stores that do not accept a selector
+        return cache_store.read_cached_data(path_cache_file)
+    return cache_store.read_cached_data(path_cache_file, selector=selector)
 
 
 @beartype
@@ -81,11 +84,14 @@ def assert_against_cache(
     test_data = cache_store.serialize(test_data)
     # Function argument overrides global
     aw = config.always_write if always_write is None else always_write
-    try:
-        cached_data = read_from_cache(path_cache_dir=path_cache_dir, cache_name=cache_name)
-    except NoCacheError:
-        cached_data = test_data
-    cache_store.write(path_cache_file, metadata=metadata, test_data=test_data, always_write=aw)
+    if hasattr(cache_store, 'update'):
+        cached_data = cache_store.update(path_cache_file, metadata=metadata, test_data=test_data, always_write=aw)
+    else:  # Supports custom cache stores that do not implement the optional `update`
+        try:
+            cached_data = cache_store.read_cached_data(path_cache_file)
+        except NoCacheError:
+            cached_data = test_data
+        cache_store.write(path_cache_file, metadata=metadata, test_data=test_data, always_write=aw)
 
     validator = config.validator
     validator.assertion(
@@ -14,6 +14,7 @@ from beartype.typing import Any, Callable, Dict, Iterable, Optional, Tuple, Unio
 from pydantic import BaseModel, ConfigDict
 
 from . import AssertConfig, CacheAssertContainerKeys, main, register, retrieve
+from ._check_assert.write_behind import WRITE_BEHIND
 
 
 class TestMetadata(BaseModel):
@@ -47,6 +48,30 @@ class TestMetadata(BaseModel):
         return cls(test_file=rel_test_file.as_posix(), test_name=full_test_name, func_args=func_args)
 
 
+def _use_journal(config: pytest.Config) -> None:
+    """Store the write-behind journal in the pytest cache directory and replay any interrupted sessions.
+
+    Only when `write_behind` is set in the registered `AssertConfig`
+
+    """
+    cache = getattr(config, 'cache', None)  # Not available with `-p no:cacheprovider`
+    if cache and WRITE_BEHIND.journal_dir is None and retrieve(CacheAssertContainerKeys.CONFIG).write_behind:
+        WRITE_BEHIND.journal_dir = cache.mkdir('pytest_cache_assert')
+        WRITE_BEHIND.recover()
+
+
+@beartype
+def pytest_sessionstart(session: pytest.Session) -> None:
+    """Journal the write-behind updates when configured before the session starts (i.e. in `conftest.py`)."""
+    _use_journal(session.config)
+
+
+@beartype
+def pytest_sessionfinish(session: pytest.Session, exitstatus: Union[int, pytest.ExitCode]) -> None:  # noqa: ARG001
+    """Flush any deferred cache file writes in one batch."""
+    WRITE_BEHIND.flush()
+
+
 _RE_UNSAFE_CHAR = re.compile(r'[/\\]')
 """Used to remove characters from the cache file path that could cause issues."""
 
@@ -60,6 +85,7 @@ def _inner_plugin(
     if cache_assert_config:
         register(CacheAssertContainerKeys.CONFIG, cache_assert_config)
     assert_config = retrieve(CacheAssertContainerKeys.CONFIG)
+    _use_journal(request.config)
 
     test_dir = None
     for sub_dir in ['tests', 'test']:
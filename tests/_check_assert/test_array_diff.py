@@ -0,0 +1,99 @@
+"""Test array_diff.py."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pytest_cache_assert import AssertRule, DictDiffValidator, gen_check_array
+from pytest_cache_assert._check_assert.array_diff import array_diff
+from pytest_cache_assert._check_assert.differ import diff_with_rules
+from pytest_cache_assert._check_assert.serializer import make_diffable
+
+
+@pytest.mark.parametrize(
+    ('old', 'new', 'kwargs', 'expected'), [
+        ([1.0, 2.0], [1.0, 2.0], {}, {}),
+        ([[1, 2], [3, 4]], np.array([[1, 2], [3, 4]]), {}, {}),
+        ([1.0, 2.0], [1.0, 2.000001], {'rtol': 1e-5}, {}),
+        ([1.0, 2.0], [1.0, 2.001], {'atol': 0.01}, {}),
+        ([1.0, float('nan')], [1.0, float('nan')], {'equal_nan': True}, {}),
+        (['a', 'b'], ['a', 'b'], {}, {}),
+        ([1, 2], [1, 2, 3], {}, {'shape_changed': {'old_shape': [2], 'new_shape': [3]}}),
+        (
+            [1.0, 2.0, 4.0], [1.0, 2.5, 3.0], {},
+            {
+                'array_mismatch': {
+                    'mismatched': 2, 'size': 3, 'first_indices': [1, 2], 'max_abs_error': 1.0, 'max_rel_error': 0.25,
+                },
+            },
+        ),
+        (
+            [[0, 1], [2, 3]], [[1, 1], [2, 3]], {'max_indices': 1},
+            {
+                'array_mismatch': {
+                    'mismatched': 1, 'size': 4, 'first_indices': [[0, 0]], 'max_abs_error': 1.0,
+                    'max_rel_error': float('inf'),
+                },
+            },
+        ),
+        ([True, False], [True, True], {}, {'array_mismatch': {'mismatched': 1, 'size': 2, 'first_indices': [1]}}),
+        ([[1], [2, 3]], [[1], [2, 4]], {}, {'old_value': [[1], [2, 3]], 'new_value': [[1], [2, 4]]}),
+        ([[1], [2, 3]], [[1], [2, 3]], {}, {}),
+    ],
+)
+def test_array_diff(old, new, kwargs, expected):
+    """Check that arrays are compared within the tolerances and that mismatches are summarized."""
+    result = array_diff(old, new, **kwargs)
+
+    assert result == expected
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules_array(json_native):
+    """Check that the rule summarizes the array instead of reporting every element."""
+    old_dict = make_diffable({'weights': np.linspace(0, 1, 1_000), 'name': 'model'})
+    new_dict = make_diffable({'weights': np.linspace(0, 1, 1_000) + 1e-9, 'name': 'model'})
+
+    strict = [AssertRule.build_re(pattern=['weights'], func=gen_check_array())]
+    tolerant = [AssertRule.build_re(pattern=['weights'], func=gen_check_array(atol=1e-6))]
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=strict, json_native=json_native)
+    assert [*result.to_dict()] == [f'For {strict[0]}']
+    summary = result.to_dict()[f'For {strict[0]}']['array_mismatch']
+    assert summary['mismatched'] == 1_000
+    assert summary['first_indices'] == [*range(10)]
+    assert summary['max_abs_error'] == pytest.approx(1e-9)
+    assert diff_with_rules(
+        old_dict=old_dict, new_dict=new_dict, assert_rules=tolerant, json_native=json_native,
+    ).to_dict() == {}
+
+
+def test_validator_array():
+    """Check that the validator message includes the summary statistics."""
+    cached_data = {'values': [[1.0, 2.0], [3.0, 4.0]]}
+    test_data = {'values': [[1.0, 2.0], [3.0, 4.5]]}
+    assert_rules = [AssertRule.build_re(pattern=['values'], func=gen_check_array(rtol=0.01))]
+
+    with pytest.raises(AssertionError, match='max_rel_error'):
+        DictDiffValidator.assertion(
+            test_data=test_data, cached_data=cached_data, assert_rules=assert_rules,
+            path_cache_file=Path('sample.json'),
+        )
+
+
+_ARRAY_OLD = make_diffable({'array': np.linspace(0, 1, 100_000)})
+_ARRAY_NEW = make_diffable({'array': np.linspace(0, 1, 100_000) * (1 + 1e-12)})
+
+
+@pytest.mark.benchmark(group='array')
+@pytest.mark.parametrize('differ', ['vectorized', 'by_element'])
+def test_benchmark_array(differ, benchmark):
+    """Compare the vectorized rule against the element-wise diff for a large array with a small float wobble."""
+    if differ == 'vectorized':
+        assert_rules = [AssertRule.build_re(pattern=['array'], func=gen_check_array(rtol=1e-9))]
+        result = benchmark(diff_with_rules, old_dict=_ARRAY_OLD, new_dict=_ARRAY_NEW, assert_rules=assert_rules)
+        assert result.count() == 0
+    else:
+        result = benchmark(diff_with_rules, old_dict=_ARRAY_OLD, new_dict=_ARRAY_NEW, assert_rules=[], json_native=True)
+        assert result.count() > 90_000
@@ -0,0 +1,216 @@
+"""Test array_store.py."""
+
+import numpy as np
+import pytest
+
+from pytest_cache_assert import AssertConfig, CacheAssertContainerKeys, JSONDiffValidator, main, register
+from pytest_cache_assert._check_assert import array_store
+from pytest_cache_assert._check_assert.array_store import (
+    array_dir,
+    externalize_arrays,
+    prune_arrays,
+    resolve_arrays,
+    stage_arrays,
+)
+from pytest_cache_assert._check_assert.constants import KEY_NAME_ARRAY, KEY_NAME_DATA, KEY_NAME_EXTERNAL
+from pytest_cache_assert._check_assert.differ import is_identical
+from pytest_cache_assert._check_assert.json_diff import json_diff
+from pytest_cache_assert._check_assert.serializer import dumps, loads, make_diffable
+
+_LARGE = np.arange(1_000, dtype=np.float32).reshape(10, 100)
+
+
+@pytest.fixture()
+def array_assert(fix_tmp_assert):
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(array_min_size=100))
+    return fix_tmp_assert
+
+
+def _sidecars(path_cache_file):
+    return sorted(array_dir(path_cache_file).glob('*.npy'))
+
+
+@pytest.mark.parametrize(
+    ('cache_name', 'expected'), [
+        ('sample.json', 'sample.arrays'),
+        ('sample.json.gz', 'sample.arrays'),
+        ('nested/test_a.b.json', 'test_a.b.arrays'),
+    ],
+)
+def test_array_dir(fix_cache_path, cache_name, expected):
+    """Check that the sidecar directory is named after the cache file regardless of compression."""
+    result = array_dir(fix_cache_path / cache_name)
+
+    assert result == (fix_cache_path / cache_name).parent / expected
+
+
+def test_make_diffable_keeps_large_arrays():
+    """Check that only arrays with at least `array_min_size` elements are kept as arrays."""
+    result = make_diffable({'small': np.arange(3), 'large': _LARGE}, array_min_size=100)
+
+    assert result['small'] == [0, 1, 2]
+    assert result['large'] is _LARGE
+    assert make_diffable({'large': _LARGE})['large'] == _LARGE.tolist()
+
+
+def test_externalize_and_resolve(fix_cache_path):
+    """Check that arrays are restored with the dtype as read-only memory maps."""
+    path_cache_file = fix_cache_path / 'sample.json'
+    data = {'a': _LARGE, 'b': [_LARGE, {'c': 1}]}
+
+    result = externalize_arrays(data, path_cache_file)
+    resolved = resolve_arrays(loads(dumps(result)), path_cache_file)
+
+    digest = result['a'][KEY_NAME_ARRAY]['digest']
+    assert result['a'] == {KEY_NAME_ARRAY: {'digest': digest, 'dtype': '<f4', 'shape': [10, 100]}}
+    assert result['b'][0] == result['a']
+    assert len(_sidecars(path_cache_file)) == 1
+    assert resolved['a'].dtype == np.float32
+    assert isinstance(resolved['b'][0].base, np.memmap)
+    assert not resolved['a'].flags.writeable
+    assert is_identical(resolved, data)
+    assert externalize_arrays({'c': [1]}, path_cache_file) == {'c': [1]}
+
+
+def test_array_store(array_assert):
+    """Check that large arrays are written to sidecar files and compared against the memory-mapped arrays."""
+    path_cache_file = array_assert['path_cache_dir'] / array_assert['cache_name']
+    main.assert_against_cache({'large': _LARGE, 'small': np.arange(3)}, **array_assert)
+    main.assert_against_cache({'large': _LARGE.copy(), 'small': np.arange(3)}, **array_assert)
+
+    cached = loads(path_cache_file.read_text())[KEY_NAME_DATA]
+    assert cached['small'] == [0, 1, 2]
+    assert KEY_NAME_ARRAY in cached['large']
+    assert len(_sidecars(path_cache_file)) == 1
+    assert main.read_from_cache(**array_assert)['large'].dtype == np.float32
+    assert main.read_from_cache(**array_assert, selector="root['large']").shape == (10, 100)
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'large': _LARGE + 1, 'small': np.arange(3)}, **array_assert)
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'large': _LARGE.astype(np.float64), 'small': np.arange(3)}, **array_assert)
+
+
+@pytest.mark.parametrize('validator', [None, JSONDiffValidator()])
+def test_array_store_list_cache(validator, fix_tmp_assert):
+    """Check that data cached as lists before `array_min_size` was set is compared like without the option."""
+    main.assert_against_cache({'large': _LARGE, 'other': [1]}, **fix_tmp_assert)
+    extra = {'validator': validator} if validator else {}
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(array_min_size=100, **extra))
+
+    main.assert_against_cache({'large': _LARGE, 'other': [1]}, **fix_tmp_assert)
+    main.assert_against_dict({'a': list(range(100))}, {'a': np.arange(100)})
+    with pytest.raises(AssertionError, match=r"root\['large'\]\[3\]\[7\]"):
+        changed = _LARGE.copy()
+        changed[3, 7] = -1
+        main.assert_against_cache({'large': changed, 'other': [1]}, **fix_tmp_assert)
+
+
+def test_array_store_json_diff_validator(fix_tmp_assert):
+    """Check that the JSON-native differ summarizes each mismatched array."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(array_min_size=100, validator=JSONDiffValidator()))
+    main.assert_against_cache({'large': _LARGE}, **fix_tmp_assert)
+    main.assert_against_cache({'large': _LARGE.copy()}, **fix_tmp_assert)
+
+    changed = _LARGE.copy()
+    changed[3, 7] = -1
+    with pytest.raises(AssertionError, match='array_mismatch'):
+        main.assert_against_cache({'large': changed}, **fix_tmp_assert)
+
+
+@pytest.mark.parametrize(
+    ('new', 'expected'), [
+        (_LARGE.copy(), {}),
+        (_LARGE.astype(np.float64), {'dtype_changed': {'old_dtype': '<f4', 'new_dtype': '<f8'}}),
+        (_LARGE.ravel(), {'shape_changed': {'old_shape': [10, 100], 'new_shape': [1_000]}}),
+    ],
+)
+def test_json_diff_arrays(new, expected):
+    """Check that arrays are compared vectorized and reported once with a summary."""
+    result = json_diff({'a': _LARGE}, {'a': new})
+
+    assert result == ({'values_changed': {"root['a']": {'new_value': new, 'old_value': _LARGE, 'diff': expected}}}
+                      if expected else {})
+
+
+def test_prune_arrays(array_assert):
+    """Check that sidecar files that are no longer referenced are removed."""
+    path_cache_file = array_assert['path_cache_dir'] / array_assert['cache_name']
+    main.assert_against_cache({'large': _LARGE}, **array_assert)
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'large': _LARGE * 2}, **array_assert, always_write=True)
+
+    result = prune_arrays(array_assert['path_cache_dir'])
+
+    assert result == 1
+    assert len(_sidecars(path_cache_file)) == 1
+    assert is_identical(main.read_from_cache(**array_assert), {'large': _LARGE * 2})
+
+
+def test_stage_arrays(fix_cache_path):
+    """Check that staging computes the references without writing the sidecar files."""
+    path_cache_file = fix_cache_path / 'sample.json'
+
+    node, write_arrays = stage_arrays({'a': _LARGE, 'b': [_LARGE * 2]}, path_cache_file)
+
+    assert not _sidecars(path_cache_file)
+    write_arrays()
+    assert len(_sidecars(path_cache_file)) == 2
+    assert node == externalize_arrays({'a': _LARGE, 'b': [_LARGE * 2]}, path_cache_file)
+
+
+def test_array_store_failed_assertions(array_assert):
+    """Check that failed assertions without `always_write` do not write sidecar files that are never referenced."""
+    path_cache_file = array_assert['path_cache_dir'] / array_assert['cache_name']
+    main.assert_against_cache({'large': _LARGE}, **array_assert)
+    for idx in range(3):
+        with pytest.raises(AssertionError):
+            main.assert_against_cache({'large': _LARGE + idx + 1}, **array_assert)
+
+    assert len(_sidecars(path_cache_file)) == 1
+    assert prune_arrays(array_assert['path_cache_dir']) == 0
+
+
+@pytest.mark.parametrize(
+    'data', [
+        {KEY_NAME_ARRAY: {'digest': '0123456789abcdef0123456789abcdef', 'dtype': '<f4', 'shape': [2]}},
+        {'a': {KEY_NAME_ARRAY: {}}, 'b': {f'~{KEY_NAME_ARRAY}': 1}, 'c': [{f'~~{KEY_NAME_ARRAY}': {'d': 2}}]},
+    ],
+)
+@pytest.mark.parametrize(
+    'config', [
+        AssertConfig(),
+        AssertConfig(array_min_size=100),
+        AssertConfig(array_min_size=100, blob_store=True, blob_min_bytes=50),
+    ],
+)
+def test_user_data_with_array_key(data, config, fix_tmp_assert):
+    """Check that user data with the `_npy` key is never resolved as a reference."""
+    register(CacheAssertContainerKeys.CONFIG, config)
+    path_cache_file = fix_tmp_assert['path_cache_dir'] / fix_tmp_assert['cache_name']
+    array_dir(path_cache_file).mkdir(parents=True, exist_ok=True)
+    main.assert_against_cache(data, **fix_tmp_assert)
+    main.assert_against_cache(data, **fix_tmp_assert)
+
+    document = loads(path_cache_file.read_text())
+    assert (KEY_NAME_ARRAY in document.get(KEY_NAME_EXTERNAL, [])) is bool(config.array_min_size)
+    assert main.read_from_cache(**fix_tmp_assert) == data
+    key = [*data][0]
+    assert main.read_from_cache(**fix_tmp_assert, selector=f'root[{key!r}]') == data[key]
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({**data, 'large': _LARGE}, **fix_tmp_assert)
+
+
+_ARRAY = np.linspace(0, 1, 1_000_000)
+
+
+@pytest.mark.benchmark(group='array_store')
+@pytest.mark.parametrize('array_min_size', [0, 100])
+def test_benchmark_array_store(array_min_size, fix_tmp_assert, benchmark):
+    """Compare caching a large array as a `.npy` sidecar file against inline JSON lists."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(array_min_size=array_min_size))
+    main.assert_against_cache({'array': _ARRAY}, **fix_tmp_assert)
+
+    benchmark(main.assert_against_cache, {'array': _ARRAY}, **fix_tmp_assert)
+
+    assert bool(_sidecars(fix_tmp_assert['path_cache_dir'] / fix_tmp_assert['cache_name'])) is bool(array_min_size)
+    assert array_store.ARRAYS.min_size == array_min_size
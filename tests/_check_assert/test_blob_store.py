@@ -0,0 +1,113 @@
+"""Test blob_store.py."""
+
+import pytest
+
+from pytest_cache_assert import AssertConfig, CacheAssertContainerKeys, main, register
+from pytest_cache_assert._check_assert import blob_store
+from pytest_cache_assert._check_assert.blob_store import BLOB_DIR_NAME, externalize, prune_blobs, resolve, stage_blobs
+from pytest_cache_assert._check_assert.constants import KEY_NAME_BLOB, KEY_NAME_DATA, KEY_NAME_EXTERNAL
+from pytest_cache_assert._check_assert.serializer import loads
+
+_SHARED = {'rows': [{'index': idx, 'name': f'row-{idx}'} for idx in range(50)]}
+
+
+@pytest.fixture()
+def blob_assert(fix_tmp_assert):
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(blob_store=True, blob_min_bytes=500))
+    return fix_tmp_assert
+
+
+def _blobs(path_cache_dir):
+    return sorted((path_cache_dir / BLOB_DIR_NAME).glob('*/*.json'))
+
+
+def test_externalize_and_resolve(fix_cache_path, monkeypatch):
+    """Check that large subtrees are deduplicated and restored."""
+    monkeypatch.setattr(blob_store.BLOBS, 'min_bytes', 500)
+    (fix_cache_path / BLOB_DIR_NAME).mkdir()
+    path_cache_file = fix_cache_path / 'nested/sample.json'
+    data = {'a': _SHARED, 'b': [_SHARED, {'small': 1.5}], 'c': None}
+
+    result = externalize(data, path_cache_file)
+
+    assert blob_store.is_reference(result)
+    assert len(_blobs(fix_cache_path)) == 2  # One for the top-level and one for the shared subtree
+    assert resolve(result, path_cache_file) == data
+    assert externalize(data, path_cache_file) == result
+
+
+def test_blob_store(blob_assert):
+    """Check that identical data across cache files is stored once and compared against the cache."""
+    path_cache_dir = blob_assert['path_cache_dir']
+    main.assert_against_cache({'first': _SHARED}, path_cache_dir=path_cache_dir, cache_name='one.json')
+    main.assert_against_cache({'first': _SHARED}, path_cache_dir=path_cache_dir, cache_name='two.json')
+    main.assert_against_cache({'first': _SHARED}, path_cache_dir=path_cache_dir, cache_name='two.json')
+
+    assert len(_blobs(path_cache_dir)) == 2
+    assert loads((path_cache_dir / 'one.json').read_text())[KEY_NAME_DATA] == loads(
+        (path_cache_dir / 'two.json').read_text(),
+    )[KEY_NAME_DATA]
+    assert main.read_from_cache(path_cache_dir=path_cache_dir, cache_name='one.json') == {'first': _SHARED}
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'first': {**_SHARED, 'x': 1}}, path_cache_dir=path_cache_dir, cache_name='one.json')
+
+
+def test_prune_blobs(blob_assert):
+    """Check that blobs that are no longer referenced are removed."""
+    path_cache_dir = blob_assert['path_cache_dir']
+    kwargs = {'path_cache_dir': path_cache_dir, 'cache_name': 'sample.json'}
+    main.assert_against_cache({'value': _SHARED}, **kwargs)
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'value': [_SHARED]}, **kwargs, always_write=True)
+
+    result = prune_blobs(path_cache_dir)
+
+    assert result == 1
+    assert len(_blobs(path_cache_dir)) == 2
+    assert main.read_from_cache(**kwargs) == {'value': [_SHARED]}
+
+
+def test_stage_blobs(fix_cache_path, monkeypatch):
+    """Check that staging computes the references without writing the blobs."""
+    monkeypatch.setattr(blob_store.BLOBS, 'min_bytes', 500)
+    path_cache_file = fix_cache_path / 'sample.json'
+
+    node, write_blobs = stage_blobs({'value': _SHARED}, path_cache_file)
+
+    assert not _blobs(fix_cache_path)
+    write_blobs()
+    assert len(_blobs(fix_cache_path)) == 2
+    assert node == externalize({'value': _SHARED}, path_cache_file)
+
+
+def test_blob_store_failed_assertions(blob_assert):
+    """Check that failed assertions without `always_write` do not write blobs that are never referenced."""
+    main.assert_against_cache({'value': _SHARED}, **blob_assert)
+    for idx in range(3):
+        with pytest.raises(AssertionError):
+            main.assert_against_cache({'value': _SHARED, 'other': [idx] * 200}, **blob_assert)
+
+    assert len(_blobs(blob_assert['path_cache_dir'])) == 2
+    assert prune_blobs(blob_assert['path_cache_dir']) == 0
+
+
+@pytest.mark.parametrize(
+    'data', [
+        {KEY_NAME_BLOB: '0123456789abcdef0123456789abcdef'},
+        {'a': {KEY_NAME_BLOB: 'abc'}, 'b': {f'~{KEY_NAME_BLOB}': 1}, 'c': {f'~~{KEY_NAME_BLOB}': [2]}},
+        {'rows': _SHARED['rows'], 'nested': [{KEY_NAME_BLOB: 'abc', 'other': 1}]},
+    ],
+)
+@pytest.mark.parametrize('blob_store', [False, True])
+def test_user_data_with_blob_key(data, blob_store, fix_tmp_assert):
+    """Check that user data with the `_blob` key is never resolved as a reference."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(blob_store=blob_store, blob_min_bytes=500))
+    (fix_tmp_assert['path_cache_dir'] / BLOB_DIR_NAME).mkdir(parents=True, exist_ok=True)
+    main.assert_against_cache(data, **fix_tmp_assert)
+    main.assert_against_cache(data, **fix_tmp_assert)
+
+    document = loads((fix_tmp_assert['path_cache_dir'] / fix_tmp_assert['cache_name']).read_text())
+    assert (KEY_NAME_EXTERNAL in document) is blob_store
+    assert main.read_from_cache(**fix_tmp_assert) == data
+    key = [*data][0]
+    assert main.read_from_cache(**fix_tmp_assert, selector=f'root[{key!r}]') == data[key]
@@ -1,11 +1,20 @@
 """Test caching.py."""
 
+import os
 from pathlib import Path
 
 import pytest
 
-from pytest_cache_assert import main
-from pytest_cache_assert._check_assert.caching import _merge_metadata, init_cache, load_cached_data, write_cache_data
+from pytest_cache_assert import AssertConfig, CacheAssertContainerKeys, LocalJSONCacheStore, main, register
+from pytest_cache_assert._check_assert import caching
+from pytest_cache_assert._check_assert.caching import (
+    _merge_metadata,
+    _ParsedCache,
+    init_cache,
+    load_cached_data,
+    update_cache_data,
+    write_cache_data,
+)
 from pytest_cache_assert._check_assert.constants import CACHE_README_TEXT, DEF_CACHE_DIR_NAME
 
 
@@ -34,6 +43,84 @@ def test_caching(test_data, fix_cache_path):
     assert result == test_data
 
 
+def test_write_cache_data_skips_unchanged(fix_cache_path):
+    """Test that the cache file is only rewritten when the content changes."""
+    path_cache_file = fix_cache_path / 'sample.json'
+    write_cache_data(path_cache_file, metadata={'index': 1}, test_data={'a': 1})
+    os.utime(path_cache_file, ns=(0, 0))
+
+    write_cache_data(path_cache_file, metadata={'index': 1}, test_data={'a': 1})  # act
+
+    assert path_cache_file.stat().st_mtime_ns == 0
+    write_cache_data(path_cache_file, metadata={'index': 2}, test_data={'a': 1})
+    assert path_cache_file.stat().st_mtime_ns != 0
+
+
+def test_update_cache_data(fix_cache_path, monkeypatch):
+    """Test that the previously cached data is returned from a single read of the cache file."""
+    path_cache_file = fix_cache_path / 'sample.json'
+    assert update_cache_data(path_cache_file, metadata={}, test_data={'a': 1}) == {'a': 1}
+    cached_text = path_cache_file.read_text()
+    parsed = []
+    original_loads = caching.loads
+    monkeypatch.setattr(caching, 'loads', lambda raw: parsed.append(raw) or original_loads(raw))
+
+    result = update_cache_data(path_cache_file, metadata={}, test_data={'a': 2}, always_write=True)
+
+    assert result == {'a': 1}
+    assert parsed.count(cached_text) == 1
+    assert load_cached_data(path_cache_file) == {'a': 2}
+
+
+def test_parsed_cache(fix_cache_path):
+    """Test that parsed cache files are reused until the file changes or exceeds the budget."""
+    parsed_cache = _ParsedCache(max_bytes=1_000)
+    path_a, path_b = fix_cache_path / 'a.json', fix_cache_path / 'b.json'
+    write_cache_data(path_a, metadata={}, test_data={'a': 1})
+    write_cache_data(path_b, metadata={}, test_data={'b': 'x' * 900})
+
+    first = parsed_cache.read(path_a)
+    assert parsed_cache.read(path_a) is first
+    os.utime(path_a, ns=(0, 0))
+    assert parsed_cache.read(path_a) is not first
+    parsed_cache.read(path_b)  # act
+
+    info = parsed_cache.info()
+    assert (info.hits, info.misses, info.entries) == (1, 3, 1)
+    assert info.size_bytes == path_b.stat().st_size
+
+
+def test_parsed_cache_from_config(fix_cache_path):
+    """Test that the LRU is configured from AssertConfig and shared by reads and writes."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(parsed_cache_max_bytes=10_000))
+    kwargs = {'path_cache_dir': fix_cache_path, 'cache_name': 'sample.json'}
+    main.assert_against_cache({'a': 1}, **kwargs)
+    hits = LocalJSONCacheStore.parsed_cache_info().hits
+
+    for _idx in range(3):
+        main.assert_against_cache({'a': 1}, **kwargs)
+        assert main.read_from_cache(**kwargs) == {'a': 1}
+
+    info = LocalJSONCacheStore.parsed_cache_info()
+    assert info.hits - hits == 5
+    assert info.max_bytes == 10_000
+
+
+def test_parsed_cache_copies_data(fix_cache_path):
+    """Test that changes to the returned data do not change the shared documents in the LRU."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(parsed_cache_max_bytes=10_000))
+    kwargs = {'path_cache_dir': fix_cache_path, 'cache_name': 'sample.json'}
+    main.assert_against_cache({'a': [1]}, **kwargs)
+
+    main.read_from_cache(**kwargs)['a'].append(2)
+    load_cached_data(fix_cache_path / 'sample.json')['b'] = 3
+    update_cache_data(fix_cache_path / 'sample.json', metadata={}, test_data={})['a'].append(4)
+
+    assert main.read_from_cache(**kwargs) == {'a': [1]}
+    main.assert_against_cache({'a': [1]}, **kwargs)
+    assert LocalJSONCacheStore.parsed_cache_info().hits >= 4
+
+
 @pytest.mark.parametrize(
     ('new_metadata', 'metadata_list'), [
         ({'new': 1}, [{'new': 1}, {'new': 2}]),  # Check Duplicate Removal
@@ -55,3 +142,121 @@ def test_merge_metadata(new_metadata, metadata_list):
 def test_repeated_caching(index, assert_against_cache):
     """Test that repeated caching to the same file works as expected."""
     assert_against_cache({'index': 2}, metadata={'index': index}, cache_name='caching/repeated_caching.json')  # act
+
+
+def _write_worker(path_cache_file: Path, idx: int) -> None:
+    update_cache_data(path_cache_file, metadata={'worker': idx}, test_data={'value': 1})
+
+
+@pytest.mark.skipif(caching.fcntl is None, reason='File locking requires fcntl')
+def test_update_cache_data_concurrent_workers(fix_cache_path):
+    """Check that metadata from concurrent processes is merged without lost updates."""
+    import multiprocessing  # noqa: PLC0415
+
+    path_cache_file = fix_cache_path / 'concurrent.json'
+    ctx = multiprocessing.get_context('fork')
+    processes = [ctx.Process(target=_write_worker, args=(path_cache_file, idx)) for idx in range(6)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+
+    assert [process.exitcode for process in processes] == [0] * len(processes)
+    meta = caching.loads(path_cache_file.read_text())['_info']
+    assert sorted(_m['worker'] for _m in meta) == list(range(len(processes)))
+    assert [*fix_cache_path.glob('.*.tmp')] == []
+
+
+def test_atomic_write_cleans_up_on_error(fix_cache_path, monkeypatch):
+    """Check that the original file is kept and the temporary file is removed when the replace fails."""
+    path_cache_file = fix_cache_path / 'atomic.json'
+    path_cache_file.write_text('original')
+
+    def _fail(*_args):
+        raise OSError('replace failed')
+
+    monkeypatch.setattr(caching.os, 'replace', _fail)
+    with pytest.raises(OSError, match='replace failed'):
+        caching._atomic_write_text(path_cache_file, 'new')
+
+    assert path_cache_file.read_text() == 'original'
+    assert [*fix_cache_path.iterdir()] == [path_cache_file]
+
+
+def test_cache_file_lock(fix_cache_path):
+    """Check that the lock file is kept next to the cache file and shared by the compressed files."""
+    path_cache_file = fix_cache_path / 'nested' / 'sample.json'
+
+    write_cache_data(path_cache_file, metadata={}, test_data={'a': 1})
+
+    assert sorted(_p.name for _p in path_cache_file.parent.iterdir()) == (
+        ['.sample.json.lock', 'sample.json'] if caching.fcntl else ['sample.json']
+    )
+
+
+_CODECS = [name for name in caching.CODECS if name != 'zstd' or caching.zstandard]
+
+
+@pytest.fixture()
+def restore_compression():
+    settings = caching.COMPRESSION.model_copy()
+    yield
+    caching.COMPRESSION.codec, caching.COMPRESSION.min_bytes = settings.codec, settings.min_bytes
+
+
+def _cache_files(path_cache_dir):
+    return sorted(_p for _p in path_cache_dir.iterdir() if not _p.name.endswith('.lock'))
+
+
+@pytest.mark.parametrize('codec', _CODECS)
+@pytest.mark.usefixtures('restore_compression')
+def test_compressed_cache_file(codec, fix_cache_path):
+    """Check that large cache files are compressed and that only one representation is kept."""
+    caching.COMPRESSION.codec, caching.COMPRESSION.min_bytes = codec, 200
+    path_cache_file = fix_cache_path / 'compressed.json'
+    path_compressed = path_cache_file.with_name(f'compressed.json{caching.CODECS[codec].suffix}')
+
+    write_cache_data(path_cache_file, metadata={}, test_data={'a': 1})
+    assert _cache_files(fix_cache_path) == [path_cache_file]
+    update_cache_data(path_cache_file, metadata={}, test_data={'a': 'x' * 200}, always_write=True)
+    assert _cache_files(fix_cache_path) == [path_compressed]
+    compressed = path_compressed.read_bytes()
+    write_cache_data(path_cache_file, metadata={}, test_data={'a': 'x' * 200})
+
+    assert path_compressed.read_bytes() == compressed  # Reproducible and skipped when unchanged
+    assert compressed.startswith(caching.CODECS[codec].magic)
+    caching.COMPRESSION.min_bytes = 0
+    assert load_cached_data(path_cache_file) == {'a': 'x' * 200}  # Detected regardless of the settings
+    write_cache_data(path_cache_file, metadata={'b': 2}, test_data={})
+    assert _cache_files(fix_cache_path) == [path_cache_file]
+
+
+@pytest.mark.usefixtures('restore_compression')
+def test_compression_from_config(fix_cache_path):
+    """Check that compression is configured from AssertConfig."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(compress_min_bytes=1, compression='lzma'))
+    kwargs = {'path_cache_dir': fix_cache_path, 'cache_name': 'sample.json'}
+
+    main.assert_against_cache({'a': 1}, **kwargs)
+
+    assert (fix_cache_path / 'sample.json.xz').is_file()
+    assert main.read_from_cache(**kwargs) == {'a': 1}
+
+
+_LARGE_PAYLOAD = {
+    'rows': [{'index': idx, 'name': f'row-{idx}', 'value': idx / 7, 'tags': ['a', 'b', 'c']} for idx in range(20_000)],
+}
+
+
+@pytest.mark.benchmark(group='compression')
+@pytest.mark.parametrize('codec', [None, *_CODECS])
+@pytest.mark.usefixtures('restore_compression')
+def test_benchmark_compressed_read_and_compare(codec, fix_cache_path, benchmark):
+    """Compare reading and comparing a large cache file that is raw or compressed."""
+    caching.COMPRESSION.codec, caching.COMPRESSION.min_bytes = codec or 'gzip', 1 if codec else 0
+    path_cache_file = fix_cache_path / 'large.json'
+    update_cache_data(path_cache_file, metadata={}, test_data=_LARGE_PAYLOAD)
+
+    result = benchmark(update_cache_data, path_cache_file, metadata={}, test_data=_LARGE_PAYLOAD)
+
+    assert result == _LARGE_PAYLOAD
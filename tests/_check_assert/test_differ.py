@@ -4,10 +4,19 @@ import re
 from datetime import datetime, timedelta
 
 import pytest
+from deepdiff import DeepSearch, extract
 
-from pytest_cache_assert import AssertRule, check_exact, check_suppress
+from pytest_cache_assert import AssertRule, Wild, check_exact, check_suppress
 from pytest_cache_assert._check_assert.assert_rules import Comparator, gen_check_date_proximity, gen_check_date_range
-from pytest_cache_assert._check_assert.differ import DiffResults, _raw_diff, diff_with_rules
+from pytest_cache_assert._check_assert.constants import NotFound
+from pytest_cache_assert._check_assert.differ import (
+    DiffResults,
+    _match_rules,
+    _raw_diff,
+    _raw_json_diff,
+    diff_with_rules,
+)
+from pytest_cache_assert._check_assert.path_matcher import format_path
 
 
 @pytest.mark.parametrize(
@@ -206,9 +215,10 @@ from pytest_cache_assert._check_assert.differ import DiffResults, _raw_diff, dif
         ),
     ],
 )
-def test_raw_diff(old_dict, new_dict, expected, help_text):
-    """Test the low level diff logic."""
-    result = _raw_diff(old_dict=old_dict, new_dict=new_dict)
+@pytest.mark.parametrize('raw_diff', [_raw_diff, _raw_json_diff])
+def test_raw_diff(old_dict, new_dict, expected, help_text, raw_diff):
+    """Test the low level diff logic of DeepDiff and the JSON-native differ."""
+    result = raw_diff(old_dict=old_dict, new_dict=new_dict)
 
     try:
         assert result == expected
@@ -279,13 +289,192 @@ _NOW = datetime.utcnow()  # noqa: DTZ003
         ),
     ],
 )
-def test_diff_with_rules(old_dict, new_dict, assert_rules, help_text):
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules(old_dict, new_dict, assert_rules, help_text, json_native):
     """Test that the assert rules work in various scenarios."""
-    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=assert_rules)
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=assert_rules, json_native=json_native)
     assert result.to_dict() == {}
 
     try:
-        errors = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=[])
+        errors = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=[], json_native=json_native)
     except Exception as exc:
         raise AssertionError(f'Failed {help_text}') from exc
     assert errors.to_dict() != {}
+
+
+def _search_and_extract(old_dict, new_dict, assert_rule):
+    """Reference implementation with one DeepSearch per tree and `extract` for each matched path.
+
+    `NotFound` is replaced by its type for comparison and missing list items are also handled
+
+    """
+    paths = set()
+    for data_set in [old_dict, new_dict]:
+        search = DeepSearch(data_set, assert_rule.pattern, use_regexp=assert_rule.is_regex())
+        paths.update(search.get('matched_paths', {}))
+    matches = {}
+    for pth in paths:
+        values = []
+        for data_set in [old_dict, new_dict]:
+            try:
+                values.append(extract(data_set, pth))
+            except (IndexError, KeyError):
+                values.append(NotFound)
+        matches[pth] = tuple(values)
+    return matches
+
+
+_RULE_OLD = {
+    'Title': 'a', 'nested': {'title': 'b', 'items': [{'id': 1, 'title': 'c'}, {'id': 2}]}, 'removed': {'id': 3},
+    '10': 50,
+}
+_RULE_NEW = {
+    'Title': 'A', 'nested': {'title': 'B', 'items': [{'id': 1}, {'id': 2}, {'id': 4, 'title': 'd'}]}, 'added': 1,
+    '10': 51,
+}
+
+
+@pytest.mark.parametrize(
+    'pattern', [
+        'title',
+        "root['nested']",
+        "['id']",
+        '10',
+        'missing',
+        re.compile(r"\['title'\]$"),
+        re.compile(r"root\['nested'\]\['items'\]\[\d+\]\['id'\]"),
+        re.compile(r'^root\[.(?:added|removed).\]'),
+        re.compile('TITLE'),
+    ],
+)
+def test_match_rules_matches_deep_search(pattern):
+    """Check that the single traversal finds the same paths and values as DeepSearch with extract."""
+    assert_rule = AssertRule(pattern=pattern, func=check_suppress)
+    expected = _search_and_extract(_RULE_OLD, _RULE_NEW, assert_rule)
+
+    [matches] = _match_rules(_RULE_OLD, _RULE_NEW, [assert_rule])
+
+    assert len(matches) == len(expected)
+    assert {
+        format_path(path): tuple(NotFound if isinstance(_v, NotFound) else _v for _v in (old, new))
+        for path, old, new in matches
+    } == expected
+
+
+def test_diff_with_rules_reports_rule_failures():
+    """Check that values that fail a rule are reported, including values that are only in one tree."""
+    assert_rules = [AssertRule(pattern="['id']", func=check_exact)]
+
+    result = diff_with_rules(old_dict=_RULE_OLD, new_dict=_RULE_NEW, assert_rules=assert_rules)
+
+    failure = result.to_dict()[f'For {assert_rules[0]}']
+    assert failure['old_value'] == 3
+    assert isinstance(failure['new_value'], NotFound)
+
+
+_WIDE = {
+    f'record_{idx}': {'id': idx, 'title': f'title {idx}', 'tags': ['a', 'b'], 'when': '2022'} for idx in range(500)
+}
+
+
+@pytest.mark.benchmark(group='diff_with_rules')
+@pytest.mark.parametrize('matcher', ['single_traversal', 'deep_search'])
+def test_benchmark_rule_matching(matcher, benchmark):
+    """Compare matching many rules in one traversal against one DeepSearch and `extract` per rule."""
+    assert_rules = [
+        *(AssertRule(pattern=f"['record_{idx}']['when']", func=check_suppress) for idx in range(10)),
+        *(
+            AssertRule(pattern=re.compile(rf"\['record_\d+{idx}'\]\['title'\]"), func=check_suppress)
+            for idx in range(10)
+        ),
+    ]
+    new_wide = {**_WIDE, 'record_0': {**_WIDE['record_0'], 'when': '2023'}}
+    if matcher == 'single_traversal':
+        result = benchmark(_match_rules, _WIDE, new_wide, assert_rules)
+    else:
+        result = benchmark(lambda: [_search_and_extract(_WIDE, new_wide, _ar) for _ar in assert_rules])
+
+    assert sum(map(len, result)) == 500
+
+
+@pytest.mark.benchmark(group='diff_with_rules_segments')
+@pytest.mark.parametrize('matcher', ['segments', 'deep_search'])
+def test_benchmark_segment_rule_matching(matcher, benchmark):
+    """Compare rules from `build_re` that prune unmatched subtrees against one DeepSearch and `extract` per rule."""
+    assert_rules = [
+        AssertRule.build_re(pattern=[f'record_{idx}', Wild.keys()], func=check_suppress) for idx in range(20)
+    ]
+    if matcher == 'segments':
+        result = benchmark(_match_rules, _WIDE, _WIDE, assert_rules)
+    else:
+        result = benchmark(lambda: [_search_and_extract(_WIDE, _WIDE, _ar) for _ar in assert_rules])
+
+    assert sum(map(len, result)) == 20 * 4
+
+
+_REORDERED_OLD = {'items': [{'id': idx, 'name': f'item {idx}'} for idx in range(1_000)]}
+_REORDERED_NEW = {'items': _REORDERED_OLD['items'][::-1]}
+
+
+@pytest.mark.parametrize(
+    ('json_native', 'assert_rules', 'is_lower_bound'), [
+        (False, [], False),
+        (False, [AssertRule(pattern='missing', func=check_exact)], True),
+        (True, [], True),
+    ],
+)
+def test_diff_with_rules_max_diffs(json_native, assert_rules, is_lower_bound):
+    """Check that only the first differences are kept with the total or a lower bound."""
+    full = diff_with_rules(old_dict=_REORDERED_OLD, new_dict=_REORDERED_NEW, assert_rules=[])
+
+    result = diff_with_rules(
+        old_dict=_REORDERED_OLD, new_dict=_REORDERED_NEW, assert_rules=assert_rules, json_native=json_native,
+        max_diffs=10,
+    )
+
+    assert result.count() == 10
+    assert result.total_is_lower_bound is is_lower_bound
+    if is_lower_bound:
+        assert 10 < result.total <= full.count()
+    else:
+        assert result.total == full.count() == 2_000
+    changes = result.to_dict()['values_changed']
+    assert all(changes[_p] == _v for _p, _v in full.to_dict()['values_changed'].items() if _p in changes)
+
+
+def test_diff_with_rules_max_diffs_includes_rules():
+    """Check that the rule failures count towards the cap when the raw diff is below it."""
+    assert_rules = [
+        AssertRule(pattern="root['a']", func=check_exact),
+        AssertRule(pattern="root['b']", func=check_exact),
+    ]
+
+    result = diff_with_rules(
+        old_dict={'a': 1, 'b': 1, 'c': 1}, new_dict={'a': 2, 'b': 2, 'c': 2}, assert_rules=assert_rules, max_diffs=2,
+    )
+
+    assert result.to_dict() == {
+        'values_changed': {"root['c']": {'new_value': 2, 'old_value': 1}},
+        f'For {assert_rules[0]}': {'old_value': 1, 'new_value': 2},
+    }
+    assert (result.total, result.total_is_lower_bound) == (3, False)
+
+
+def test_diff_with_rules_below_max_diffs():
+    """Check that the results are not truncated below the cap."""
+    result = diff_with_rules(old_dict={'a': 1}, new_dict={'a': 2}, assert_rules=[], json_native=True, max_diffs=1)
+
+    assert result.total is None
+    assert result.count() == 1
+
+
+@pytest.mark.benchmark(group='max_diffs')
+@pytest.mark.parametrize('max_diffs', [0, 100])
+def test_benchmark_max_diffs(max_diffs, benchmark):
+    """Compare collecting every difference of a reordered list against stopping at the cap."""
+    result = benchmark(
+        diff_with_rules, old_dict=_REORDERED_OLD, new_dict=_REORDERED_NEW, assert_rules=[], json_native=True,
+        max_diffs=max_diffs,
+    )
+
+    assert result.count() == (max_diffs or 2_000)
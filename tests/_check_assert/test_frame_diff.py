@@ -0,0 +1,242 @@
+"""Test frame_diff.py."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytest_cache_assert import AssertConfig, AssertRule, CacheAssertContainerKeys, gen_check_frame, main, register
+from pytest_cache_assert._check_assert.constants import KEY_NAME_ARRAY, KEY_NAME_DATA, KEY_NAME_FRAME
+from pytest_cache_assert._check_assert.differ import diff_with_rules, is_identical
+from pytest_cache_assert._check_assert.frame_diff import frame_diff
+from pytest_cache_assert._check_assert.serializer import dumps, loads, make_diffable
+from pytest_cache_assert._check_assert.validator import DictDiffValidator
+
+_FRAME = pd.DataFrame(
+    {'price': [1.0, 2.5, np.nan], 'count': [1, 2, 3], 'name': ['a', 'b', None]}, index=['x', 'y', 'z'],
+)
+
+
+def _cached(df):
+    return loads(dumps(df))
+
+
+def test_serialize_pandas():
+    """Check that the frame is cached by column with the dtypes."""
+    result = make_diffable(pd.DataFrame({'t': pd.to_datetime(['2020-01-02']), ('a', 1): [True]}))
+
+    assert result == {
+        KEY_NAME_FRAME: {
+            'columns': ['t', ['a', 1]],
+            'dtypes': ['datetime64[ns]', 'bool'],
+            'index': [0],
+            'index_dtype': 'int64',
+            'data': [['2020-01-02T00:00:00.000000000'], [True]],
+        },
+    }
+
+
+def _changed(**kwargs):
+    df = _FRAME.copy()
+    for (row, column), value in kwargs.pop('cells', {}).items():
+        df.loc[row, column] = value
+    return df
+
+
+@pytest.mark.parametrize(
+    ('new', 'kwargs', 'expected'), [
+        (_FRAME.copy(), {}, {}),
+        (_changed(cells={('y', 'price'): 2.5001}), {'atol': 0.001}, {}),
+        (_changed(cells={('y', 'price'): 2.5001}), {'tolerances': {'price': {'rtol': 0.001}}}, {}),
+        (
+            _changed(cells={('y', 'price'): 3.0, ('z', 'name'): 'c'}), {'tolerances': {'count': {'atol': 1.0}}},
+            {
+                'cells_changed': {
+                    'mismatched': 2, 'size': 9, 'columns': {'price': 1, 'name': 1},
+                    'first_cells': [
+                        {'row': 'y', 'column': 'price', 'old_value': 2.5, 'new_value': 3.0},
+                        {'row': 'z', 'column': 'name', 'old_value': None, 'new_value': 'c'},
+                    ],
+                },
+            },
+        ),
+        (
+            _FRAME.astype({'count': float}), {},
+            {'dtypes_changed': {'count': {'old_dtype': 'int64', 'new_dtype': 'float64'}}},
+        ),
+        (
+            _FRAME.rename(columns={'name': 'label'}), {},
+            {
+                'columns_changed': {
+                    'old_columns': ['price', 'count', 'name'], 'new_columns': ['price', 'count', 'label'],
+                },
+            },
+        ),
+        (_FRAME.iloc[:2], {}, {'shape_changed': {'old_shape': [3, 3], 'new_shape': [2, 3]}}),
+        (
+            _FRAME.set_axis(['x', 'y', 'w']), {'max_cells': 1},
+            {'index_changed': {'mismatched': 1, 'first_positions': [2]}},
+        ),
+        (
+            _FRAME.reset_index(drop=True), {},
+            {
+                'index_changed': {
+                    'old_dtype': 'object', 'new_dtype': 'int64', 'mismatched': 3, 'first_positions': [0, 1, 2],
+                },
+            },
+        ),
+    ],
+)
+def test_frame_diff(new, kwargs, expected):
+    """Check that frames are compared by column and that changed cells are reported by row label and column."""
+    result = frame_diff(_cached(_FRAME), make_diffable(new), **kwargs)
+
+    assert result == expected
+
+
+def test_frame_diff_nan():
+    """Check that missing values are only equal with `equal_nan`."""
+    result = frame_diff(_cached(_FRAME), make_diffable(_FRAME), equal_nan=False)
+
+    assert result['cells_changed']['columns'] == {'price': 1}
+    assert frame_diff(_cached(_FRAME), make_diffable(_FRAME)) == {}
+    assert is_identical(_cached({'df': _FRAME}), make_diffable({'df': _FRAME}))
+    assert frame_diff([1], [1]) == {}
+    assert frame_diff({'a': 1}, [1]) == {'old_value': {'a': 1}, 'new_value': [1]}
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules_frame(json_native):
+    """Check that both differs report one summary per changed frame instead of each cell."""
+    old_dict = _cached({'df': _FRAME, 'other': 1})
+    new_dict = make_diffable({'df': _changed(cells={('x', 'count'): 5}), 'other': 2})
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=[], json_native=json_native)
+
+    assert result.to_dict() == {
+        'values_changed': {"root['other']": {'new_value': 2, 'old_value': 1}},
+        'frame_changed': {
+            "root['df']": {
+                'cells_changed': {
+                    'mismatched': 1, 'size': 9, 'columns': {'count': 1},
+                    'first_cells': [{'row': 'x', 'column': 'count', 'old_value': 1, 'new_value': 5}],
+                },
+            },
+        },
+    }
+    assert result.count() == 2
+
+
+def test_json_diff_frame_fallback():
+    """Check that the DeepDiff fallback for data that is not JSON-native still compares the frames by column."""
+    old_dict = {**_cached({'df': _FRAME}), 'other': (1, 2)}
+    new_dict = {**make_diffable({'df': _changed(cells={('x', 'count'): 5})}), 'other': (1, 3)}
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=[], json_native=True)
+
+    assert [*result.to_dict()['frame_changed']] == ["root['df']"]
+    assert [*result.to_dict()['values_changed']] == ["root['other'][1]"]
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules_check_frame(json_native):
+    """Check the per-column tolerances of the rule."""
+    old_dict = _cached({'df': _FRAME})
+    new_dict = make_diffable({'df': _changed(cells={('x', 'price'): 1.01, ('y', 'count'): 3})})
+    tolerant = [AssertRule.build_re(pattern=['df'], func=gen_check_frame(tolerances={'price': {'atol': 0.1}}))]
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=tolerant, json_native=json_native)
+
+    assert [*result.to_dict()] == [f'For {tolerant[0]}']
+    assert result.to_dict()[f'For {tolerant[0]}']['cells_changed']['columns'] == {'count': 1}
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules_excluded_frame(json_native):
+    """Check that frames excluded by path are not compared by either differ."""
+    old_dict = _cached({'df': _FRAME})
+    new_dict = make_diffable({'df': _changed(cells={('x', 'count'): 5})})
+    rules = [AssertRule(pattern="root['df']", func=lambda _old, _new: True)]
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=rules, json_native=json_native)
+
+    assert result.to_dict() == {}
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+@pytest.mark.parametrize(
+    'frame', [
+        {'columns': ['a']},
+        {'columns': ['a'], 'dtypes': ['int64'], 'index': [0], 'index_dtype': 'int64', 'data': [[1, 2]]},
+        {'columns': ['a'], 'dtypes': ['int64'], 'index': [0], 'index_dtype': 'int64', 'data': [[1]], 'extra': 1},
+    ],
+)
+def test_user_data_with_frame_key(frame, json_native):
+    """Check that user data with the `_frame` key that does not match the schema is compared as data."""
+    old_dict = _cached({'df': {KEY_NAME_FRAME: frame}})
+    new_dict = make_diffable({'df': {KEY_NAME_FRAME: {**frame, 'columns': ['b']}}})
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=[], json_native=json_native)
+
+    assert result.to_dict() == {
+        'values_changed': {f"root['df']['{KEY_NAME_FRAME}']['columns'][0]": {'new_value': 'b', 'old_value': 'a'}},
+    }
+    assert is_identical(old_dict, _cached({'df': {KEY_NAME_FRAME: frame}}))
+    assert frame_diff(old_dict['df'], new_dict['df']) == {'old_value': old_dict['df'], 'new_value': new_dict['df']}
+
+
+def test_validator_frame():
+    """Check that the validator message reports the changed cells."""
+    cached_data = _cached({'df': _FRAME})
+    test_data = make_diffable({'df': _changed(cells={('z', 'price'): 4.0})})
+
+    with pytest.raises(AssertionError, match="'row': 'z'"):
+        DictDiffValidator.assertion(
+            test_data=test_data, cached_data=cached_data, assert_rules=[], path_cache_file=Path('sample.json'),
+        )
+    DictDiffValidator.assertion(test_data=make_diffable({'df': _FRAME}), cached_data=cached_data, assert_rules=[])
+
+
+def test_frame_array_store(fix_tmp_assert):
+    """Check that large numeric columns are stored as `.npy` sidecar files."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(array_min_size=100))
+    df = pd.DataFrame({'value': np.linspace(0, 1, 1_000), 'name': ['a'] * 1_000})
+    main.assert_against_cache({'df': df}, **fix_tmp_assert)
+    main.assert_against_cache({'df': df.copy()}, **fix_tmp_assert)
+
+    path_cache_file = fix_tmp_assert['path_cache_dir'] / fix_tmp_assert['cache_name']
+    cached = loads(path_cache_file.read_text())[KEY_NAME_DATA]['df'][KEY_NAME_FRAME]
+    assert [KEY_NAME_ARRAY in column for column in cached['data']] == [True, False]
+    assert KEY_NAME_ARRAY in cached['index']
+    df.loc[10, 'value'] = -1
+    with pytest.raises(AssertionError, match='cells_changed'):
+        main.assert_against_cache({'df': df}, **fix_tmp_assert)
+
+
+def _frames(rows):
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'value': rng.random(rows), 'count': rng.integers(0, 100, rows), 'name': rng.choice(['a', 'b', 'c'], rows),
+    })
+    changed = df.copy()
+    changed.loc[rows // 2, 'value'] += 1
+    return df, changed
+
+
+_OLD_FRAME, _NEW_FRAME = _frames(100_000)
+_OLD_DICT = loads(dumps({'df': _OLD_FRAME}))
+_NEW_DICT = make_diffable({'df': _NEW_FRAME})
+_OLD_RECORDS = loads(dumps({'df': _OLD_FRAME.to_dict()}))
+_NEW_RECORDS = make_diffable({'df': _NEW_FRAME.to_dict()})
+
+
+@pytest.mark.benchmark(group='frame')
+@pytest.mark.parametrize('layout', ['columnar', 'to_dict'])
+def test_benchmark_frame(layout, benchmark):
+    """Compare the columnar frame against the previous `DataFrame.to_dict()` layout with one changed cell."""
+    old_dict, new_dict = (_OLD_DICT, _NEW_DICT) if layout == 'columnar' else (_OLD_RECORDS, _NEW_RECORDS)
+
+    result = benchmark(diff_with_rules, old_dict=old_dict, new_dict=new_dict, assert_rules=[], json_native=True)
+
+    assert result.count() == 1
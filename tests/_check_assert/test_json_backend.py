@@ -0,0 +1,131 @@
+"""Test json_backend.py."""
+
+import json
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from pytest_cache_assert._check_assert.json_backend import (
+    JSON_BACKENDS,
+    JSONBackendType,
+    get_json_backend,
+    set_json_backend,
+)
+from pytest_cache_assert._check_assert.serializer import _CacheAssertSerializer, pretty_dumps
+
+_ACCELERATED = [name for name in JSON_BACKENDS if name != 'json']
+
+_JSON_DATA = st.recursive(
+    st.none() | st.booleans() | st.integers() | st.floats(allow_nan=False, allow_infinity=False) | st.text(),
+    lambda children: st.lists(children) | st.dictionaries(st.text(), children),
+    max_leaves=25,
+)
+
+
+@pytest.fixture(params=_ACCELERATED)
+def backend(request) -> JSONBackendType:
+    return JSON_BACKENDS[request.param]
+
+
+@pytest.fixture()
+def restore_json_backend():
+    active = get_json_backend()
+    yield
+    set_json_backend(next(name for name, _b in JSON_BACKENDS.items() if _b is active))
+
+
+@pytest.mark.parametrize(
+    'value', [
+        {'b': [], 'a': {}, 'c': [1, {'d': None, 'e': True}]},
+        {'floats': [0.1, 1e-05, 1e-9, 1e16, 1.5e300, -0.0, 100.0, 1234567.125, 2**53 + 1.0]},
+        {'escapes': '\x7f\x01\x1f\x0b\x0c\b\n"\\/é😀 ', 'é': 'key', '"quoted": 1.5': 'key'},
+        ['top level list', 18446744073709551615, -9223372036854775808],
+        1.5e-07,
+    ],
+)
+def test_dumps_parity(value, backend):
+    """Check that accelerated output is byte-for-byte identical to the stdlib."""
+    result = backend.dumps(value, sort_keys=True, indent=2)
+
+    assert result == json.dumps(value, sort_keys=True, indent=2)
+
+
+def test_dumps_defers_compact_output(backend):
+    """Check that the compact separators of the stdlib are not emulated."""
+    result = backend.dumps({'a': [1, 2]}, sort_keys=False, indent=0)
+
+    assert result is None
+
+
+@pytest.mark.parametrize(
+    'value', [
+        {'nan': float('nan')},
+        {'inf': [float('inf')]},
+        {'datetime': datetime(2021, 11, 1)},  # noqa: DTZ001
+        {'uuid': UUID(int=1)},
+        {1: 'non-string key'},
+        {'big': 2**70},
+        {'surrogate': '\ud800'},
+    ],
+)
+def test_dumps_defers_to_stdlib(value, backend):
+    """Check that values the accelerated backend cannot format identically are deferred to the stdlib."""
+    result = backend.dumps(value, sort_keys=True, indent=2)
+
+    assert result in {None, json.dumps(value, sort_keys=True, indent=2, cls=_CacheAssertSerializer)}
+
+
+@settings(deadline=None)
+@given(value=_JSON_DATA)
+def test_dumps_and_loads_parity_with_hypothesis(value):
+    """Check parity for arbitrary JSON data."""
+    expected = json.dumps(value, sort_keys=True, indent=2)
+    for name in _ACCELERATED:
+        result = JSON_BACKENDS[name].dumps(value, sort_keys=True, indent=2)
+        assert result in {None, expected}, name
+        assert JSON_BACKENDS[name].loads(expected) == json.loads(expected), name
+
+
+@pytest.mark.parametrize(
+    'raw', ['{"a": 1, "a": 2}', '123456789012345678901234567890', '-0', '"\\ud800"', 'NaN', '[1E400, -Infinity]'],
+)
+def test_loads_parity(raw, backend):
+    """Check that decoding matches the stdlib for edge cases."""
+    result = backend.loads(raw)
+
+    expected = json.loads(raw)
+    assert repr(result) == repr(expected)
+
+
+@pytest.mark.usefixtures('restore_json_backend')
+def test_set_json_backend():
+    """Check that the backend can be selected by name."""
+    result = set_json_backend('json')
+
+    assert isinstance(result, JSONBackendType)
+    assert get_json_backend() is result
+    with pytest.raises(ValueError, match='is not an available JSON backend'):
+        set_json_backend('unknown')
+
+
+_LARGE_PAYLOAD = {
+    'items': [
+        {'id': idx, 'name': f'name-{idx} ✓', 'tags': ['a', 'b'], 'score': idx / 3, 'flag': idx % 2 == 0}
+        for idx in range(2_000)
+    ],
+}
+
+
+@pytest.mark.benchmark(group='pretty_dumps')
+@pytest.mark.parametrize('name', [*JSON_BACKENDS])
+@pytest.mark.usefixtures('restore_json_backend')
+def test_benchmark_pretty_dumps(name, benchmark):
+    """Compare pretty_dumps for each available backend."""
+    set_json_backend(name)
+
+    result = benchmark(pretty_dumps, _LARGE_PAYLOAD)
+
+    assert result == json.dumps(_LARGE_PAYLOAD, sort_keys=True, indent=2) + '\n'
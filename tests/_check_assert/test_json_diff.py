@@ -0,0 +1,123 @@
+"""Test json_diff.py."""
+
+import copy
+import random
+import re
+from pathlib import Path
+
+import pytest
+from deepdiff import DeepDiff
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from pytest_cache_assert import JSONDiffValidator
+from pytest_cache_assert._check_assert.json_diff import json_diff
+from pytest_cache_assert._check_assert.serializer import dumps, loads
+
+_SCALARS = (
+    st.none() | st.booleans() | st.integers(-2, 2) | st.floats(allow_infinity=False)
+    | st.sampled_from(['a', 'b', 'a\nb', 'a\nc', ''])
+)
+_KEYS = st.sampled_from(['a', 'b', 'c', '__private', 'd e'])
+_JSON = st.recursive(
+    _SCALARS, lambda children: st.lists(children, max_size=5) | st.dictionaries(_KEYS, children, max_size=4),
+    max_leaves=20,
+)
+_EXCLUDE_PATHS = st.lists(st.sampled_from(['a', "root['b']", "root[0]"]), max_size=2)
+_EXCLUDE_REGEX_PATHS = st.lists(st.sampled_from([re.compile(r"\['a'\]\[\d+\]"), r'root\[1\]']), max_size=2)
+
+
+def _mutate(node, rnd):
+    """Randomly modify the data in place, so that the trees share most of their structure."""
+    if isinstance(node, dict):
+        for key in [*node]:
+            choice = rnd.random()
+            if choice < 0.15:
+                del node[key]
+            elif choice < 0.3:
+                node[key] = rnd.choice([1, 'x', None, [1, 2], {'a': 1}])
+            else:
+                _mutate(node[key], rnd)
+        if rnd.random() < 0.2:
+            node[rnd.choice('abc')] = 5
+    elif isinstance(node, list):
+        for idx, value in enumerate(node):
+            node[idx] = rnd.choice([1, 2.0, True, 'a', {'a': 2}]) if rnd.random() < 0.3 else _mutate(value, rnd)
+        choice = rnd.random()
+        if choice < 0.2 and node:
+            node.pop(rnd.randrange(len(node)))
+        elif choice < 0.4:
+            node.insert(rnd.randrange(len(node) + 1), rnd.choice([0, 'b', None]))
+        elif choice < 0.5:
+            rnd.shuffle(node)
+    return node
+
+
+@settings(max_examples=500, deadline=None)
+@given(old=_JSON, new=_JSON, exclude_paths=_EXCLUDE_PATHS, exclude_regex_paths=_EXCLUDE_REGEX_PATHS)
+def test_json_diff_matches_deepdiff(old, new, exclude_paths, exclude_regex_paths):
+    """Check that the differences are identical to DeepDiff for unrelated trees."""
+    kwargs = {'exclude_paths': exclude_paths, 'exclude_regex_paths': exclude_regex_paths}
+
+    result = json_diff(old, new, **kwargs)
+
+    assert result == dict(DeepDiff(t1=old, t2=new, **kwargs))
+
+
+@settings(max_examples=500, deadline=None)
+@given(old=_JSON, seed=st.integers(), exclude_paths=_EXCLUDE_PATHS, exclude_regex_paths=_EXCLUDE_REGEX_PATHS)
+def test_json_diff_matches_deepdiff_for_edits(old, seed, exclude_paths, exclude_regex_paths):
+    """Check that the differences are identical to DeepDiff for small edits, such as reordered lists."""
+    new = _mutate(copy.deepcopy(old), random.Random(seed))
+    kwargs = {'exclude_paths': exclude_paths, 'exclude_regex_paths': exclude_regex_paths}
+
+    result = json_diff(old, new, **kwargs)
+
+    assert result == dict(DeepDiff(t1=old, t2=new, **kwargs))
+
+
+@pytest.mark.parametrize(
+    ('old', 'new'), [
+        ({'a': {1, 2}}, {'a': {2, 3}}),
+        ({'a': (1, 2)}, {'a': (1, 3)}),
+        ({1: 'a'}, {1: 'b'}),
+    ],
+)
+def test_json_diff_falls_back_to_deepdiff(old, new):
+    """Check that data that is not JSON-native is compared by DeepDiff."""
+    result = json_diff(old, new)
+
+    assert result == dict(DeepDiff(t1=old, t2=new))
+
+
+def test_json_diff_validator():
+    """Check that the validator reports differences."""
+    cached_data = {'a': [1, 2, 3], 'b': 'text'}
+
+    JSONDiffValidator.assertion(test_data=loads(dumps(cached_data)), cached_data=cached_data, assert_rules=[])
+    with pytest.raises(AssertionError, match='iterable_item_added'):
+        JSONDiffValidator.assertion(
+            test_data={**cached_data, 'a': [1, 2, 3, 4]}, cached_data=cached_data, assert_rules=[],
+            path_cache_file=Path('sample.json'),
+        )
+
+
+_LARGE_OLD = {
+    'items': [
+        {'id': idx, 'value': idx / 3, 'tags': ['a', None, True], 'meta': {'name': f'item {idx}'}}
+        for idx in range(5_000)
+    ],
+}
+_LARGE_NEW = {**_LARGE_OLD, 'items': [{**_i, 'value': _i['value'] + 1} for _i in _LARGE_OLD['items'][::7]]}
+
+
+@pytest.mark.benchmark(group='raw_diff')
+@pytest.mark.parametrize('differ', ['json_diff', 'deepdiff'])
+def test_benchmark_raw_diff(differ, benchmark):
+    """Compare the JSON-native differ against DeepDiff for a large document with many differences."""
+    if differ == 'json_diff':
+        result = benchmark(json_diff, _LARGE_OLD, _LARGE_NEW)
+    else:
+        result = benchmark(lambda: dict(DeepDiff(t1=_LARGE_OLD, t2=_LARGE_NEW)))
+
+    assert len(result['values_changed']) > 700
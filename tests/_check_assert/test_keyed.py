@@ -0,0 +1,109 @@
+"""Test keyed.py."""
+
+from pathlib import Path
+
+import pytest
+from deepdiff import DeepDiff
+
+from pytest_cache_assert import AssertRule, JSONDiffValidator, gen_check_keyed
+from pytest_cache_assert._check_assert.differ import diff_with_rules
+from pytest_cache_assert._check_assert.keyed import keyed_diff
+
+_USERS = [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}, {'id': 3, 'name': 'c'}]
+
+
+@pytest.mark.parametrize(
+    ('old', 'new', 'expected'), [
+        (_USERS, _USERS[::-1], {}),
+        (_USERS, [{'id': 0, 'name': 'z'}, *_USERS], {'record_added': {'id=0': {'id': 0, 'name': 'z'}}}),
+        (_USERS, _USERS[1:], {'record_removed': {'id=1': {'id': 1, 'name': 'a'}}}),
+        (
+            [{'id': '1'}], [{'id': 1}],
+            {'record_removed': {"id='1'": {'id': '1'}}, 'record_added': {'id=1': {'id': 1}}},
+        ),
+    ],
+)
+def test_keyed_diff_records(old, new, expected):
+    """Check that records are matched by the key regardless of their index."""
+    result = keyed_diff(old, new, 'id')
+
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    ('old_record', 'new_record'), [
+        ({'id': 2, 'name': 'b'}, {'id': 2, 'name': 'B'}),
+        ({'id': 2, 'name': 'b'}, {'id': 2, 'name': 'b', 'age': 1}),
+        ({'id': 2, 'value': 1}, {'id': 2, 'value': 1.0}),
+        ({'id': 2, 'tags': ['a', 'b']}, {'id': 2, 'tags': ['b', 'a']}),
+        ({'id': 2, 'tags': {'a'}}, {'id': 2, 'tags': {'b'}}),
+    ],
+)
+def test_keyed_diff_changed(old_record, new_record):
+    """Check that the differences within a record are reported like DeepDiff."""
+    result = keyed_diff([*_USERS[:1], old_record], [new_record, *_USERS[:1]], 'id')
+
+    assert result == {'record_changed': {'id=2': dict(DeepDiff(t1=old_record, t2=new_record))}}
+
+
+@pytest.mark.parametrize(
+    ('old', 'new'), [
+        ([{'id': 1}, {'id': 1}], [{'id': 1}]),
+        ([{'name': 'a'}], [{'id': 1}]),
+        ([1, 2], [2, 1]),
+        ({'id': 1}, [{'id': 1}]),
+    ],
+)
+def test_keyed_diff_without_unique_keys(old, new):
+    """Check that values that are not lists of records with a unique key are compared as a whole."""
+    result = keyed_diff(old, new, 'id')
+
+    assert result == {'old_value': old, 'new_value': new}
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules_keyed(json_native):
+    """Check that an inserted record is reported once instead of as a change at every following index."""
+    old_dict = {'users': _USERS, 'count': 3}
+    new_dict = {'users': [{'id': 0, 'name': 'z'}, *_USERS[:2], {'id': 3, 'name': 'C'}], 'count': 4}
+    assert_rules = [AssertRule.build_re(pattern=['users'], func=gen_check_keyed('id'))]
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=assert_rules, json_native=json_native)
+
+    assert result.to_dict() == {
+        'values_changed': {"root['count']": {'new_value': 4, 'old_value': 3}},
+        f'For {assert_rules[0]}': {
+            'record_added': {'id=0': {'id': 0, 'name': 'z'}},
+            'record_changed': {'id=3': {'values_changed': {"root['name']": {'new_value': 'C', 'old_value': 'c'}}}},
+        },
+    }
+
+
+def test_validator_keyed():
+    """Check that the validator accepts reordered records with the rule."""
+    cached_data = {'users': _USERS}
+    test_data = {'users': _USERS[::-1]}
+    assert_rules = [AssertRule.build_re(pattern=['users'], func=gen_check_keyed('id'))]
+
+    with pytest.raises(AssertionError):
+        JSONDiffValidator.assertion(
+            test_data=test_data, cached_data=cached_data, assert_rules=[], path_cache_file=Path('sample.json'),
+        )
+    JSONDiffValidator.assertion(test_data=test_data, cached_data=cached_data, assert_rules=assert_rules)
+
+
+_RECORDS_OLD = {'users': [{'id': _i, 'name': f'user {_i}', 'tags': ['a', _i % 5]} for _i in range(2_000)]}
+_RECORDS_NEW = {'users': [{'id': -1, 'name': 'new', 'tags': []}, *_RECORDS_OLD['users']]}
+
+
+@pytest.mark.benchmark(group='keyed')
+@pytest.mark.parametrize('differ', ['keyed', 'by_index'])
+def test_benchmark_keyed(differ, benchmark):
+    """Compare the keyed rule against comparing by index for a list of records with one record inserted at the front."""
+    if differ == 'keyed':
+        assert_rules = [AssertRule.build_re(pattern=['users'], func=gen_check_keyed('id'))]
+        result = benchmark(diff_with_rules, old_dict=_RECORDS_OLD, new_dict=_RECORDS_NEW, assert_rules=assert_rules)
+        assert result.count() == 1
+    else:
+        result = benchmark(diff_with_rules, old_dict=_RECORDS_OLD, new_dict=_RECORDS_NEW, assert_rules=[])
+        assert result.count() > 2_000
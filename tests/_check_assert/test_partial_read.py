@@ -0,0 +1,117 @@
+"""Test partial_read.py."""
+
+import tracemalloc
+
+import pytest
+
+from pytest_cache_assert import AssertConfig, CacheAssertContainerKeys, SQLiteCacheStore, main, register
+from pytest_cache_assert._check_assert.caching import write_cache_data
+from pytest_cache_assert._check_assert.partial_read import parse_selector, read_selected, select
+from pytest_cache_assert._check_assert.write_behind import WRITE_BEHIND
+
+_DATA = {
+    'items': [{'id': idx, 'name': f'item-{idx}'} for idx in range(5)],
+    'tricky': {'"quoted" [key]': ['{', '}', '\\"', 'é'], "it's": None, 'empty': {}, 'list': []},
+    'numbers': [1.5e-07, -2, True, False, None],
+    '3': 'string key that looks like an index',
+}
+
+
+@pytest.mark.parametrize(
+    ('selector', 'expected'), [
+        ('root', []),
+        ("root['items'][3]", ['items', 3]),
+        ('''root["it's"]['b']''', ["it's", 'b']),
+        ("root['a\\'b'][10]", ["a'b", 10]),
+    ],
+)
+def test_parse_selector(selector, expected):
+    """Check that selectors in the DeepDiff path syntax are parsed."""
+    assert parse_selector(selector) == expected
+
+
+@pytest.mark.parametrize('selector', ['items', "root['items'", 'root[-1]', "root['a']x"])
+def test_parse_selector_invalid(selector):
+    """Check that invalid selectors raise an error."""
+    with pytest.raises(ValueError, match='selector'):
+        parse_selector(selector)
+
+
+@pytest.mark.parametrize(
+    'selector', [
+        'root',
+        "root['items']",
+        "root['items'][3]",
+        "root['items'][4]['name']",
+        """root['tricky']['"quoted" [key]']""",
+        """root['tricky']['"quoted" [key]'][2]""",
+        '''root['tricky']["it's"]''',
+        "root['tricky']['empty']",
+        "root['tricky']['list']",
+        "root['numbers'][0]",
+        "root['numbers'][3]",
+        "root['3']",
+        "root['items']['2']",
+    ],
+)
+def test_read_selected(selector, fix_cache_path):
+    """Check that the streamed subtree matches the in-memory selection."""
+    path_cache_file = fix_cache_path / 'sample.json'
+    write_cache_data(path_cache_file, metadata={'meta': ['[', '{']}, test_data=_DATA)
+    segments = parse_selector(selector)
+
+    result = read_selected(path_cache_file, segments)
+
+    assert result == select(_DATA, segments)
+
+
+@pytest.mark.parametrize('selector', ["root['missing']", "root['items'][5]", "root['items']['name']", "root[7]"])
+def test_read_selected_missing(selector, fix_cache_path):
+    """Check that a missing subtree raises a KeyError."""
+    path_cache_file = fix_cache_path / 'sample.json'
+    write_cache_data(path_cache_file, metadata={}, test_data=_DATA)
+
+    with pytest.raises(KeyError):
+        read_selected(path_cache_file, parse_selector(selector))
+
+
+@pytest.mark.parametrize(
+    'config', [
+        AssertConfig(),
+        AssertConfig(compress_min_bytes=1),
+        AssertConfig(blob_store=True, blob_min_bytes=50),
+        AssertConfig(write_behind=True),
+        AssertConfig(blob_store=True, blob_min_bytes=50, write_behind=True),
+        AssertConfig(cache_store=SQLiteCacheStore()),
+    ],
+)
+def test_read_from_cache_selector(config, fix_tmp_assert):
+    """Check the selector for each storage option."""
+    register(CacheAssertContainerKeys.CONFIG, config)
+    main.assert_against_cache(_DATA, **fix_tmp_assert)
+
+    for selector in ["root['items'][3]", """root['tricky']['"quoted" [key]']""", "root['numbers'][2]", "root['3']"]:
+        result = main.read_from_cache(**fix_tmp_assert, selector=selector)
+
+        assert result == select(_DATA, parse_selector(selector)), selector
+    with pytest.raises(KeyError):
+        main.read_from_cache(**fix_tmp_assert, selector="root['missing']")
+    WRITE_BEHIND.flush()
+
+
+def test_read_selected_memory(fix_cache_path):
+    """Check that the peak memory scales with the selected subtree rather than the file."""
+    path_cache_file = fix_cache_path / 'large.json'
+    data = {'items': [{'id': idx, 'name': f'item-{idx}', 'tags': ['a', 'b']} for idx in range(50_000)]}
+    write_cache_data(path_cache_file, metadata={}, test_data=data)
+    file_size = path_cache_file.stat().st_size
+
+    tracemalloc.start()
+    try:
+        result = read_selected(path_cache_file, parse_selector("root['items'][40000]"))
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert result == data['items'][40_000]
+    assert peak < file_size / 20
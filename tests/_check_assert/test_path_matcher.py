@@ -0,0 +1,97 @@
+"""Test path_matcher.py."""
+
+import re
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from pytest_cache_assert import AssertRule, Wild, check_suppress
+from pytest_cache_assert._check_assert.path_matcher import (
+    FallbackMatcher,
+    PathMatcher,
+    SegmentKind,
+    compile_matcher,
+    format_path,
+)
+
+_PATTERNS = [
+    AssertRule.build_re(pattern=['a'], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=['a', 'b'], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=['a', Wild.keys()], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=['a', Wild.keys(2), 'c'], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=['a', Wild.index()], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=['a', Wild.recur()], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=['a', Wild.recur(), 'c'], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=[Wild.recur(2)], func=check_suppress).pattern,
+    AssertRule.build_re(pattern=[r'a\.b'], func=check_suppress).pattern,
+    re.compile(r"root\['a'\]\[\d+\]\['b'\]"),
+    re.compile(r"root\['a'\]\[1\]$"),
+    re.compile(r"^root\['b'\]$"),
+    "root['a']",
+    "root['A'][1]",
+    "root['a']['b']['c']",
+]
+_FALLBACK_PATTERNS = ['b', "['c']", 'root', re.compile("'c'"), re.compile(r"root\['a'\]", re.IGNORECASE)]
+
+_KEYS = ['a', 'b', 'c', 'A', '1', '', 'a.b', 'x]y']
+_PATHS = st.lists(st.sampled_from(_KEYS) | st.integers(min_value=0, max_value=2), max_size=5).map(tuple)
+
+
+def _expected(pattern, path) -> bool:
+    """Match the path string like `DeepSearch`."""
+    text = format_path(path)
+    if isinstance(pattern, str):
+        return pattern.lower() in text.lower()
+    return pattern.search(text) is not None
+
+
+@pytest.mark.parametrize('pattern', _PATTERNS)
+def test_compile_matcher_segments(pattern):
+    """Check that the patterns from `build_re`, `Wild`, and full paths are compiled to segments."""
+    result = compile_matcher(AssertRule(pattern=pattern, func=check_suppress))
+
+    assert isinstance(result, PathMatcher)
+
+
+@pytest.mark.parametrize('pattern', _FALLBACK_PATTERNS)
+def test_compile_matcher_fallback(pattern):
+    """Check that other patterns are matched against the path string."""
+    result = compile_matcher(AssertRule(pattern=pattern, func=check_suppress))
+
+    assert isinstance(result, FallbackMatcher)
+
+
+def test_compile_matcher_kinds():
+    """Check the segments of a pattern with each kind of wildcard."""
+    pattern = AssertRule.build_re(pattern=['a', Wild.keys(), Wild.index(), Wild.recur()], func=check_suppress).pattern
+
+    result = compile_matcher(AssertRule(pattern=pattern, func=check_suppress))
+
+    assert [(_s.kind, _s.value) for _s in result.segments] == [
+        (SegmentKind.KEY, 'a'), (SegmentKind.ANY_KEY, None), (SegmentKind.DIGIT_KEY, None), (SegmentKind.RECUR, None),
+    ]
+
+
+@pytest.mark.parametrize('pattern', _PATTERNS)
+@given(path=_PATHS)
+def test_path_matcher_parity(pattern, path):
+    """Check that the segments agree with the path string for each prefix and only prune when nothing can match."""
+    matcher = compile_matcher(AssertRule(pattern=pattern, func=check_suppress))
+    state = matcher.start()
+    for idx, segment in enumerate(path, start=1):
+        state = matcher.advance(state, segment)
+        if state is None:
+            assert not any(_expected(pattern, path[:_i]) for _i in range(idx, len(path) + 1))
+            return
+        assert matcher.is_match(state) == _expected(pattern, path[:idx])
+
+
+@pytest.mark.parametrize('pattern', _FALLBACK_PATTERNS)
+@given(path=_PATHS)
+def test_fallback_matcher_parity(pattern, path):
+    """Check that other patterns match the path string like `DeepSearch`."""
+    matcher = compile_matcher(AssertRule(pattern=pattern, func=check_suppress))
+    text = format_path(path)
+
+    assert matcher.is_match(text, text.lower()) == _expected(pattern, path)
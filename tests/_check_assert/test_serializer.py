@@ -1,14 +1,48 @@
 """Test serialization."""
 
+import dataclasses
 import json
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from enum import Enum, IntEnum
 from functools import partial
+from ipaddress import ip_address
+from pathlib import Path
 from unittest.mock import MagicMock
 from uuid import UUID
 
 import arrow
+import attr
+import numpy as np
+import pandas as pd
 import pytest
+from beartype.typing import Dict, List, Literal, Optional, Set, Tuple
+from pydantic import BaseModel, ConfigDict, Field, PlainSerializer, field_serializer
+from typing_extensions import Annotated
+
+from pytest_cache_assert import Converter
+from pytest_cache_assert._check_assert import serializer
+from pytest_cache_assert._check_assert.serializer import (
+    _CONVERTERS,
+    _FIELD_PLANS,
+    _Converters,
+    _is_json_mode_model,
+    dumps,
+    loads,
+    make_diffable,
+    register_user_converters,
+)
+
+
+class _Color(str, Enum):
+    RED = 'red'
 
-from pytest_cache_assert._check_assert.serializer import make_diffable
+
+class _Level(IntEnum):
+    HIGH = 3
+
+
+_Point = namedtuple('_Point', ['x', 'y'])  # noqa: PYI024
 
 
 @pytest.mark.parametrize(
@@ -34,3 +68,335 @@ def test_make_diffable(value, expected):
     result = make_diffable(value)
 
     assert result == expected
+
+
+@pytest.mark.parametrize(
+    'value', [
+        {1: 'int', 1.5: 'float', True: 'bool', None: 'null', float('inf'): 'inf'},
+        {'tuple': (1, (2.0, [3])), 'namedtuple': _Point(1, 2), 'ordered': OrderedDict(b=1, a=2)},
+        {_Color.RED: _Color.RED, _Level.HIGH: _Level.HIGH},
+        {'complex': complex(1, 2), 'bytes': b'raw', 'set': {'a'}, 'uuids': [UUID(int=3), UUID(int=3)]},
+        [{'nested': [{'deep': [arrow.get('20211101'), None]}]}],
+    ],
+)
+def test_make_diffable_matches_json_round_trip(value):
+    """Check that the single-pass walker is equivalent to serializing and deserializing with json."""
+    result = make_diffable(value)
+
+    expected = loads(dumps(value))
+    assert result == expected
+    assert dumps(result) == dumps(expected)
+
+
+def test_make_diffable_circular_reference():
+    """Check that circular references raise the same error as the json encoder."""
+    value = {'a': []}
+    value['a'].append(value)
+
+    with pytest.raises(ValueError, match='Circular reference detected'):
+        make_diffable(value)
+
+
+class _Base:  # noqa: PIE798
+    ...
+
+
+class _Child(_Base):  # noqa: PIE798
+    ...
+
+
+def test_converter_dispatch_cache():
+    """Check that converters are resolved once per type and invalidated on register."""
+    converters = _Converters()
+    converters.register([_Base], str)
+
+    assert converters.resolve(_Child) == [str]
+    assert _Child in converters.dispatch_cache
+    assert converters.resolve(int) == []
+
+    converters.register([_Child], repr)
+
+    assert not converters.dispatch_cache
+    assert converters.resolve(_Child) == [repr, str]
+
+
+def test_converter_registry_is_idempotent():
+    """Check that re-registering converters does not grow the registry or rebuild the lookup."""
+    converters = _Converters()
+    converters.register_pairs([(_Base, str), (_Child, repr)])
+    version = converters.version
+
+    converters.register_pairs([(_Base, str), (_Child, repr)])
+
+    assert converters.version == version
+    assert converters.converters == [(_Base, str), (_Child, repr)]
+
+    converters.register([_Child], str)
+    converters.register_pairs([(_Base, str), (_Child, repr)])  # act
+
+    assert converters.converters == [(_Child, str), (_Base, str), (_Child, repr)]
+    assert converters.get_lookup()[_Child] == [repr, str]
+
+
+def test_register_user_converters_repeatedly():
+    """Check that registering the same AssertConfig converters on every assertion keeps the registry flat."""
+    user_converters = [Converter(types=[_Base, _Child], func=str)]
+    register_user_converters(user_converters)
+    count, version = len(_CONVERTERS.converters), _CONVERTERS.version
+
+    for _idx in range(100):
+        register_user_converters([Converter(types=[_Base, _Child], func=str)])
+
+    assert len(_CONVERTERS.converters) == count
+    assert _CONVERTERS.version == version
+
+
+_LARGE_PAYLOAD = {
+    'items': [
+        {'id': idx, 'name': f'name-{idx}', 'tags': ['a', 'b'], 'score': idx / 3, 'meta': {'uuid': UUID(int=idx)}}
+        for idx in range(5_000)
+    ],
+}
+
+
+@pytest.mark.benchmark(group='make_diffable')
+@pytest.mark.parametrize(
+    'func', [
+        make_diffable,
+        lambda data: loads(dumps(data)),
+    ], ids=['walker', 'json round trip'],
+)
+def test_benchmark_make_diffable(func, benchmark):
+    """Compare the single-pass walker against the previous json round trip on a large nested payload."""
+    result = benchmark(func, _LARGE_PAYLOAD)
+
+    assert len(result['items']) == len(_LARGE_PAYLOAD['items'])
+
+
+class _Tag(BaseModel):
+    name: str
+    weight: Optional[float] = None
+
+
+class _Item(BaseModel):
+    id: int
+    tags: List[_Tag] = []
+    meta: Dict[str, Tuple[int, ...]] = {}
+    kind: Literal['a', 'b'] = 'a'
+    ref: Optional[UUID] = None
+
+
+class _WithPath(BaseModel):
+    path: Path = Path('tests')
+
+
+class _WithDate(BaseModel):
+    items: List[_Item] = []
+    at: datetime = datetime(2021, 11, 1)
+
+
+class _WithSet(BaseModel):
+    values: Set[int] = {1}
+
+
+class _WithSerializer(BaseModel):
+    value: int = 1
+
+    @field_serializer('value')
+    def _double(self, value: int) -> int:
+        return value * 2
+
+
+class _WithAnnotatedSerializer(BaseModel):
+    value: List[Annotated[int, PlainSerializer(lambda value: f'{value}', return_type=str)]] = [1]
+
+
+class _WithAnnotatedConstraint(BaseModel):
+    value: List[Annotated[int, Field(ge=0)]] = [1]
+
+
+class _WithExtra(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+
+class _Node(BaseModel):
+    children: List['_Node'] = []
+
+
+@pytest.mark.parametrize(
+    ('model', 'expected'), [
+        (_Item, True),
+        (_Tag, True),
+        (_WithPath, False),
+        (_WithDate, False),
+        (_WithSet, False),
+        (_WithSerializer, False),
+        (_WithAnnotatedSerializer, False),
+        (_WithAnnotatedConstraint, True),
+        (_WithExtra, False),
+        (_Node, False),
+    ],
+)
+def test_is_json_mode_model(model, expected):
+    """Check that JSON mode is only used when the output would match the registered converters."""
+    assert _is_json_mode_model(model) is expected
+
+
+def test_is_json_mode_model_without_annotated(monkeypatch):
+    """Check that nested `Annotated` types are not JSON mode when `typing.Annotated` is unavailable (Python 3.8)."""
+    monkeypatch.setattr(serializer, '_ANNOTATED', None)
+    monkeypatch.setattr(serializer, '_JSON_MODE_MODELS', {})
+
+    assert _is_json_mode_model(_WithAnnotatedConstraint) is False
+    assert _is_json_mode_model(_Item) is True
+
+
+@pytest.mark.parametrize(
+    'value', [
+        _Item(id=1, tags=[_Tag(name='a', weight=float('nan'))], meta={'k': (1, 2)}, ref=UUID(int=1)),
+        _WithDate(items=[_Item(id=2)]),
+        _WithPath(),
+        _WithSet(values={2, 1}),
+        _WithSerializer(),
+        _Node(children=[_Node()]),
+        _Item.model_construct(id='not an int', tags=None),
+        np.array([[1, 2], [3, 4]], dtype=np.uint8),
+        np.array([1.5, float('nan')], dtype=np.float32),
+        np.array(['a', 'bc']),
+        np.array([True, False]),
+        np.array([1, 'a', None], dtype=object),
+        np.array([complex(1, 2)]),
+        pd.DataFrame({'s': ['a', 'b'], 'mixed': ['a', None], 'n': [1.5, 2.0], 't': pd.to_datetime(['2021', '2022'])}),
+    ],
+)
+def test_native_converters(value):
+    """Check that the native fast paths match converting the generic Python objects with the other converters."""
+    result = make_diffable(value)
+
+    expected = loads(dumps(value))
+    assert repr(result) == repr(expected)
+    if isinstance(value, BaseModel):
+        assert repr(result) == repr(make_diffable(value.model_dump()))
+    elif isinstance(value, np.ndarray):
+        assert repr(result) == repr(make_diffable(value.tolist()))
+
+
+_MODELS = [
+    _Item(id=idx, tags=[_Tag(name=f'tag-{idx}', weight=idx / 3)], meta={'k': (idx,)}, ref=UUID(int=idx))
+    for idx in range(5_000)
+]
+_ARRAY = np.linspace(0, 1, 1_000_000)
+_STRINGS = pd.DataFrame({'name': np.random.default_rng(42).choice(['a', 'b', 'c'], 200_000).astype(object)})
+
+
+def _generic_frame(df):
+    return {'columns': df.columns.tolist(), 'data': [df[column].to_numpy().tolist() for column in df]}
+
+
+@pytest.mark.parametrize(
+    ('converter', 'func'), [
+        ('pydantic', lambda: make_diffable(_MODELS)),
+        ('pydantic', lambda: make_diffable([model.model_dump() for model in _MODELS])),
+        ('numpy', lambda: make_diffable(_ARRAY)),
+        ('numpy', lambda: make_diffable(_ARRAY.tolist())),
+        ('pandas', lambda: make_diffable(_STRINGS)),
+        ('pandas', lambda: make_diffable(_generic_frame(_STRINGS))),
+    ],
+    ids=['pydantic-native', 'pydantic-generic', 'numpy-native', 'numpy-generic', 'pandas-native', 'pandas-generic'],
+)
+def test_benchmark_native_converters(converter, func, benchmark):
+    """Compare each native fast path against walking the generic Python objects (`model_dump()` and `tolist()`)."""
+    benchmark.group = f'converter-{converter}'
+
+    result = benchmark(func)
+
+    assert result
+
+
+@dataclasses.dataclass
+class _Record:
+    id: int
+    tags: List[str]
+    parent: Optional['_Record'] = None
+
+
+@attr.s(auto_attribs=True, slots=True)
+class _AttrsRecord:
+    name: str = 'a'
+
+
+class _Slots:
+    __slots__ = ('x', 'y')
+
+    def __init__(self) -> None:
+        self.x = 1
+
+
+class _ChildSlots(_Slots):
+    __slots__ = ('__weakref__', 'z')
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.z = _Record(id=2, tags=[])
+
+
+class _NamedSlots(_Slots):
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return 'named'
+
+
+class _NoSlots(_Slots):
+    pass
+
+
+@pytest.mark.parametrize(
+    ('value', 'expected'), [
+        (_Record(id=1, tags=['a'], parent=_Record(id=0, tags=[])), {
+            'id': 1, 'tags': ['a'], 'parent': {'id': 0, 'tags': [], 'parent': None},
+        }),
+        (_AttrsRecord(), {'name': 'a'}),
+        (_Slots(), {'x': 1}),
+        (_ChildSlots(), {'x': 1, 'z': {'id': 2, 'tags': [], 'parent': None}}),
+        (_NamedSlots(), 'named'),
+        (_NoSlots(), '<tests._check_assert.test_serializer._NoSlots object(..)>'),
+        (ip_address('127.0.0.1'), '127.0.0.1'),
+    ],
+)
+def test_serialize_fields(value, expected):
+    """Check that dataclasses, attrs classes, and `__slots__` classes are serialized by field, skipping unset slots."""
+    result = make_diffable(value)
+
+    assert result == expected
+    assert loads(dumps(value)) == expected
+
+
+def test_field_plan_cache():
+    """Check that each class is only introspected once."""
+    make_diffable([_Record(id=idx, tags=[]) for idx in range(3)])
+
+    plan = _FIELD_PLANS[_Record]
+    make_diffable(_Record(id=4, tags=[]))
+
+    assert _FIELD_PLANS[_Record] is plan
+    assert plan.names == ('id', 'tags', 'parent')
+    assert _FIELD_PLANS[_NoSlots] is None
+
+
+_RECORDS = [_Record(id=idx, tags=[f'tag-{idx}'], parent=_Record(id=-idx, tags=[])) for idx in range(100_000)]
+
+
+@pytest.mark.benchmark(group='converter-fields')
+@pytest.mark.parametrize(
+    'func', [
+        lambda: make_diffable(_RECORDS),
+        lambda: make_diffable([dataclasses.asdict(record) for record in _RECORDS]),
+    ],
+    ids=['plan', 'asdict'],
+)
+def test_benchmark_serialize_fields(func, benchmark):
+    """Compare the cached field plans against converting each record with `dataclasses.asdict`."""
+    result = benchmark(func)
+
+    assert result[-1]['parent']['id'] == -99_999
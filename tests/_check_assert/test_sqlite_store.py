@@ -0,0 +1,102 @@
+"""Test sqlite_store.py."""
+
+import multiprocessing
+
+import pytest
+
+from pytest_cache_assert import AssertConfig, CacheAssertContainerKeys, NoCacheError, SQLiteCacheStore, main, register
+from pytest_cache_assert._check_assert.caching import load_cached_data, write_cache_data
+from pytest_cache_assert._check_assert.constants import KEY_NAME_META
+from pytest_cache_assert._check_assert.serializer import loads
+from pytest_cache_assert._check_assert.sqlite_store import DB_NAME, cli, export_json, import_json
+
+
+@pytest.fixture()
+def sqlite_assert(fix_tmp_assert):
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(cache_store=SQLiteCacheStore()))
+    return {**fix_tmp_assert, 'cache_name': 'nested/test_sqlite.json'}
+
+
+def test_sqlite_cache_store(sqlite_assert):
+    """Check that snapshots are stored in a single database and compared against the cached data."""
+    main.assert_against_cache({'result': False}, **sqlite_assert, metadata={'run': 1})
+    main.assert_against_cache({'result': False}, **sqlite_assert, metadata={'run': 2})
+    main.assert_against_cache({'result': False}, **sqlite_assert, metadata={'run': 2})
+
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'result': True}, **sqlite_assert)
+    assert main.read_from_cache(**sqlite_assert) == {'result': False}
+    assert [*sqlite_assert['path_cache_dir'].glob('**/*.json')] == []
+    with pytest.raises(AssertionError):  # Compared against the old data, but overwrites the cache
+        main.assert_against_cache({'result': True}, **sqlite_assert, always_write=True)
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'result': False}, **sqlite_assert)
+
+
+def test_sqlite_cache_store_no_cache(sqlite_assert):
+    """Check that a missing database or snapshot raises NoCacheError."""
+    with pytest.raises(NoCacheError):
+        main.read_from_cache(**sqlite_assert)
+    SQLiteCacheStore.initialize(sqlite_assert['path_cache_dir'])
+    with pytest.raises(NoCacheError):
+        main.read_from_cache(**sqlite_assert)
+
+
+@pytest.mark.parametrize(
+    ('data', 'selector', 'expected'), [
+        ({'big': 2**64 + 1, 'items': [1]}, "root['big']", 2**64 + 1),
+        ({'nan': float('nan'), 'items': [1, {'a': None}]}, "root['items'][1]", {'a': None}),
+        ({'nan': float('nan'), 'inf': float('inf')}, "root['inf']", float('inf')),
+        ({'flag': True, 'name': 'x'}, "root['flag']", True),
+    ],
+)
+def test_sqlite_selector(data, selector, expected, sqlite_assert):
+    """Check that selected subtrees are decoded like full reads, including non-standard JSON and large integers."""
+    main.assert_against_cache(data, **sqlite_assert)
+
+    result = main.read_from_cache(**sqlite_assert, selector=selector)
+
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_sqlite_export_and_import(fix_cache_path):
+    """Check that the database round trips through the per-file JSON layout of LocalJSONCacheStore."""
+    path_json_dir = fix_cache_path / 'json'
+    path_cache_file = path_json_dir / 'a_dir/sample.json'
+    for idx in range(3):
+        write_cache_data(path_cache_file, metadata={'run': idx, 'é': None}, test_data={'number': 1.5, 'list': [idx]})
+    write_cache_data(path_json_dir / 'other.json', metadata=None, test_data=[None])
+    path_db = fix_cache_path / 'db' / DB_NAME
+
+    assert import_json(path_json_dir, path_db) == 2
+    assert SQLiteCacheStore.read_cached_data(fix_cache_path / 'db/a_dir/sample.json') == {'number': 1.5, 'list': [0]}
+    cli(['export', str(path_db), str(fix_cache_path / 'exported')])
+
+    exported = fix_cache_path / 'exported/a_dir/sample.json'
+    assert exported.read_text() == path_cache_file.read_text()
+    assert len(loads(exported.read_text())[KEY_NAME_META]) == 3
+    assert load_cached_data(fix_cache_path / 'exported/other.json') == [None]
+    assert export_json(path_db, fix_cache_path / 'exported') == 2
+
+
+def _update_worker(path_cache_file, idx) -> None:
+    SQLiteCacheStore.update(path_cache_file, metadata={'worker': idx}, test_data={'value': idx})
+
+
+def test_sqlite_concurrent_workers(fix_cache_path):
+    """Check that concurrent processes can share the database."""
+    SQLiteCacheStore.initialize(fix_cache_path)
+    path_cache_file = fix_cache_path / 'concurrent.json'
+    ctx = multiprocessing.get_context('fork')
+    processes = [ctx.Process(target=_update_worker, args=(path_cache_file, idx)) for idx in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+
+    assert [process.exitcode for process in processes] == [0] * len(processes)
+    assert SQLiteCacheStore.read_cached_data(path_cache_file) in [{'value': idx} for idx in range(4)]
+    export_json(fix_cache_path / DB_NAME, fix_cache_path / 'exported')
+    meta = loads((fix_cache_path / 'exported/concurrent.json').read_text())[KEY_NAME_META]
+    assert sorted(_m['worker'] for _m in meta) == list(range(4))
@@ -0,0 +1,150 @@
+"""Test unordered.py."""
+
+import random
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from deepdiff import DeepDiff
+from hypothesis import given
+from hypothesis import strategies as st
+
+from pytest_cache_assert import AssertRule, JSONDiffValidator, check_unordered
+from pytest_cache_assert._check_assert.differ import diff_with_rules
+from pytest_cache_assert._check_assert.unordered import canonical, describe_unordered, unordered_diff
+
+_ITEMS = st.lists(st.sampled_from([0, 1, 1.0, True, 'a', None]) | st.lists(st.integers(0, 2), max_size=2))
+
+
+@pytest.mark.parametrize(
+    ('old', 'new', 'expected'), [
+        ([1, 2, 3], [3, 1, 2], True),
+        ([1, 1, 2], [1, 2, 2], False),
+        ([1], [1.0], False),
+        ([1], [True], False),
+        ({'a': [[1, 2], [3]]}, {'a': [[3], [2, 1]]}, True),
+        ([{'a': 1, 'b': 2}], [{'b': 2, 'a': 1}], True),
+        ([{'a': 1}], [{'a': 1, 'b': 2}], False),
+        ([{1, 2}], [{2, 1}], True),
+    ],
+)
+def test_check_unordered(old, new, expected):
+    """Check that lists are equal regardless of order, but with the types and number of repetitions."""
+    assert check_unordered(old, new) is expected
+
+
+@given(old=_ITEMS, new=_ITEMS)
+def test_unordered_diff_counts(old, new):
+    """Check that only the surplus of each item is reported as removed or added."""
+    removed, added = unordered_diff(old, new)
+
+    old_counts = Counter(canonical(_i) for _i in old)
+    new_counts = Counter(canonical(_i) for _i in new)
+    assert Counter(canonical(old[_i]) for _i in removed) == old_counts - new_counts
+    assert Counter(canonical(new[_i]) for _i in added) == new_counts - old_counts
+    assert removed == sorted(removed)
+    assert added == sorted(added)
+
+
+@given(old=_ITEMS, seed=st.integers())
+def test_unordered_diff_shuffled(old, seed):
+    """Check that a reordered list has no differences."""
+    new = [*old]
+    random.Random(seed).shuffle(new)
+
+    assert unordered_diff(old, new) == ([], [])
+
+
+def test_describe_unordered():
+    """Check that only the items that were added or removed are summarized."""
+    result = describe_unordered([{'id': 1}, {'id': 2}, {'id': 3}], [{'id': 3}, {'id': 4}, {'id': 1}])
+
+    assert result == {'iterable_item_removed': {'[1]': {'id': 2}}, 'iterable_item_added': {'[1]': {'id': 4}}}
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules_check_unordered(json_native):
+    """Check that a rule ignores the order of only the matched list."""
+    old_dict = {'events': [1, 2, 3], 'ordered': [1, 2]}
+    assert_rules = [AssertRule.build_re(pattern=['events'], func=check_unordered)]
+
+    passing = diff_with_rules(
+        old_dict=old_dict, new_dict={**old_dict, 'events': [3, 2, 1]}, assert_rules=assert_rules,
+        json_native=json_native,
+    )
+    failing = diff_with_rules(
+        old_dict=old_dict, new_dict={'events': [3, 4, 1], 'ordered': [2, 1]}, assert_rules=assert_rules,
+        json_native=json_native,
+    )
+
+    assert passing.to_dict() == {}
+    assert failing.to_dict() == {
+        'values_changed': {
+            "root['ordered'][0]": {'new_value': 2, 'old_value': 1},
+            "root['ordered'][1]": {'new_value': 1, 'old_value': 2},
+        },
+        f'For {assert_rules[0]}': {'iterable_item_removed': {'[1]': 2}, 'iterable_item_added': {'[1]': 4}},
+    }
+
+
+@pytest.mark.parametrize('json_native', [False, True])
+def test_diff_with_rules_ignore_order(json_native):
+    """Check that every list is compared regardless of order, but that other differences are still reported."""
+    old_dict = {'a': [{'id': 1, 'tags': ['x', 'y']}, {'id': 2}], 'b': 1}
+    new_dict = {'a': [{'id': 3}, {'id': 1, 'tags': ['y', 'x']}], 'b': 2}
+
+    result = diff_with_rules(
+        old_dict=old_dict, new_dict=new_dict, assert_rules=[], json_native=json_native, ignore_order=True,
+    )
+
+    assert result.to_dict() == {
+        'values_changed': {"root['b']": {'new_value': 2, 'old_value': 1}},
+        'iterable_item_added': {"root['a'][0]": {'id': 3}},
+        'iterable_item_removed': {"root['a'][1]": {'id': 2}},
+    }
+
+
+def test_diff_with_rules_ignore_order_fallback():
+    """Check that data that is not JSON-native is compared by DeepDiff, which also ignores the order."""
+    old_dict = {'a': (1, 2, 3)}
+    new_dict = {'a': (3, 1, 4)}
+
+    result = diff_with_rules(old_dict=old_dict, new_dict=new_dict, assert_rules=[], ignore_order=True)
+
+    assert result.to_dict() == dict(DeepDiff(t1=old_dict, t2=new_dict, ignore_order=True))
+
+
+@pytest.mark.parametrize('pattern', [AssertRule.build_re(pattern=['events'], func=check_unordered).pattern, 'events'])
+def test_validator_rule_unordered(pattern):
+    """Check that the validator accepts a reordered list without checking the rule again for the descendants."""
+    cached_data = {'events': [{'id': _i} for _i in range(5)]}
+    test_data = {'events': cached_data['events'][::-1]}
+    assert_rules = [AssertRule(pattern=pattern, func=check_unordered)]
+
+    with pytest.raises(AssertionError):
+        JSONDiffValidator.assertion(
+            test_data=test_data, cached_data=cached_data, assert_rules=[], path_cache_file=Path('sample.json'),
+        )
+    JSONDiffValidator.assertion(test_data=test_data, cached_data=cached_data, assert_rules=assert_rules)
+
+
+_EVENTS_OLD = {'events': [{'id': _i, 'value': _i / 3, 'tags': ['a', _i % 5]} for _i in range(2_000)]}
+_EVENTS_NEW = {'events': [*_EVENTS_OLD['events'][:4:-1], *({'id': -_i} for _i in range(5))]}
+
+
+@pytest.mark.benchmark(group='ignore_order')
+@pytest.mark.parametrize('differ', ['multiset', 'rule', 'deepdiff'])
+def test_benchmark_ignore_order(differ, benchmark):
+    """Compare the multiset comparison against `DeepDiff(ignore_order=True)` for a reversed list of records."""
+    if differ == 'multiset':
+        result = benchmark(
+            diff_with_rules, old_dict=_EVENTS_OLD, new_dict=_EVENTS_NEW, assert_rules=[], ignore_order=True,
+        )
+        assert result.count() == 10
+    elif differ == 'rule':
+        assert_rules = [AssertRule.build_re(pattern=['events'], func=check_unordered)]
+        result = benchmark(diff_with_rules, old_dict=_EVENTS_OLD, new_dict=_EVENTS_NEW, assert_rules=assert_rules)
+        assert [*result.to_dict()] == [f'For {assert_rules[0]}']
+    else:
+        result = benchmark(DeepDiff, t1=_EVENTS_OLD, t2=_EVENTS_NEW, ignore_order=True)
+        assert result
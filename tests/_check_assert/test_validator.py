@@ -0,0 +1,101 @@
+"""Test validator.py."""
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from pytest_cache_assert import (
+    AssertConfig,
+    AssertRule,
+    CacheAssertContainerKeys,
+    DictDiffValidator,
+    JSONDiffValidator,
+    check_exact,
+    check_suppress,
+    check_type,
+    register,
+)
+from pytest_cache_assert._check_assert import validator
+from pytest_cache_assert._check_assert.assert_rules import gen_check_date_range
+from pytest_cache_assert._check_assert.differ import is_identical
+from pytest_cache_assert._check_assert.serializer import dumps, loads
+
+_PAYLOAD = {'items': [{'id': idx, 'value': idx / 3, 'tags': ['a', None, True]} for idx in range(5_000)]}
+
+
+@pytest.mark.parametrize(
+    ('old', 'new', 'expected'), [
+        ({'a': [1, {'b': None}]}, {'a': [1, {'b': None}]}, True),
+        ({'a': 1, 'b': 2}, {'b': 2, 'a': 1}, True),
+        ({'a': 20}, {'a': 20.0}, False),
+        ({'a': True}, {'a': 1}, False),
+        ({'a': float('nan')}, {'a': float('nan')}, False),
+        ({'a': 1}, {'a': 2}, False),
+        ([], {}, False),
+    ],
+)
+def test_is_identical(old, new, expected):
+    """Check that only type-identical data is considered identical."""
+    assert is_identical(old, new) is expected
+
+
+@pytest.mark.parametrize('assert_rules', [[], [AssertRule(pattern="root['items']", func=check_suppress)]])
+def test_assertion_skips_differ_when_identical(assert_rules, monkeypatch):
+    """Check that the differ is not called for identical data."""
+    def _fail(**_kwargs):
+        raise AssertionError('The differ should have been skipped')
+
+    monkeypatch.setattr(validator, 'diff_with_rules', _fail)
+
+    DictDiffValidator.assertion(test_data=_PAYLOAD, cached_data=_PAYLOAD, assert_rules=assert_rules)
+
+
+def test_assertion_applies_value_rules_when_identical():
+    """Check that rules that can reject unchanged values still run."""
+    data = {'date': '2020-01-01T00:00:00'}
+    assert_rules = [
+        AssertRule(pattern="root['date']", func=check_exact),
+        AssertRule(pattern="root['date']", func=gen_check_date_range(min_date=datetime(2021, 1, 1))),  # noqa: DTZ001
+    ]
+
+    with pytest.raises(AssertionError):
+        DictDiffValidator.assertion(
+            test_data=data, cached_data=data, assert_rules=assert_rules, path_cache_file=Path('sample.json'),
+        )
+
+
+def test_assertion_reports_type_changes():
+    """Check that equal values of different types are still reported."""
+    with pytest.raises(AssertionError, match='type_changes'):
+        DictDiffValidator.assertion(
+            test_data={'a': 20.0}, cached_data={'a': 20}, assert_rules=[], path_cache_file=Path('sample.json'),
+        )
+
+
+@pytest.mark.parametrize(
+    ('validator_type', 'expected'), [
+        (DictDiffValidator, 'Truncated to the first 5 of 20 differences'),
+        (JSONDiffValidator, 'Truncated to the first 5 of at least 6 differences'),
+    ],
+)
+def test_assertion_truncates_message(validator_type, expected):
+    """Check that the message reports the truncated differences when `max_diffs` is set."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(max_diffs=5))
+
+    with pytest.raises(AssertionError, match=expected) as exc_info:
+        validator_type.assertion(
+            test_data=[*range(100, 120)], cached_data=[*range(20)], assert_rules=[],
+            path_cache_file=Path('sample.json'),
+        )
+
+    assert exc_info.value.error_info['diff_results'].count() == 5
+
+
+@pytest.mark.benchmark(group='validator')
+@pytest.mark.parametrize('assert_rules', [[], [AssertRule.build_re(pattern=['items', r'\d+', 'id'], func=check_type)]])
+def test_benchmark_identical_assertion(assert_rules, benchmark):
+    """Measure the assertion for identical data."""
+    cached_data = loads(dumps(_PAYLOAD))
+
+    benchmark(DictDiffValidator.assertion, test_data=_PAYLOAD, cached_data=cached_data, assert_rules=assert_rules)
@@ -0,0 +1,192 @@
+"""Test write_behind.py."""
+
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from pytest_cache_assert import AssertConfig, CacheAssertContainerKeys, main, register
+from pytest_cache_assert._check_assert.caching import fcntl, load_cached_data
+from pytest_cache_assert._check_assert.constants import KEY_NAME_META
+from pytest_cache_assert._check_assert.serializer import dumps, loads
+from pytest_cache_assert._check_assert import write_behind
+from pytest_cache_assert._check_assert.write_behind import WRITE_BEHIND, _WriteBehindQueue
+
+
+@pytest.mark.parametrize('use_thread', [False, True])
+def test_write_behind_coalesces_writes(use_thread, fix_cache_path):
+    """Check that writes are deferred until flushed and that metadata is merged per file."""
+    queue = _WriteBehindQueue(use_thread=use_thread)
+    path_cache_file = fix_cache_path / 'coalesced.json'
+
+    first = queue.update(path_cache_file, metadata={'run': 1}, test_data={'a': 1})
+    second = queue.update(path_cache_file, metadata={'run': 2}, test_data={'a': 2})
+    overwritten = queue.update(path_cache_file, metadata={'run': 3}, test_data={'a': 3}, always_write=True)
+
+    assert (first, second, overwritten) == ({'a': 1}, {'a': 1}, {'a': 1})
+    assert queue.read(path_cache_file) == {'a': 3}
+    if not use_thread:
+        assert not path_cache_file.is_file()
+        assert queue.pending_count() == 1
+    assert queue.flush() in {0, 1}
+    assert queue.pending_count() == 0
+    assert load_cached_data(path_cache_file) == {'a': 3}
+    meta = loads(path_cache_file.read_text())[KEY_NAME_META]
+    assert sorted(_m['run'] for _m in meta) == [1, 2, 3]
+
+
+def test_write_behind_does_not_block_during_write(fix_cache_path, monkeypatch):
+    """Check that updates and reads are served from memory while the background thread writes the file."""
+    started, release = threading.Event(), threading.Event()
+    update_cache_file = write_behind.update_cache_file
+
+    def _blocked_update(*args, **kwargs):
+        started.set()
+        release.wait(timeout=30)
+        return update_cache_file(*args, **kwargs)
+
+    monkeypatch.setattr(write_behind, 'update_cache_file', _blocked_update)
+    queue = _WriteBehindQueue(use_thread=True)
+    path_cache_file = fix_cache_path / 'in_flight.json'
+    queue.update(path_cache_file, metadata={'run': 1}, test_data={'a': 1})
+    assert started.wait(timeout=30)
+    results = []
+    reader = threading.Thread(target=lambda: results.extend([
+        queue.has_pending(path_cache_file), queue.read(path_cache_file),
+        queue.update(path_cache_file, metadata={'run': 2}, test_data={'a': 2}, always_write=True),
+    ]))
+
+    reader.start()
+    reader.join(timeout=10)
+    release.set()
+    queue.flush()
+
+    assert results == [True, {'a': 1}, {'a': 1}]
+    assert load_cached_data(path_cache_file) == {'a': 2}
+    assert queue.pending_count() == 0
+
+
+def test_write_behind_merges_existing_file(fix_cache_path):
+    """Check that the queued content is based on the current cache file."""
+    queue = _WriteBehindQueue()
+    path_cache_file = fix_cache_path / 'existing.json'
+    queue.update(path_cache_file, metadata={'run': 1}, test_data={'a': 1})
+    queue.flush()
+
+    result = queue.update(path_cache_file, metadata={'run': 2}, test_data={'a': 2})
+    queue.flush()
+
+    assert result == {'a': 1}
+    assert load_cached_data(path_cache_file) == {'a': 1}
+    assert len(loads(path_cache_file.read_text())[KEY_NAME_META]) == 2
+
+
+def _interrupted_session(journal_dir, path_cache_file) -> None:
+    queue = _WriteBehindQueue(journal_dir=journal_dir)
+    queue.update(path_cache_file, metadata={'run': 1}, test_data={'a': 1})
+    queue.update(path_cache_file, metadata={'run': 2}, test_data={'a': 2}, always_write=True)
+    os._exit(1)  # Exit without flushing
+
+
+@pytest.mark.skipif(fcntl is None, reason='Requires fork')
+def test_write_behind_recovers_journal(fix_cache_path):
+    """Check that updates from an interrupted session are replayed from the journal."""
+    journal_dir = fix_cache_path / 'journal'
+    path_cache_file = fix_cache_path / 'recovered.json'
+    process = multiprocessing.get_context('fork').Process(
+        target=_interrupted_session, args=(journal_dir, path_cache_file),
+    )
+    process.start()
+    process.join(timeout=60)
+    assert process.exitcode == 1
+    assert not path_cache_file.is_file()
+
+    result = _WriteBehindQueue(journal_dir=journal_dir).recover()
+
+    assert result == 2
+    assert load_cached_data(path_cache_file) == {'a': 2}
+    assert [*journal_dir.iterdir()] == []
+
+
+def test_write_behind_skips_active_journal(fix_cache_path):
+    """Check that the journal of a running session is not replayed and is removed after a flush."""
+    journal_dir = fix_cache_path / 'journal'
+    queue = _WriteBehindQueue(journal_dir=journal_dir)
+    queue.update(fix_cache_path / 'active.json', metadata={}, test_data={'a': 1})
+
+    result = _WriteBehindQueue(journal_dir=journal_dir).recover()
+
+    assert result == (0 if fcntl else 1)
+    assert queue.flush() == 1
+    assert [*journal_dir.iterdir()] == []
+
+
+def test_write_behind_journals_only_changes(fix_cache_path):
+    """Check that updates that do not change the cache file are not journaled."""
+    journal_dir = fix_cache_path / 'journal'
+    path_cache_file = fix_cache_path / 'unchanged.json'
+    queue = _WriteBehindQueue()
+    queue.update(path_cache_file, metadata={'run': 1}, test_data={'a': 1})
+    queue.flush()
+    queue = _WriteBehindQueue(journal_dir=journal_dir)
+
+    queue.update(path_cache_file, metadata={'run': 1}, test_data={'a': 1})
+    queue.update(path_cache_file, metadata={'run': 1}, test_data={'a': 2})
+    assert not journal_dir.is_dir()
+    queue.update(path_cache_file, metadata={'run': 2}, test_data={'a': 1})
+    queue.update(path_cache_file, metadata={'run': 2}, test_data={'a': 3}, always_write=True)
+
+    assert len([*journal_dir.glob('*.jsonl')][0].read_text().splitlines()) == 2
+    queue.flush()
+
+
+def test_write_behind_recover_removed_journal(fix_cache_path, monkeypatch):
+    """Check that a journal removed by a concurrent session is skipped."""
+    journal_dir = fix_cache_path / 'journal'
+    journal_dir.mkdir()
+    monkeypatch.setattr(type(journal_dir), 'glob', lambda *_args: iter([journal_dir / 'journal-removed.jsonl']))
+
+    assert _WriteBehindQueue(journal_dir=journal_dir).recover() == 0
+
+
+def test_write_behind_recover_keeps_journal_on_error(fix_cache_path, monkeypatch):
+    """Check that the journal is only removed once every update was replayed."""
+    journal_dir = fix_cache_path / 'journal'
+    path_journal = journal_dir / 'journal-interrupted.jsonl'
+    journal_dir.mkdir()
+    record = {'metadata': {}, 'test_data': {'a': 1}, 'always_write': False, 'external': []}
+    path_journal.write_text(''.join(
+        dumps({**record, 'path': str(fix_cache_path / name)}) + '\n' for name in ['first.json', 'second.json']
+    ))
+    update_cache_file = write_behind.update_cache_file
+
+    def _failing_update(path_cache_file, **kwargs):
+        if path_cache_file.name == 'second.json':
+            raise OSError('disk full')
+        return update_cache_file(path_cache_file, **kwargs)
+
+    monkeypatch.setattr(write_behind, 'update_cache_file', _failing_update)
+    with pytest.raises(OSError, match='disk full'):
+        _WriteBehindQueue(journal_dir=journal_dir).recover()
+    assert path_journal.is_file()
+    monkeypatch.setattr(write_behind, 'update_cache_file', update_cache_file)
+
+    assert _WriteBehindQueue(journal_dir=journal_dir).recover() == 2
+    assert not path_journal.is_file()
+    assert load_cached_data(fix_cache_path / 'second.json') == {'a': 1}
+
+
+def test_assert_against_cache_write_behind(fix_tmp_assert):
+    """Check that assertions use the pending content when configured."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(write_behind=True))
+    path_cache_file = fix_tmp_assert['path_cache_dir'] / fix_tmp_assert['cache_name']
+
+    main.assert_against_cache({'result': False}, **fix_tmp_assert)
+
+    assert not path_cache_file.is_file()
+    with pytest.raises(AssertionError):
+        main.assert_against_cache({'result': True}, **fix_tmp_assert)
+    assert main.read_from_cache(**fix_tmp_assert) == {'result': False}
+    WRITE_BEHIND.flush()
+    assert load_cached_data(path_cache_file) == {'result': False}
@@ -9,7 +9,16 @@ import pytest
 from hypothesis import HealthCheck, given, settings
 from hypothesis import strategies as st
 
-from pytest_cache_assert import AssertRule, check_suppress, check_type
+from pytest_cache_assert import (
+    AssertConfig,
+    AssertRule,
+    CacheAssertContainerKeys,
+    CacheStoreType,
+    check_suppress,
+    check_type,
+    register,
+)
+from pytest_cache_assert._check_assert.caching import load_cached_data, write_cache_data
 from pytest_cache_assert._check_assert.differ import DiffResults
 from pytest_cache_assert._check_assert.error_message import RichAssertionError
 from pytest_cache_assert.main import assert_against_cache, assert_against_dict
@@ -38,6 +47,40 @@ def test_assert_against_cache_failure(fix_tmp_assert):  # noqa: AAA01
     assert error_info['diff_results'] == diff_results
 
 
+class _StoreWithoutUpdate:
+    """Custom cache store that only implements the required methods."""
+
+    @staticmethod
+    def initialize(path_cache_dir, converters=None):
+        if path_cache_dir:
+            path_cache_dir.mkdir(exist_ok=True, parents=True)
+
+    @staticmethod
+    def serialize(data):
+        return data
+
+    @staticmethod
+    def write(path_cache_file, *, metadata, test_data, always_write=False):
+        write_cache_data(path_cache_file, metadata=metadata, test_data=test_data, always_write=always_write)
+
+    @staticmethod
+    def read_cached_data(path_cache_file, selector=None):
+        return load_cached_data(path_cache_file)
+
+
+def test_assert_against_cache_without_update(fix_tmp_assert):
+    """Check that custom cache stores without the optional `update` read and then write."""
+    register(CacheAssertContainerKeys.CONFIG, AssertConfig(cache_store=_StoreWithoutUpdate()))
+    assert isinstance(_StoreWithoutUpdate(), CacheStoreType)
+
+    assert_against_cache({'result': False}, **fix_tmp_assert)
+    assert_against_cache({'result': False}, **fix_tmp_assert)
+
+    with pytest.raises(AssertionError, match=DEF_ERROR_MESSAGE):
+        assert_against_cache({'result': True}, **fix_tmp_assert)
+    assert load_cached_data(fix_tmp_assert['path_cache_dir'] / fix_tmp_assert['cache_name']) == {'result': False}
+
+
 def test_assert_against_dict():
     """Quick check that the in-memory assert works as expected."""
     old = {'key': 1, 'keys': [{'nested': 2}]}